@@ -15,6 +15,14 @@ if [ $1 = "e" ]; then
 elif [ $1 = "m" ]; then
   $PY tests/exp/exp_model_for_paper.py
 
+elif [ $1 = "b" ]; then
+  # e.g., `./run.sh b --baseline log/bench_throughput_baseline.json`
+  PYTHONPATH=. $PY tests/bench/bench_throughput.py "${@:2}"
+
+elif [ $1 = "p" ]; then
+  # e.g., `./run.sh p --regime tor_system_w_outlier_detection`
+  PYTHONPATH=. $PY tests/bench/profile_sweep_point.py "${@:2}"
+
 else
   echo "Unexpected arg= $1"
 fi
@@ -5,15 +5,24 @@ import numpy
 import simpy
 import sklearn.cluster
 
-from typing import Optional
+from typing import Iterator, Optional, Sequence
 
+from src import utils
 from src.attack import adversary as adversary_module
 from src.prob import random_variable
-from src.sim import message
+from src.sim import message, stats, trace
 
 from src.debug_utils import check, log, DEBUG, INFO, slog
 
 
+# The attacks do not try to identify the target servers before this many rounds.
+MIN_NUM_ROUNDS = 10
+
+# Rate of the baseline inspections of `DisclosureAttack_wBayesianEstimate`, in
+# units of `1 / max_delivery_time_for_adversary`.
+RATE_OF_BASELINE_INSPECTIONS = 3
+
+
 class DisclosureAttack(adversary_module.Adversary):
     """Tries to deanonymize the (target) servers that a target client talks to.
     """
@@ -38,6 +47,11 @@ class DisclosureAttack(adversary_module.Adversary):
         self.target_server_id_set = None
         self.time_to_complete_attack = None
 
+        # Set to a seeded generator in the common-random-numbers mode.
+        self.rng = None
+        # Set in the tracing mode.
+        self.tracer: trace.EventTracer = None
+
     def __repr__(self):
         return f"DisclosureAttack(error_percent= {self.error_percent})"
 
@@ -80,6 +94,14 @@ class DisclosureAttack(adversary_module.Adversary):
 
         # Update the attack state
         self.update(sample_candidate_set=sample_candidate_set)
+        if self.tracer is not None:
+            self.tracer.record(
+                trace.EventType.ADVERSARY_ROUND,
+                self.env.now,
+                trace.ADVERSARY_NODE_ID,
+                trace.ADVERSARY_NODE_ID,
+                self.num_sample_sets_collected,
+            )
 
         # Check if the attack is completed
         self.target_server_id_set = self.try_to_get_target_server_id_set()
@@ -122,7 +144,7 @@ class DisclosureAttack(adversary_module.Adversary):
         )
 
     def try_to_get_target_server_id_set(self) -> Optional[set[str]]:
-        if self.num_sample_sets_collected < 10:
+        if self.num_sample_sets_collected < MIN_NUM_ROUNDS:
             return None
 
         weight_and_server_id_list = sorted(
@@ -219,7 +241,7 @@ class DisclosureAttack_wBaselineInspection(DisclosureAttack):
 
         num_msgs_recved_for_get_request = 1
         while True:
-            interval = interval_rv.sample()
+            interval = interval_rv.sample(rng=self.rng)
             slog(DEBUG, self.env, self, "waiting", interval=interval)
             yield self.env.timeout(interval)
 
@@ -273,7 +295,7 @@ class DisclosureAttack_wBaselineInspection_wStationaryRounds(DisclosureAttack_wB
         return f"DisclosureAttack_wBaselineInspection_wStationaryRounds(stability_threshold= {self.stability_threshold})"
 
     def try_to_get_target_server_id_set(self) -> Optional[set[str]]:
-        if self.num_sample_sets_collected < 10:
+        if self.num_sample_sets_collected < MIN_NUM_ROUNDS:
             return None
 
         for server_id in (
@@ -391,11 +413,11 @@ class DisclosureAttack_wBayesianEstimate(DisclosureAttack_wBaselineInspection):
         )
 
     def baseline_inspection(self):
-        interval_rv = random_variable.Exponential(mu=3 / self.max_delivery_time_for_adversary)
+        interval_rv = random_variable.Exponential(mu=RATE_OF_BASELINE_INSPECTIONS / self.max_delivery_time_for_adversary)
 
         num_msgs_recved_for_get_request = 1
         while True:
-            interval = interval_rv.sample()
+            interval = interval_rv.sample(rng=self.rng)
             slog(DEBUG, self.env, self, "waiting", interval=interval)
             yield self.env.timeout(interval)
 
@@ -486,7 +508,7 @@ class DisclosureAttack_wBayesianEstimate(DisclosureAttack_wBaselineInspection):
 
     def try_to_get_target_server_id_set(self) -> Optional[set[str]]:
         if (
-            self.num_sample_sets_collected < 10
+            self.num_sample_sets_collected < MIN_NUM_ROUNDS
             or not self.is_attack_completed()
         ):
             return None
@@ -662,15 +684,312 @@ class ClassificationResult:
         )
 
 
+@dataclasses.dataclass
+class ClassificationResultColumns:
+    """Confusion-matrix counts for a set of replications, stored as one array
+    element per replication. Indexing or iterating over it gives the
+    `ClassificationResult` view of a replication, so it can be used in place of
+    `list[ClassificationResult]`.
+    """
+
+    num_target_servers: int
+    num_non_target_servers: int
+    num_targets_identified_as_target_array: numpy.ndarray
+    num_non_targets_identified_as_target_array: numpy.ndarray
+
+    def __len__(self) -> int:
+        return len(self.num_targets_identified_as_target_array)
+
+    def __getitem__(self, i: int) -> ClassificationResult:
+        num_targets_identified_as_target = int(self.num_targets_identified_as_target_array[i])
+        num_non_targets_identified_as_target = int(self.num_non_targets_identified_as_target_array[i])
+        return ClassificationResult(
+            num_targets_identified_as_target=num_targets_identified_as_target,
+            num_targets_identified_as_non_target=self.num_target_servers - num_targets_identified_as_target,
+            num_non_targets_identified_as_target=num_non_targets_identified_as_target,
+            num_non_targets_identified_as_non_target=self.num_non_target_servers - num_non_targets_identified_as_target,
+        )
+
+    def __iter__(self) -> Iterator[ClassificationResult]:
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def num_targets_identified_as_non_target_array(self) -> numpy.ndarray:
+        return self.num_target_servers - self.num_targets_identified_as_target_array
+
+    @property
+    def num_non_targets_identified_as_non_target_array(self) -> numpy.ndarray:
+        return self.num_non_target_servers - self.num_non_targets_identified_as_target_array
+
+    @property
+    def prob_target_identified_as_non_target_array(self) -> numpy.ndarray:
+        return self.num_targets_identified_as_non_target_array / self.num_target_servers
+
+    @property
+    def prob_non_target_identified_as_target_array(self) -> numpy.ndarray:
+        return self.num_non_targets_identified_as_target_array / self.num_non_target_servers
+
+    @property
+    def is_target_server_set_correct_array(self) -> numpy.ndarray:
+        return (
+            (self.num_targets_identified_as_target_array == self.num_target_servers)
+            & (self.num_non_targets_identified_as_target_array == 0)
+        )
+
+    @classmethod
+    def from_target_server_id_sets(
+        cls,
+        target_server_id_set_list: list[set[str]],
+        num_servers: int,
+        num_target_servers: int,
+    ) -> "ClassificationResultColumns":
+        """True target servers are the ones with rank < `num_target_servers`, so
+        the counts are computed from the integer target mask of the server ranks
+        identified in all replications at once.
+        """
+
+        num_identified_array = numpy.array(
+            [len(target_server_id_set) for target_server_id_set in target_server_id_set_list],
+            dtype=int,
+        )
+        server_rank_array = numpy.fromiter(
+            (
+                utils.get_server_rank(server_id)
+                for target_server_id_set in target_server_id_set_list
+                for server_id in target_server_id_set
+            ),
+            dtype=int,
+            count=num_identified_array.sum(),
+        )
+        replication_index_array = numpy.repeat(
+            numpy.arange(len(target_server_id_set_list)), num_identified_array
+        )
+        is_target_mask = server_rank_array < num_target_servers
+
+        num_targets_identified_as_target_array = numpy.bincount(
+            replication_index_array[is_target_mask],
+            minlength=len(target_server_id_set_list),
+        )
+
+        return cls(
+            num_target_servers=num_target_servers,
+            num_non_target_servers=num_servers - num_target_servers,
+            num_targets_identified_as_target_array=num_targets_identified_as_target_array,
+            num_non_targets_identified_as_target_array=num_identified_array - num_targets_identified_as_target_array,
+        )
+
+    @classmethod
+    def concatenate(
+        cls,
+        classification_result_columns_list: list["ClassificationResultColumns"],
+    ) -> "ClassificationResultColumns":
+        classification_result_columns = classification_result_columns_list[0]
+        return cls(
+            num_target_servers=classification_result_columns.num_target_servers,
+            num_non_target_servers=classification_result_columns.num_non_target_servers,
+            num_targets_identified_as_target_array=numpy.concatenate(
+                [c.num_targets_identified_as_target_array for c in classification_result_columns_list]
+            ),
+            num_non_targets_identified_as_target_array=numpy.concatenate(
+                [c.num_non_targets_identified_as_target_array for c in classification_result_columns_list]
+            ),
+        )
+
+
 @dataclasses.dataclass
 class DisclosureAttackResult:
-    time_to_deanonymize_list: list[float]
-    num_rounds_list: list[int]
+    time_to_deanonymize_list: Sequence[float]
+    num_rounds_list: Sequence[int]
     target_server_set_accuracy: float
-    classification_result_list: list[ClassificationResult]
+    classification_result_list: Sequence[ClassificationResult]
+    sim_stats_list: Optional[list[stats.SimStats]] = None
+
+    def get_column(self, name: str) -> numpy.ndarray:
+        """Returns the per-replication values of `name`, which is one of
+        `time_to_deanonymize`, `num_rounds`, `prob_target_identified_as_non_target`
+        or `prob_non_target_identified_as_target`.
+        """
+
+        if name in ["time_to_deanonymize", "num_rounds"]:
+            return numpy.asarray(getattr(self, f"{name}_list"), dtype=float)
+
+        elif name in ["prob_target_identified_as_non_target", "prob_non_target_identified_as_target"]:
+            if isinstance(self.classification_result_list, ClassificationResultColumns):
+                return getattr(self.classification_result_list, f"{name}_array")
+
+            return numpy.array(
+                [
+                    getattr(classification_result, name)
+                    for classification_result in self.classification_result_list
+                ],
+                dtype=float,
+            )
+
+        raise ValueError(f"Unexpected column name= {name}")
+
+    def mean(self, name: str) -> float:
+        return numpy.mean(self.get_column(name))
+
+    def std(self, name: str) -> float:
+        return numpy.std(self.get_column(name))
+
+    def quantile(self, name: str, q) -> float:
+        return numpy.quantile(self.get_column(name), q)
 
 
 @dataclasses.dataclass
 class DisclosureAttackResult_wSignalSampleStrength(DisclosureAttackResult):
-    signal_strength_for_target_server_list: list[float]
-    signal_strength_for_non_target_server_list: list[float]
+    signal_strength_for_target_server_list: list[float] = dataclasses.field(default_factory=list)
+    signal_strength_for_non_target_server_list: list[float] = dataclasses.field(default_factory=list)
+
+
+def get_disclosure_attack_result(
+    sim_result_list: list[list],
+    num_servers: int,
+    num_target_servers: int,
+) -> DisclosureAttackResult:
+    """Summarizes the replications returned by the `sim` functions, each of which
+    is `[target_server_id_set, time_to_deanonymize, num_rounds, (server_id_to_signal_map), (sim_stats)]`.
+    """
+
+    sim_stats_list = None
+    if all(isinstance(sim_result[-1], stats.SimStats) for sim_result in sim_result_list):
+        sim_stats_list = [sim_result[-1] for sim_result in sim_result_list]
+        sim_result_list = [sim_result[:-1] for sim_result in sim_result_list]
+
+    time_to_deanonymize_array = numpy.array([sim_result[1] for sim_result in sim_result_list], dtype=float)
+    num_rounds_array = numpy.array([sim_result[2] for sim_result in sim_result_list], dtype=int)
+    classification_result_columns = ClassificationResultColumns.from_target_server_id_sets(
+        target_server_id_set_list=[sim_result[0] for sim_result in sim_result_list],
+        num_servers=num_servers,
+        num_target_servers=num_target_servers,
+    )
+    target_server_set_accuracy = numpy.mean(classification_result_columns.is_target_server_set_correct_array)
+    log(
+        DEBUG, "",
+        time_to_deanonymize_array=time_to_deanonymize_array,
+        num_rounds_array=num_rounds_array,
+        target_server_set_accuracy=target_server_set_accuracy,
+    )
+
+    if not all(len(sim_result) > 3 for sim_result in sim_result_list):
+        return DisclosureAttackResult(
+            time_to_deanonymize_list=time_to_deanonymize_array,
+            num_rounds_list=num_rounds_array,
+            target_server_set_accuracy=target_server_set_accuracy,
+            classification_result_list=classification_result_columns,
+            sim_stats_list=sim_stats_list,
+        )
+
+    signal_strength_for_target_server_list = []
+    signal_strength_for_non_target_server_list = []
+    for sim_result in sim_result_list:
+        server_id_to_signal_map = sim_result[3]
+        log(DEBUG, "", server_id_to_signal_map=server_id_to_signal_map)
+
+        signal_strength_for_target_server_list.extend(
+            [
+                server_id_to_signal_map[utils.get_server_id(server_rank)]
+                for server_rank in range(num_target_servers)
+            ]
+        )
+        signal_strength_for_non_target_server_list.extend(
+            [
+                server_id_to_signal_map[utils.get_server_id(server_rank)]
+                for server_rank in range(num_target_servers, num_servers)
+            ]
+        )
+
+    return DisclosureAttackResult_wSignalSampleStrength(
+        time_to_deanonymize_list=time_to_deanonymize_array,
+        num_rounds_list=num_rounds_array,
+        target_server_set_accuracy=target_server_set_accuracy,
+        classification_result_list=classification_result_columns,
+        sim_stats_list=sim_stats_list,
+        signal_strength_for_target_server_list=signal_strength_for_target_server_list,
+        signal_strength_for_non_target_server_list=signal_strength_for_non_target_server_list,
+    )
+
+
+def merge_disclosure_attack_results(
+    disclosure_attack_result_list: list[DisclosureAttackResult],
+) -> DisclosureAttackResult:
+    """Merges the results of disjoint blocks of replications (e.g., the shards
+    written by the workers of `exp.work_queue`) that are run for the same setup.
+    """
+    check(len(disclosure_attack_result_list) > 0, "Nothing to merge")
+
+    time_to_deanonymize_list = numpy.concatenate(
+        [
+            disclosure_attack_result.time_to_deanonymize_list
+            for disclosure_attack_result in disclosure_attack_result_list
+        ]
+    )
+    num_rounds_list = numpy.concatenate(
+        [
+            disclosure_attack_result.num_rounds_list
+            for disclosure_attack_result in disclosure_attack_result_list
+        ]
+    )
+    if all(
+        isinstance(disclosure_attack_result.classification_result_list, ClassificationResultColumns)
+        for disclosure_attack_result in disclosure_attack_result_list
+    ):
+        classification_result_list = ClassificationResultColumns.concatenate(
+            [
+                disclosure_attack_result.classification_result_list
+                for disclosure_attack_result in disclosure_attack_result_list
+            ]
+        )
+    else:
+        classification_result_list = [
+            classification_result
+            for disclosure_attack_result in disclosure_attack_result_list
+            for classification_result in disclosure_attack_result.classification_result_list
+        ]
+
+    target_server_set_accuracy = sum(
+        disclosure_attack_result.target_server_set_accuracy
+        * len(disclosure_attack_result.time_to_deanonymize_list)
+        for disclosure_attack_result in disclosure_attack_result_list
+    ) / len(time_to_deanonymize_list)
+    sim_stats_list = None
+    if all(
+        disclosure_attack_result.sim_stats_list is not None
+        for disclosure_attack_result in disclosure_attack_result_list
+    ):
+        sim_stats_list = [
+            sim_stats
+            for disclosure_attack_result in disclosure_attack_result_list
+            for sim_stats in disclosure_attack_result.sim_stats_list
+        ]
+
+    if all(
+        isinstance(disclosure_attack_result, DisclosureAttackResult_wSignalSampleStrength)
+        for disclosure_attack_result in disclosure_attack_result_list
+    ):
+        return DisclosureAttackResult_wSignalSampleStrength(
+            time_to_deanonymize_list=time_to_deanonymize_list,
+            num_rounds_list=num_rounds_list,
+            target_server_set_accuracy=target_server_set_accuracy,
+            classification_result_list=classification_result_list,
+            sim_stats_list=sim_stats_list,
+            signal_strength_for_target_server_list=[
+                signal_strength
+                for disclosure_attack_result in disclosure_attack_result_list
+                for signal_strength in disclosure_attack_result.signal_strength_for_target_server_list
+            ],
+            signal_strength_for_non_target_server_list=[
+                signal_strength
+                for disclosure_attack_result in disclosure_attack_result_list
+                for signal_strength in disclosure_attack_result.signal_strength_for_non_target_server_list
+            ],
+        )
+
+    return DisclosureAttackResult(
+        time_to_deanonymize_list=time_to_deanonymize_list,
+        num_rounds_list=num_rounds_list,
+        target_server_set_accuracy=target_server_set_accuracy,
+        classification_result_list=classification_result_list,
+        sim_stats_list=sim_stats_list,
+    )
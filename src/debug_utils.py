@@ -1,8 +1,13 @@
-import inspect
+import collections
+import contextlib
+import copy
 import logging
+import logging.handlers
 import os
 import pprint
+import queue as queue_module
 import sys
+import threading
 
 
 # Ref:
@@ -92,17 +97,58 @@ def log_to_file(filename, directory=None):
     logger.addHandler(fh)
 
 
-def get_extra():
-    frame, file_path, lineno, function, code_context, index = inspect.stack()[2]
+level_to_logging_level_map = {
+    DEBUG: logging.DEBUG,
+    INFO: logging.INFO,
+    WARNING: logging.WARNING,
+    ERROR: logging.ERROR,
+    CRITICAL: logging.CRITICAL,
+}
+
+
+def get_extra(depth: int = 2):
+    # Note: `inspect.stack()` builds the frame info (including the source lines)
+    # for the whole stack, while only the caller of the log function is needed.
+    frame = sys._getframe(depth)
     return {
-        "file_name": os.path.split(file_path)[1],
-        "func_name": function,
-        "line_number": lineno,
+        "file_name": os.path.basename(frame.f_code.co_filename),
+        "func_name": frame.f_code.co_name,
+        "line_number": frame.f_lineno,
     }
 
 
+class LogMessage:
+    """Defers formatting the kwargs until a handler emits the record."""
+
+    __slots__ = ("_msg_", "kwargs")
+
+    def __init__(self, _msg_: str, kwargs: dict):
+        self._msg_ = _msg_
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return f"{self._msg_}{pstr(**self.kwargs)}"
+
+
+class SimLogMessage:
+    __slots__ = ("now", "caller", "_msg_", "kwargs")
+
+    def __init__(self, now: float, caller, _msg_: str, kwargs: dict):
+        self.now = now
+        self.caller = caller
+        self._msg_ = _msg_
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return "t: {:.2f}] {}: {} {}".format(self.now, self.caller, self._msg_, pstr(**self.kwargs))
+
+
 def log(level: int, _msg_: str, **kwargs):
-    level_log_m[level](f"{_msg_}{pstr(**kwargs)}", extra=get_extra())
+    logging_level = level_to_logging_level_map[level]
+    if not logger.isEnabledFor(logging_level):
+        return
+
+    logger.log(logging_level, LogMessage(_msg_, kwargs), extra=get_extra())
 
 
 # TODO:
@@ -128,10 +174,179 @@ def pstr(**kwargs):
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~  Sim log  ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 def slog(level: int, env, caller: str, _msg_: str, **kwargs):
-    level_log_m[level](
-        "t: {:.2f}] {}: {} {}".format(env.now, caller, _msg_, pstr(**kwargs)),
-        extra=get_extra(),
+    logging_level = level_to_logging_level_map[level]
+    if not logger.isEnabledFor(logging_level):
+        return
+
+    logger.log(logging_level, SimLogMessage(env.now, caller, _msg_, kwargs), extra=get_extra())
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~  Queued log  ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# Workers only enqueue the records, and a single listener thread formats and
+# writes them, so the simulation does not serialize on the handler locks or I/O.
+# Usage:
+#   listener = start_queued_logging(per_replication_log_dir="log/replications")
+#   ...  # run the sims
+#   stop_queued_logging(listener)
+# Worker processes (rather than threads) should be given a multiprocessing queue,
+# i.e., `start_queued_logging(queue=multiprocessing.Manager().Queue())`, and call
+# `log_to_queue(queue)` at start.
+
+_replication_context = threading.local()
+
+
+@contextlib.contextmanager
+def log_replication(replication: int):
+    """Tags the records logged by the current thread within the context with
+    `replication`, so they are written to the file of the replication if
+    `start_queued_logging(per_replication_log_dir=...)` is on.
+    """
+
+    prev_replication = getattr(_replication_context, "replication", None)
+    _replication_context.replication = replication
+    try:
+        yield
+    finally:
+        _replication_context.replication = prev_replication
+
+
+class QueueHandler_wReplication(logging.handlers.QueueHandler):
+    def __init__(self, queue, in_same_process: bool):
+        super().__init__(queue)
+        self.in_same_process = in_same_process
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        replication = getattr(_replication_context, "replication", None)
+
+        if not self.in_same_process:
+            # Records have to be pickled, so the message is rendered here.
+            record = super().prepare(record)
+            record.replication = replication
+            return record
+
+        # The message is rendered by the listener. Containers in kwargs are copied since
+        # they may be modified by the time the listener gets to them.
+        if isinstance(record.msg, (LogMessage, SimLogMessage)):
+            record.msg.kwargs = {
+                key: copy.copy(value) if isinstance(value, (dict, list, set)) else value
+                for key, value in record.msg.kwargs.items()
+            }
+        record.replication = replication
+        return record
+
+
+class PerReplicationFileHandler(logging.Handler):
+    """Writes each record to `<directory>/replication_<replication>.log`."""
+
+    def __init__(self, directory: str, max_num_open_files: int = 64):
+        super().__init__()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_num_open_files = max_num_open_files
+
+        self.replication_to_file_handler_map = collections.OrderedDict()
+        self.replication_set_seen = set()
+
+    def get_file_handler(self, replication: int) -> logging.FileHandler:
+        if replication in self.replication_to_file_handler_map:
+            self.replication_to_file_handler_map.move_to_end(replication)
+            return self.replication_to_file_handler_map[replication]
+
+        if len(self.replication_to_file_handler_map) >= self.max_num_open_files:
+            _, file_handler = self.replication_to_file_handler_map.popitem(last=False)
+            file_handler.close()
+
+        file_handler = logging.FileHandler(
+            os.path.join(self.directory, f"replication_{replication}.log"),
+            mode="a" if replication in self.replication_set_seen else "w",
+        )
+        file_handler.setFormatter(self.formatter or formatter)
+        self.replication_to_file_handler_map[replication] = file_handler
+        self.replication_set_seen.add(replication)
+
+        return file_handler
+
+    def emit(self, record: logging.LogRecord):
+        self.get_file_handler(record.replication).emit(record)
+
+    def close(self):
+        for file_handler in self.replication_to_file_handler_map.values():
+            file_handler.close()
+        self.replication_to_file_handler_map.clear()
+
+        super().close()
+
+
+class QueueListener_wReplication(logging.handlers.QueueListener):
+    def __init__(
+        self,
+        queue,
+        handler_list: list[logging.Handler],
+        per_replication_file_handler: PerReplicationFileHandler = None,
+    ):
+        super().__init__(queue, *handler_list, respect_handler_level=True)
+        self.per_replication_file_handler = per_replication_file_handler
+
+    def handle(self, record: logging.LogRecord):
+        if (
+            self.per_replication_file_handler is not None
+            and getattr(record, "replication", None) is not None
+        ):
+            self.per_replication_file_handler.handle(record)
+            return
+
+        super().handle(record)
+
+
+def log_to_queue(queue, in_same_process: bool = False):
+    """Replaces the handlers of the logger with a handler that enqueues the records."""
+
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    logger.addHandler(QueueHandler_wReplication(queue, in_same_process=in_same_process))
+
+
+def start_queued_logging(
+    queue=None,
+    per_replication_log_dir: str = None,
+) -> QueueListener_wReplication:
+    """Moves the current handlers of the logger (e.g., added by `log_to_std()`
+    and `log_to_file()`) behind a queue, and starts the listener thread that
+    feeds them.
+    """
+
+    in_same_process = queue is None
+    if queue is None:
+        queue = queue_module.SimpleQueue()
+
+    per_replication_file_handler = None
+    if per_replication_log_dir is not None:
+        per_replication_file_handler = PerReplicationFileHandler(directory=per_replication_log_dir)
+
+    listener = QueueListener_wReplication(
+        queue=queue,
+        handler_list=list(logger.handlers),
+        per_replication_file_handler=per_replication_file_handler,
     )
+    log_to_queue(queue, in_same_process=in_same_process)
+    listener.start()
+
+    return listener
+
+
+def stop_queued_logging(listener: QueueListener_wReplication):
+    """Flushes the queue and restores the handlers of the logger."""
+
+    listener.stop()
+
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    for handler in listener.handlers:
+        logger.addHandler(handler)
+
+    if listener.per_replication_file_handler is not None:
+        listener.per_replication_file_handler.close()
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~  Assert  ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
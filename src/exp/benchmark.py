@@ -0,0 +1,349 @@
+"""Throughput benchmarks for the hot paths of the simulator:
+- simulated events per second of `TorSystem` and `TorModel_wRounds`,
+- per-round cost of each `DisclosureAttack` subclass,
+- per-sample cost of each `RandomVariable`.
+
+Results are written as JSON, and can be compared against a saved baseline with
+`compare_w_baseline()`. Run with `python tests/bench/bench_throughput.py`.
+"""
+
+import dataclasses
+import functools
+import json
+import platform
+import time
+
+from typing import Callable
+
+from src.attack import disclosure_attack
+from src.debug_utils import check, log, INFO, WARNING
+from src.prob import random_variable
+from src.sim import (
+    stats,
+    tor as tor_module,
+    tor_model as tor_model_module,
+)
+
+
+@dataclasses.dataclass
+class BenchmarkResult:
+    name: str
+    param_map: dict
+    num_ops: int
+    time_in_secs: float
+
+    @property
+    def key(self) -> str:
+        return json.dumps([self.name, self.param_map], sort_keys=True)
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.num_ops / self.time_in_secs if self.time_in_secs > 0 else float("Inf")
+
+    def to_dict(self) -> dict:
+        return {**dataclasses.asdict(self), "ops_per_sec": self.ops_per_sec}
+
+
+def run_for_num_events(
+    env: stats.Environment_wEventCounter,
+    num_events: int,
+    max_time_in_secs: float,
+    stop_condition: Callable[[], bool] = None,
+) -> float:
+    """Steps `env` until `num_events` are processed or `stop_condition()` holds,
+    and returns the wall-clock time spent.
+    """
+
+    start_time = time.perf_counter()
+    while env.num_events < num_events:
+        if stop_condition is not None and stop_condition():
+            break
+        if time.perf_counter() - start_time > max_time_in_secs:
+            log(WARNING, "Stopped early", num_events=env.num_events, max_time_in_secs=max_time_in_secs)
+            break
+
+        env.step()
+
+    return time.perf_counter() - start_time
+
+
+def get_adversary_name_to_constructor_map() -> dict[str, Callable]:
+    """Adversaries are configured so that the attack never completes, hence every
+    round is a regular round.
+    """
+
+    return {
+        "DisclosureAttack": functools.partial(
+            disclosure_attack.DisclosureAttack,
+            error_percent=-1,
+        ),
+        "DisclosureAttack_wBaselineInspection_wStationaryRounds": functools.partial(
+            disclosure_attack.DisclosureAttack_wBaselineInspection_wStationaryRounds,
+            stability_threshold=-1,
+        ),
+        "DisclosureAttack_wBayesianEstimate": functools.partial(
+            disclosure_attack.DisclosureAttack_wBayesianEstimate,
+            max_stdev=0,
+            detection_threshold=0,
+        ),
+        "DisclosureAttack_wOutlierDetection": functools.partial(
+            disclosure_attack.DisclosureAttack_wOutlierDetection,
+            max_stdev=0,
+            detection_threshold=0,
+        ),
+        "DisclosureAttack_wOutlierDetection_wEarlyTermination": functools.partial(
+            disclosure_attack.DisclosureAttack_wOutlierDetection_wEarlyTermination,
+            max_stdev=0,
+            detection_threshold=0,
+            num_servers_to_exclude_from_threshold=0,
+        ),
+    }
+
+
+def get_random_variable_name_to_rv_map() -> dict[str, random_variable.RandomVariable]:
+    return {
+        "Normal": random_variable.Normal(mu=1, sigma=1),
+        "TruncatedNormal": random_variable.TruncatedNormal(mu=1, sigma=1),
+        "Exponential": random_variable.Exponential(mu=1),
+        "Poisson": random_variable.Poisson(mu=1),
+        "Uniform": random_variable.Uniform(min_value=0, max_value=1),
+        "DiscreteUniform": random_variable.DiscreteUniform(min_value=1, max_value=10),
+        "Beta": random_variable.Beta(a=2, b=2),
+        "Binomial": random_variable.Binomial(n=10, p=0.5),
+        "BoundedZipf": random_variable.BoundedZipf(min_value=1, max_value=10),
+    }
+
+
+def bench_tor_system(
+    num_clients: int,
+    num_servers: int,
+    num_events: int,
+    max_time_in_secs: float,
+) -> BenchmarkResult:
+    env = stats.Environment_wEventCounter()
+    adversary = get_adversary_name_to_constructor_map()["DisclosureAttack"](
+        env=env,
+        max_delivery_time_for_adversary=1,
+    )
+
+    tor = tor_module.TorSystem(
+        env=env,
+        num_clients=num_clients,
+        num_servers=num_servers,
+        num_target_servers=1,
+        network_delay_rv=random_variable.Uniform(min_value=0, max_value=1),
+        client_idle_time_rv=random_variable.Exponential(mu=1),
+        target_client_idle_time_rv=random_variable.Exponential(mu=1 / 2),
+        num_msgs_to_recv_for_get_request_rv=random_variable.DiscreteUniform(min_value=1, max_value=1),
+    )
+    tor.register_adversary(adversary=adversary)
+
+    time_in_secs = run_for_num_events(env=env, num_events=num_events, max_time_in_secs=max_time_in_secs)
+
+    return BenchmarkResult(
+        name="TorSystem",
+        param_map={"num_clients": num_clients, "num_servers": num_servers},
+        num_ops=env.num_events,
+        time_in_secs=time_in_secs,
+    )
+
+
+def bench_tor_model(
+    num_clients: int,
+    num_servers: int,
+    num_events: int,
+    max_time_in_secs: float,
+) -> BenchmarkResult:
+    env = stats.Environment_wEventCounter()
+    adversary = get_adversary_name_to_constructor_map()["DisclosureAttack"](
+        env=env,
+        max_delivery_time_for_adversary=1,
+    )
+
+    tor_model = tor_model_module.TorModel_wRounds(
+        env=env,
+        num_clients=num_clients,
+        num_servers=num_servers,
+        num_target_servers=1,
+        max_delivery_time_for_adversary=1,
+        prob_server_active=0.5,
+        prob_attack_round=1,
+    )
+    tor_model.register_adversary(adversary=adversary)
+
+    time_in_secs = run_for_num_events(env=env, num_events=num_events, max_time_in_secs=max_time_in_secs)
+
+    return BenchmarkResult(
+        name="TorModel_wRounds",
+        param_map={"num_clients": num_clients, "num_servers": num_servers},
+        num_ops=env.num_events,
+        time_in_secs=time_in_secs,
+    )
+
+
+def bench_disclosure_attack(
+    adversary_name: str,
+    num_servers: int,
+    num_rounds: int,
+    max_time_in_secs: float,
+) -> BenchmarkResult:
+    """Measures the cost per attack round while the adversary observes a
+    `TorModel_wRounds` in which every round is an attack round.
+    """
+
+    env = stats.Environment_wEventCounter()
+    adversary = get_adversary_name_to_constructor_map()[adversary_name](
+        env=env,
+        max_delivery_time_for_adversary=1,
+    )
+
+    tor_model = tor_model_module.TorModel_wRounds(
+        env=env,
+        num_clients=num_servers,
+        num_servers=num_servers,
+        num_target_servers=1,
+        max_delivery_time_for_adversary=1,
+        prob_server_active=0.5,
+        prob_attack_round=1,
+    )
+    tor_model.register_adversary(adversary=adversary)
+
+    time_in_secs = run_for_num_events(
+        env=env,
+        num_events=float("Inf"),
+        max_time_in_secs=max_time_in_secs,
+        stop_condition=lambda: adversary.num_sample_sets_collected >= num_rounds,
+    )
+
+    return BenchmarkResult(
+        name=adversary_name,
+        param_map={"num_servers": num_servers},
+        num_ops=adversary.num_sample_sets_collected,
+        time_in_secs=time_in_secs,
+    )
+
+
+def bench_random_variable(
+    rv_name: str,
+    rv: random_variable.RandomVariable,
+    num_samples: int,
+) -> BenchmarkResult:
+    start_time = time.perf_counter()
+    for _ in range(num_samples):
+        rv.sample()
+    time_in_secs = time.perf_counter() - start_time
+
+    return BenchmarkResult(
+        name=rv_name,
+        param_map={"rv": repr(rv)},
+        num_ops=num_samples,
+        time_in_secs=time_in_secs,
+    )
+
+
+def run_benchmarks(
+    num_nodes_list: list[int],
+    num_events: int,
+    num_rounds: int,
+    num_samples: int,
+    max_time_in_secs: float,
+) -> list[BenchmarkResult]:
+    benchmark_result_list = []
+
+    for num_nodes in num_nodes_list:
+        for bench_func in [bench_tor_system, bench_tor_model]:
+            benchmark_result = bench_func(
+                num_clients=num_nodes,
+                num_servers=num_nodes,
+                num_events=num_events,
+                max_time_in_secs=max_time_in_secs,
+            )
+            log(INFO, "", benchmark_result=benchmark_result, ops_per_sec=benchmark_result.ops_per_sec)
+            benchmark_result_list.append(benchmark_result)
+
+    for adversary_name in get_adversary_name_to_constructor_map():
+        benchmark_result = bench_disclosure_attack(
+            adversary_name=adversary_name,
+            num_servers=num_nodes_list[0],
+            num_rounds=num_rounds,
+            max_time_in_secs=max_time_in_secs,
+        )
+        log(INFO, "", benchmark_result=benchmark_result, ops_per_sec=benchmark_result.ops_per_sec)
+        benchmark_result_list.append(benchmark_result)
+
+    for rv_name, rv in get_random_variable_name_to_rv_map().items():
+        benchmark_result = bench_random_variable(rv_name=rv_name, rv=rv, num_samples=num_samples)
+        log(INFO, "", benchmark_result=benchmark_result, ops_per_sec=benchmark_result.ops_per_sec)
+        benchmark_result_list.append(benchmark_result)
+
+    return benchmark_result_list
+
+
+def save_benchmark_results(benchmark_result_list: list[BenchmarkResult], file_path: str):
+    with open(file_path, "w") as f:
+        json.dump(
+            {
+                "python_version": platform.python_version(),
+                "platform": platform.platform(),
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "result_list": [benchmark_result.to_dict() for benchmark_result in benchmark_result_list],
+            },
+            f,
+            indent=2,
+        )
+
+    log(INFO, "Done", file_path=file_path)
+
+
+def load_benchmark_results(file_path: str) -> list[BenchmarkResult]:
+    with open(file_path) as f:
+        result_dict_list = json.load(f)["result_list"]
+
+    return [
+        BenchmarkResult(
+            name=result_dict["name"],
+            param_map=result_dict["param_map"],
+            num_ops=result_dict["num_ops"],
+            time_in_secs=result_dict["time_in_secs"],
+        )
+        for result_dict in result_dict_list
+    ]
+
+
+def compare_w_baseline(
+    benchmark_result_list: list[BenchmarkResult],
+    baseline_benchmark_result_list: list[BenchmarkResult],
+    regression_tolerance: float = 0.1,
+) -> list[dict]:
+    """Returns one row per benchmark present in both lists, with `speedup` being
+    the ratio of the current and the baseline throughput. Rows with
+    `speedup < 1 - regression_tolerance` are marked as regressions.
+    """
+
+    check(0 <= regression_tolerance < 1, "", regression_tolerance=regression_tolerance)
+
+    key_to_baseline_benchmark_result_map = {
+        benchmark_result.key: benchmark_result
+        for benchmark_result in baseline_benchmark_result_list
+    }
+
+    comparison_list = []
+    for benchmark_result in benchmark_result_list:
+        baseline_benchmark_result = key_to_baseline_benchmark_result_map.get(benchmark_result.key)
+        if baseline_benchmark_result is None:
+            log(WARNING, "No baseline", benchmark_result=benchmark_result)
+            continue
+
+        speedup = benchmark_result.ops_per_sec / baseline_benchmark_result.ops_per_sec
+        comparison_list.append(
+            {
+                "name": benchmark_result.name,
+                "param_map": benchmark_result.param_map,
+                "ops_per_sec": benchmark_result.ops_per_sec,
+                "baseline_ops_per_sec": baseline_benchmark_result.ops_per_sec,
+                "speedup": speedup,
+                "is_regression": speedup < 1 - regression_tolerance,
+            }
+        )
+
+    return comparison_list
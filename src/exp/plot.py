@@ -1,6 +1,8 @@
+import numpy
+
 from typing import Callable, Tuple
 
-from src.exp import utils
+from src.exp import progress, result_store, utils
 
 from src.attack import disclosure_attack
 from src.debug_utils import log, DEBUG, INFO
@@ -53,11 +55,33 @@ def plot_perf(
     x_label: str,
     title: str,
     plot_name: str,
+    x_name: str = "x",
+    result_dir: str = None,
+    param_map: dict = None,
+    progress_reporter: progress.ProgressReporter = None,
 ):
+    """If `result_dir` is given, the per-replication results are also saved
+    with `result_store`, so they can be re-plotted with `plot_perf_from_result_store`.
+    """
+
+    if result_dir is not None:
+        result_store_writer = result_store.ResultStoreWriter(
+            result_dir=result_dir, x_name=x_name, param_map=param_map
+        )
+        disclosure_attack_result_given_x_func_ = disclosure_attack_result_given_x_func
+
+        def disclosure_attack_result_given_x_func(x: float) -> disclosure_attack.DisclosureAttackResult:
+            disclosure_attack_result = disclosure_attack_result_given_x_func_(x)
+            result_store_writer.add(x=x, disclosure_attack_result=disclosure_attack_result)
+            return disclosure_attack_result
+
     results_dict = utils.get_results_to_plot(
         x_list=x_list,
         disclosure_attack_result_given_x_func=disclosure_attack_result_given_x_func,
+        progress_reporter=progress_reporter,
     )
+    if result_dir is not None:
+        result_store_writer.save()
 
     plot_(
         x_list=x_list,
@@ -68,6 +92,24 @@ def plot_perf(
     )
 
 
+def plot_perf_from_result_store(
+    result_dir: str,
+    x_label: str,
+    title: str,
+    plot_name: str,
+):
+    store = result_store.ResultStore(result_dir=result_dir)
+    log(INFO, "", store=store)
+
+    plot_(
+        x_list=store.x_list,
+        results_dict=store.get_results_to_plot(),
+        x_label=x_label,
+        title=title,
+        plot_name=plot_name,
+    )
+
+
 def get_title_and_plot_name_tail(
     w_model: bool,
     num_target_servers: int,
@@ -116,6 +158,40 @@ def get_title_and_plot_name_tail(
     return title, plot_name_tail
 
 
+def get_x_to_adversary_kwargs_map(
+    x_list: list,
+    w_model: bool,
+    **kwargs,
+) -> dict:
+    """Returns the map from each `x` to the `max_stdev` and `detection_threshold`
+    of the outlier detection adversary, computed for all `x` in one call of the
+    analytical model, so that the replications are given plain floats. The params
+    in `kwargs` that vary with `x` are given as arrays over `x_list`.
+
+    The map is empty if the adversary is not configured with `detection_gap_exp_factor`,
+    if `max_stdev` and `detection_threshold` are already given in `kwargs`, or if the
+    probs are to be computed from the random variables of `TorSystem` (`w_model=False`).
+    In the last case, `sim_w_disclosure_attack_w_joblib()` computes them once per sweep point.
+    """
+
+    if (
+        not w_model
+        or "detection_gap_exp_factor" not in kwargs
+        or "stability_threshold" in kwargs
+        or ("max_stdev" in kwargs and "detection_threshold" in kwargs)
+    ):
+        return {}
+
+    max_stdev_array, detection_threshold_array = numpy.broadcast_arrays(
+        *sim_module.get_max_stdev_and_detection_threshold(**kwargs),
+        numpy.empty(len(x_list)),
+    )[:2]
+    return {
+        x: {"max_stdev": float(max_stdev), "detection_threshold": float(detection_threshold)}
+        for x, max_stdev, detection_threshold in zip(x_list, max_stdev_array, detection_threshold_array)
+    }
+
+
 def plot_perf_vs_num_servers(
     num_servers_list: list[float],
     num_target_servers: int,
@@ -127,8 +203,21 @@ def plot_perf_vs_num_servers(
     num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable = None,
     prob_server_active: float = None,
     prob_attack_round: float = None,
+    result_dir: str = None,
+    progress_reporter: progress.ProgressReporter = None,
     **kwargs,
 ):
+    x_to_adversary_kwargs_map = get_x_to_adversary_kwargs_map(
+        x_list=num_servers_list,
+        w_model=w_model,
+        num_clients=numpy.array(num_servers_list),
+        num_servers=numpy.array(num_servers_list),
+        num_target_servers=num_target_servers,
+        prob_server_active=prob_server_active,
+        prob_attack_round=prob_attack_round,
+        **kwargs,
+    )
+
     def disclosure_attack_result_given_x_func(
         num_servers: int,
     ) -> disclosure_attack.DisclosureAttackResult:
@@ -144,10 +233,12 @@ def plot_perf_vs_num_servers(
             num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
             prob_server_active=prob_server_active,
             prob_attack_round=prob_attack_round,
+            progress_reporter=progress_reporter,
             **kwargs,
+            **x_to_adversary_kwargs_map.get(num_servers, {}),
         )
 
-    title, plot_name_tail = get_title_and_plot_name_tail(
+    param_map = dict(
         w_model=w_model,
         num_target_servers=num_target_servers,
         num_samples=num_samples,
@@ -159,6 +250,7 @@ def plot_perf_vs_num_servers(
         prob_attack_round=prob_attack_round,
         **kwargs,
     )
+    title, plot_name_tail = get_title_and_plot_name_tail(**param_map)
 
     plot_perf(
         x_list=num_servers_list,
@@ -166,6 +258,10 @@ def plot_perf_vs_num_servers(
         x_label=r"$N_{\mathrm{server}}$",
         title=title,
         plot_name=f"plot_perf_vs_nservers_{plot_name_tail}",
+        x_name="num_servers",
+        result_dir=result_dir,
+        param_map=param_map,
+        progress_reporter=progress_reporter,
     )
     log(INFO, "Done")
 
@@ -182,8 +278,22 @@ def plot_perf_vs_detection_gap_exp_factor(
     num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable = None,
     prob_server_active: float = None,
     prob_attack_round: float = None,
+    result_dir: str = None,
+    progress_reporter: progress.ProgressReporter = None,
     **kwargs,
 ):
+    x_to_adversary_kwargs_map = get_x_to_adversary_kwargs_map(
+        x_list=detection_gap_exp_factor_list,
+        w_model=w_model,
+        num_clients=num_servers,
+        num_servers=num_servers,
+        num_target_servers=num_target_servers,
+        prob_server_active=prob_server_active,
+        prob_attack_round=prob_attack_round,
+        detection_gap_exp_factor=numpy.array(detection_gap_exp_factor_list),
+        **kwargs,
+    )
+
     def disclosure_attack_result_given_x_func(
         detection_gap_exp_factor: float,
     ) -> disclosure_attack.DisclosureAttackResult:
@@ -200,10 +310,12 @@ def plot_perf_vs_detection_gap_exp_factor(
             prob_server_active=prob_server_active,
             prob_attack_round=prob_attack_round,
             detection_gap_exp_factor=detection_gap_exp_factor,
+            progress_reporter=progress_reporter,
             **kwargs,
+            **x_to_adversary_kwargs_map.get(detection_gap_exp_factor, {}),
         )
 
-    title, plot_name_tail = get_title_and_plot_name_tail(
+    param_map = dict(
         w_model=w_model,
         num_target_servers=num_target_servers,
         num_samples=num_samples,
@@ -216,6 +328,7 @@ def plot_perf_vs_detection_gap_exp_factor(
         prob_attack_round=prob_attack_round,
         **kwargs,
     )
+    title, plot_name_tail = get_title_and_plot_name_tail(**param_map)
 
     plot_perf(
         x_list=detection_gap_exp_factor_list,
@@ -223,6 +336,10 @@ def plot_perf_vs_detection_gap_exp_factor(
         x_label=r"$\gamma$",
         title=title,
         plot_name=f"plot_perf_vs_detection_gap_exp_factor_{plot_name_tail}",
+        x_name="detection_gap_exp_factor",
+        result_dir=result_dir,
+        param_map=param_map,
+        progress_reporter=progress_reporter,
     )
 
     log(INFO, "Done")
@@ -240,8 +357,21 @@ def plot_perf_vs_num_servers_excluded_from_threshold(
     num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable = None,
     prob_server_active: float = None,
     prob_attack_round: float = None,
+    result_dir: str = None,
+    progress_reporter: progress.ProgressReporter = None,
     **kwargs,
 ):
+    x_to_adversary_kwargs_map = get_x_to_adversary_kwargs_map(
+        x_list=num_servers_excluded_from_threshold_list,
+        w_model=w_model,
+        num_clients=num_servers,
+        num_servers=num_servers,
+        num_target_servers=num_target_servers,
+        prob_server_active=prob_server_active,
+        prob_attack_round=prob_attack_round,
+        **kwargs,
+    )
+
     def disclosure_attack_result_given_x_func(
         num_servers_excluded_from_threshold: int,
     ) -> disclosure_attack.DisclosureAttackResult:
@@ -258,10 +388,12 @@ def plot_perf_vs_num_servers_excluded_from_threshold(
             prob_server_active=prob_server_active,
             prob_attack_round=prob_attack_round,
             num_servers_excluded_from_threshold=num_servers_excluded_from_threshold,
+            progress_reporter=progress_reporter,
             **kwargs,
+            **x_to_adversary_kwargs_map.get(num_servers_excluded_from_threshold, {}),
         )
 
-    title, plot_name_tail = get_title_and_plot_name_tail(
+    param_map = dict(
         w_model=w_model,
         num_target_servers=num_target_servers,
         num_samples=num_samples,
@@ -274,6 +406,7 @@ def plot_perf_vs_num_servers_excluded_from_threshold(
         prob_attack_round=prob_attack_round,
         **kwargs,
     )
+    title, plot_name_tail = get_title_and_plot_name_tail(**param_map)
 
     plot_perf(
         x_list=num_servers_excluded_from_threshold_list,
@@ -281,6 +414,10 @@ def plot_perf_vs_num_servers_excluded_from_threshold(
         x_label=r"$N_{\mathrm{server-excluded}}$",
         title=title,
         plot_name=f"plot_perf_vs_num_servers_excluded_from_threshold_{plot_name_tail}",
+        x_name="num_servers_excluded_from_threshold",
+        result_dir=result_dir,
+        param_map=param_map,
+        progress_reporter=progress_reporter,
     )
 
     log(INFO, "Done")
@@ -298,8 +435,21 @@ def plot_perf_vs_prob_server_active(
     num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable = None,
     prob_server_active: float = None,
     prob_attack_round: float = None,
+    result_dir: str = None,
+    progress_reporter: progress.ProgressReporter = None,
     **kwargs,
 ):
+    x_to_adversary_kwargs_map = get_x_to_adversary_kwargs_map(
+        x_list=prob_server_active_list,
+        w_model=w_model,
+        num_clients=num_servers,
+        num_servers=num_servers,
+        num_target_servers=num_target_servers,
+        prob_server_active=numpy.array(prob_server_active_list),
+        prob_attack_round=prob_attack_round,
+        **kwargs,
+    )
+
     def disclosure_attack_result_given_x_func(
         prob_server_active: float,
     ) -> disclosure_attack.DisclosureAttackResult:
@@ -315,10 +465,12 @@ def plot_perf_vs_prob_server_active(
             num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
             prob_server_active=prob_server_active,
             prob_attack_round=prob_attack_round,
+            progress_reporter=progress_reporter,
             **kwargs,
+            **x_to_adversary_kwargs_map.get(prob_server_active, {}),
         )
 
-    title, plot_name_tail = get_title_and_plot_name_tail(
+    param_map = dict(
         w_model=w_model,
         num_target_servers=num_target_servers,
         num_samples=num_samples,
@@ -330,6 +482,7 @@ def plot_perf_vs_prob_server_active(
         prob_attack_round=prob_attack_round,
         **kwargs,
     )
+    title, plot_name_tail = get_title_and_plot_name_tail(**param_map)
 
     plot_perf(
         x_list=prob_server_active_list,
@@ -337,6 +490,10 @@ def plot_perf_vs_prob_server_active(
         x_label=r"$p_{\mathrm{server}}$",
         title=title,
         plot_name=f"plot_perf_vs_prob_server_active_{plot_name_tail}",
+        x_name="prob_server_active",
+        result_dir=result_dir,
+        param_map=param_map,
+        progress_reporter=progress_reporter,
     )
 
     log(INFO, "Done")
@@ -354,6 +511,8 @@ def plot_perf_vs_max_delivery_time_for_adversary(
     num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable = None,
     prob_server_active: float = None,
     prob_attack_round: float = None,
+    result_dir: str = None,
+    progress_reporter: progress.ProgressReporter = None,
     **kwargs,
 ):
     def disclosure_attack_result_given_x_func(
@@ -372,10 +531,11 @@ def plot_perf_vs_max_delivery_time_for_adversary(
             prob_server_active=prob_server_active,
             prob_attack_round=prob_attack_round,
             max_delivery_time_for_adversary=max_delivery_time_for_adversary,
+            progress_reporter=progress_reporter,
             **kwargs,
         )
 
-    title, plot_name_tail = get_title_and_plot_name_tail(
+    param_map = dict(
         w_model=w_model,
         num_target_servers=num_target_servers,
         num_samples=num_samples,
@@ -388,6 +548,7 @@ def plot_perf_vs_max_delivery_time_for_adversary(
         prob_attack_round=prob_attack_round,
         **kwargs,
     )
+    title, plot_name_tail = get_title_and_plot_name_tail(**param_map)
 
     plot_perf(
         x_list=max_delivery_time_for_adversary_list,
@@ -395,6 +556,10 @@ def plot_perf_vs_max_delivery_time_for_adversary(
         x_label=r"$\Delta_{\mathrm{adversary}}$",
         title=title,
         plot_name=f"plot_perf_vs_max_delivery_time_for_adversary_{plot_name_tail}",
+        x_name="max_delivery_time_for_adversary",
+        result_dir=result_dir,
+        param_map=param_map,
+        progress_reporter=progress_reporter,
     )
 
     log(INFO, "Done")
@@ -412,6 +577,8 @@ def plot_perf_vs_max_delivery_time(
     num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable = None,
     prob_server_active: float = None,
     prob_attack_round: float = None,
+    result_dir: str = None,
+    progress_reporter: progress.ProgressReporter = None,
     **kwargs,
 ):
     def disclosure_attack_result_given_x_func(
@@ -431,10 +598,11 @@ def plot_perf_vs_max_delivery_time(
             num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
             prob_server_active=prob_server_active,
             prob_attack_round=prob_attack_round,
+            progress_reporter=progress_reporter,
             **kwargs,
         )
 
-    title, plot_name_tail = get_title_and_plot_name_tail(
+    param_map = dict(
         w_model=w_model,
         num_target_servers=num_target_servers,
         num_samples=num_samples,
@@ -447,6 +615,7 @@ def plot_perf_vs_max_delivery_time(
         prob_attack_round=prob_attack_round,
         **kwargs,
     )
+    title, plot_name_tail = get_title_and_plot_name_tail(**param_map)
 
     plot_perf(
         x_list=max_delivery_time_list,
@@ -454,6 +623,10 @@ def plot_perf_vs_max_delivery_time(
         x_label=r"$\Delta_{\mathrm{network}}$",
         title=title,
         plot_name=f"plot_perf_vs_max_delivery_time_{plot_name_tail}",
+        x_name="max_delivery_time",
+        result_dir=result_dir,
+        param_map=param_map,
+        progress_reporter=progress_reporter,
     )
 
     log(INFO, "Done")
@@ -0,0 +1,204 @@
+"""Profiling harness for a single sweep point.
+
+`profile_sweep_point()` takes the kwargs of `sim.sim_w_disclosure_attack_w_joblib`,
+runs the replications one at a time under cProfile, and writes the merged
+profile into `output_dir`:
+- `profile.prof`: for `pstats` or `snakeviz`,
+- `top_functions.txt`: top-N functions by the time spent in them,
+- `profile.collapsed`: collapsed stacks for `flamegraph.pl` or speedscope,
+- `pyinstrument.html`: only with `w_sampling_profiler=True` and pyinstrument installed.
+Run with `python tests/bench/profile_sweep_point.py`.
+"""
+
+import collections
+import cProfile
+import os
+import pstats
+
+import joblib
+
+from src.debug_utils import check, log, INFO, WARNING
+from src.prob import random_variable
+from src.sim import sim
+
+
+def get_regime_name_to_kwargs_map(num_servers: int = 50) -> dict[str, dict]:
+    """Sweep points whose hot paths differ, i.e., the model vs `TorSystem`, and
+    the outlier detection vs the stationary-rounds adversary.
+    """
+
+    model_kwargs = dict(
+        num_clients=num_servers,
+        num_servers=num_servers,
+        num_target_servers=2,
+        w_model=True,
+        prob_server_active=0.5,
+        prob_attack_round=0.5,
+    )
+    tor_system_kwargs = dict(
+        num_clients=num_servers,
+        num_servers=num_servers,
+        num_target_servers=2,
+        w_model=False,
+        network_delay_rv=random_variable.Uniform(min_value=0, max_value=1),
+        client_idle_time_rv=random_variable.Exponential(mu=1),
+        target_client_idle_time_rv=random_variable.Exponential(mu=1 / 2),
+        num_msgs_to_recv_for_get_request_rv=random_variable.DiscreteUniform(min_value=1, max_value=1),
+    )
+
+    return {
+        "model_w_outlier_detection": dict(**model_kwargs, detection_gap_exp_factor=0.5),
+        "model_w_stationary_rounds": dict(**model_kwargs, stability_threshold=0.003),
+        "tor_system_w_outlier_detection": dict(**tor_system_kwargs, detection_gap_exp_factor=0.5),
+        "tor_system_w_stationary_rounds": dict(**tor_system_kwargs, stability_threshold=0.003),
+    }
+
+
+def get_func_label(func: tuple) -> str:
+    file_name, line_number, func_name = func
+    if file_name == "~":
+        # Built-in
+        return func_name
+
+    return f"{os.path.basename(file_name)}:{line_number}:{func_name}"
+
+
+def get_collapsed_stack_to_time_map(
+    stats_: pstats.Stats,
+    min_time_frac: float = 1e-4,
+) -> dict[str, float]:
+    """cProfile records only the caller-callee edges, so the stacks are
+    reconstructed by walking down the edges from the root functions. The time
+    of a function is split over its callers in proportion to the cumulative time
+    spent through each caller. Stacks that take less than `min_time_frac` of the
+    total time are dropped, and recursive calls are folded into the outermost call.
+    """
+
+    func_to_callee_to_time_map = collections.defaultdict(dict)
+    for func, (_, _, _, _, caller_to_stat_map) in stats_.stats.items():
+        for caller, caller_stat in caller_to_stat_map.items():
+            func_to_callee_to_time_map[caller][func] = caller_stat[3]
+
+    min_time = min_time_frac * stats_.total_tt
+    collapsed_stack_to_time_map = collections.defaultdict(float)
+
+    def visit(func: tuple, label_list: list[str], func_set_on_stack: set, frac: float):
+        _, _, tottime, cumtime, _ = stats_.stats[func]
+        label_list = label_list + [get_func_label(func)]
+        collapsed_stack_to_time_map[";".join(label_list)] += frac * tottime
+
+        for callee, time_through_edge in func_to_callee_to_time_map[func].items():
+            callee_cumtime = stats_.stats[callee][3]
+            if callee in func_set_on_stack or callee_cumtime == 0:
+                continue
+
+            time_on_stack = frac * time_through_edge
+            if time_on_stack < min_time:
+                continue
+
+            visit(
+                func=callee,
+                label_list=label_list,
+                func_set_on_stack=func_set_on_stack | {callee},
+                frac=min(time_on_stack / callee_cumtime, 1),
+            )
+
+    for func, (_, _, _, _, caller_to_stat_map) in stats_.stats.items():
+        if not caller_to_stat_map:
+            visit(func=func, label_list=[], func_set_on_stack={func}, frac=1)
+
+    return collapsed_stack_to_time_map
+
+
+def write_collapsed_stacks(stats_: pstats.Stats, file_path: str):
+    """Writes one `frame;frame;... <microseconds>` line per stack."""
+
+    collapsed_stack_to_time_map = get_collapsed_stack_to_time_map(stats_)
+    with open(file_path, "w") as f:
+        for collapsed_stack, time in sorted(collapsed_stack_to_time_map.items()):
+            time_in_usecs = round(time * 1e6)
+            if time_in_usecs > 0:
+                f.write(f"{collapsed_stack} {time_in_usecs}\n")
+
+
+def write_top_functions(stats_: pstats.Stats, file_path: str, top_n: int):
+    stream = stats_.stream
+    with open(file_path, "w") as f:
+        stats_.stream = f
+        for sort_key in ["tottime", "cumulative"]:
+            f.write(f"# Top {top_n} functions by {sort_key}\n")
+            stats_.sort_stats(sort_key).print_stats(top_n)
+
+    stats_.stream = stream
+
+
+def run_replications(num_replications: int, first_replication: int, **kwargs) -> list:
+    # The sequential backend keeps the replications in the calling thread, which
+    # is the only thread cProfile sees.
+    disclosure_attack_result_list = []
+    with joblib.parallel_config(backend="sequential"):
+        for i in range(num_replications):
+            disclosure_attack_result = sim.sim_w_disclosure_attack_w_joblib(
+                num_samples=1,
+                first_replication=first_replication + i,
+                **kwargs,
+            )
+            disclosure_attack_result_list.append(disclosure_attack_result)
+
+    return disclosure_attack_result_list
+
+
+def profile_sweep_point(
+    output_dir: str,
+    num_replications: int = 3,
+    first_replication: int = 0,
+    top_n: int = 30,
+    w_sampling_profiler: bool = False,
+    **kwargs,
+) -> pstats.Stats:
+    """`kwargs` are passed to `sim.sim_w_disclosure_attack_w_joblib()`, except
+    for `num_samples`, which is replaced by `num_replications`.
+
+    The sampling profiler (pyinstrument) cannot run together with cProfile, so
+    it runs the same replications once more after cProfile is done.
+    """
+
+    check(num_replications > 0, "", num_replications=num_replications)
+    check("num_samples" not in kwargs, "Use `num_replications` instead of `num_samples`")
+    os.makedirs(output_dir, exist_ok=True)
+
+    stats_ = None
+    for i in range(num_replications):
+        profiler = cProfile.Profile()
+        profiler.runcall(
+            run_replications,
+            num_replications=1,
+            first_replication=first_replication + i,
+            **kwargs,
+        )
+
+        if stats_ is None:
+            stats_ = pstats.Stats(profiler)
+        else:
+            stats_.add(profiler)
+
+    stats_.dump_stats(os.path.join(output_dir, "profile.prof"))
+    write_top_functions(stats_, file_path=os.path.join(output_dir, "top_functions.txt"), top_n=top_n)
+    write_collapsed_stacks(stats_, file_path=os.path.join(output_dir, "profile.collapsed"))
+
+    if w_sampling_profiler:
+        try:
+            import pyinstrument
+        except ImportError:
+            log(WARNING, "Skipped the sampling profiler since pyinstrument is not installed")
+        else:
+            sampling_profiler = pyinstrument.Profiler()
+            sampling_profiler.start()
+            run_replications(num_replications=num_replications, first_replication=first_replication, **kwargs)
+            sampling_profiler.stop()
+
+            with open(os.path.join(output_dir, "pyinstrument.html"), "w") as f:
+                f.write(sampling_profiler.output_html())
+
+    log(INFO, "Done", output_dir=output_dir, total_time_in_secs=stats_.total_tt)
+    return stats_
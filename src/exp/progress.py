@@ -0,0 +1,144 @@
+"""Periodic progress reports for long experiment sweeps.
+
+A `ProgressReporter` is passed to the `plot.plot_perf_vs_*()` functions, which
+pass it on to `utils.get_results_to_plot()` and `sim.sim_w_disclosure_attack_w_joblib()`.
+A daemon thread then logs the status and writes it to `status_file_path` as
+JSON every `interval_in_secs`, e.g., `watch cat log/progress.json`.
+"""
+
+import json
+import os
+import threading
+import time
+
+from src.debug_utils import check, log, INFO
+from src.sim import stats
+
+
+class ProgressReporter:
+    def __init__(self, status_file_path: str = None, interval_in_secs: float = 60):
+        check(interval_in_secs > 0, "", interval_in_secs=interval_in_secs)
+        self.status_file_path = status_file_path
+        self.interval_in_secs = interval_in_secs
+
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.x_list = []
+        self.x = None
+        self.num_xs_started = 0
+        self.num_replications_per_x = 0
+        self.num_replications_added = 0
+        self.num_replications_completed = 0
+        self.num_events_completed = 0
+        self.replication_to_start_time_map = {}
+        self.start_time = None
+        self.last_completion_time = None
+
+    def __repr__(self):
+        return (
+            "ProgressReporter( \n"
+            f"\t status_file_path= {self.status_file_path} \n"
+            f"\t interval_in_secs= {self.interval_in_secs} \n"
+            ")"
+        )
+
+    def start(self, x_list: list):
+        self.x_list = list(x_list)
+        self.start_time = time.perf_counter()
+        self.stop_event.clear()
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+        self.report()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval_in_secs):
+            self.report()
+
+    def start_sweep_point(self, x):
+        with self.lock:
+            self.x = x
+            self.num_xs_started += 1
+
+    def add_replications(self, num_replications: int):
+        with self.lock:
+            self.num_replications_per_x = num_replications
+            self.num_replications_added += num_replications
+
+    def replication_started(self, replication: int):
+        with self.lock:
+            self.replication_to_start_time_map[replication] = time.perf_counter()
+
+    def replication_completed(self, replication: int, sim_result: list):
+        """Simulated events are counted only if the sims are run with `w_stats=True`."""
+
+        with self.lock:
+            self.replication_to_start_time_map.pop(replication, None)
+            self.num_replications_completed += 1
+            self.last_completion_time = time.perf_counter()
+            if isinstance(sim_result[-1], stats.SimStats):
+                self.num_events_completed += sim_result[-1].num_events
+
+    def get_status(self) -> dict:
+        now = time.perf_counter()
+        with self.lock:
+            elapsed_time = now - self.start_time if self.start_time is not None else 0
+            # Sweep points that are not started yet are assumed to run as many
+            # replications as the current one.
+            num_replications_total = (
+                self.num_replications_added
+                + max(len(self.x_list) - self.num_xs_started, 0) * self.num_replications_per_x
+            )
+            num_replications_remaining = num_replications_total - self.num_replications_completed
+
+            replications_per_sec = self.num_replications_completed / elapsed_time if elapsed_time > 0 else 0
+            events_per_sec = self.num_events_completed / elapsed_time if elapsed_time > 0 else 0
+            eta_in_secs = (
+                num_replications_remaining / replications_per_sec
+                if replications_per_sec > 0 else None
+            )
+
+            return {
+                "x": self.x,
+                "num_xs_started": self.num_xs_started,
+                "num_xs": len(self.x_list),
+                "num_replications_completed": self.num_replications_completed,
+                "num_replications_remaining": num_replications_remaining,
+                "num_replications_running": len(self.replication_to_start_time_map),
+                "replications_per_sec": replications_per_sec,
+                "events_per_sec": events_per_sec,
+                "elapsed_time_in_secs": elapsed_time,
+                "eta_in_secs": eta_in_secs,
+                # A replication that runs much longer than the others is likely
+                # stuck in an attack that does not converge.
+                "max_running_time_in_secs": max(
+                    (now - start_time for start_time in self.replication_to_start_time_map.values()),
+                    default=0,
+                ),
+                "time_since_last_completion_in_secs": (
+                    now - self.last_completion_time if self.last_completion_time is not None else None
+                ),
+            }
+
+    def report(self):
+        status = self.get_status()
+        log(INFO, "Progress", **status)
+
+        if self.status_file_path is not None:
+            directory = os.path.dirname(self.status_file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            tmp_file_path = f"{self.status_file_path}.tmp"
+            with open(tmp_file_path, "w") as f:
+                json.dump({**status, "time": time.strftime("%Y-%m-%d %H:%M:%S")}, f, indent=2, default=str)
+            os.replace(tmp_file_path, self.status_file_path)
@@ -0,0 +1,215 @@
+"""Columnar on-disk format for the results of a sweep, one row per replication.
+
+Layout of `result_dir`:
+    metadata.json  Sweep parameters, the x values and the row offset of each x
+    <column>.npy   One file per column
+
+Columns are stored as plain `.npy` files (rather than a single `.npz`, which
+numpy cannot memory-map), so loading is `numpy.load(mmap_mode="r")` and slicing
+millions of replications does not deserialize Python objects. Sweep parameters
+that do not change with x are kept in the metadata and exposed as broadcast
+(zero-copy) columns.
+"""
+
+import json
+import numbers
+import os
+
+import numpy
+
+from typing import Optional
+
+from src.attack import disclosure_attack
+from src.debug_utils import check, log, DEBUG, INFO
+from src.exp import utils
+
+
+METADATA_FILENAME = "metadata.json"
+
+COLUMN_NAME_TO_DTYPE_MAP = {
+    "x": numpy.float64,
+    "time_to_deanonymize": numpy.float64,
+    "num_rounds": numpy.int64,
+    "num_target_servers": numpy.int32,
+    "num_non_target_servers": numpy.int32,
+    "num_targets_identified_as_target": numpy.int32,
+    "num_non_targets_identified_as_target": numpy.int32,
+}
+
+
+def _to_json_value(value):
+    if isinstance(value, (bool, numpy.bool_)):
+        return bool(value)
+    elif isinstance(value, numbers.Number):
+        return value.item() if isinstance(value, numpy.generic) else value
+    elif value is None:
+        return None
+
+    return repr(value)
+
+
+def _get_classification_result_columns(
+    disclosure_attack_result: disclosure_attack.DisclosureAttackResult,
+) -> disclosure_attack.ClassificationResultColumns:
+    classification_result_list = disclosure_attack_result.classification_result_list
+    if isinstance(classification_result_list, disclosure_attack.ClassificationResultColumns):
+        return classification_result_list
+
+    classification_result = classification_result_list[0]
+    return disclosure_attack.ClassificationResultColumns(
+        num_target_servers=(
+            classification_result.num_targets_identified_as_target
+            + classification_result.num_targets_identified_as_non_target
+        ),
+        num_non_target_servers=(
+            classification_result.num_non_targets_identified_as_target
+            + classification_result.num_non_targets_identified_as_non_target
+        ),
+        num_targets_identified_as_target_array=numpy.array(
+            [c.num_targets_identified_as_target for c in classification_result_list]
+        ),
+        num_non_targets_identified_as_target_array=numpy.array(
+            [c.num_non_targets_identified_as_target for c in classification_result_list]
+        ),
+    )
+
+
+class ResultStoreWriter:
+    def __init__(
+        self,
+        result_dir: str,
+        x_name: str = "x",
+        param_map: Optional[dict] = None,
+    ):
+        self.result_dir = result_dir
+        self.x_name = x_name
+        # Converted right away since parameters (e.g., `network_delay_rv`) may be mutated during the sweep.
+        self.param_map = {key: _to_json_value(value) for key, value in (param_map or {}).items()}
+
+        self.x_list = []
+        self.column_name_to_array_list_map = {
+            column_name: [] for column_name in COLUMN_NAME_TO_DTYPE_MAP
+        }
+
+    def __repr__(self):
+        return f"ResultStoreWriter(result_dir= {self.result_dir}, x_name= {self.x_name})"
+
+    def add(
+        self,
+        x: float,
+        disclosure_attack_result: disclosure_attack.DisclosureAttackResult,
+    ):
+        classification_result_columns = _get_classification_result_columns(disclosure_attack_result)
+        num_rows = len(classification_result_columns)
+
+        column_name_to_array_map = {
+            "x": numpy.full(num_rows, x),
+            "time_to_deanonymize": disclosure_attack_result.get_column("time_to_deanonymize"),
+            "num_rounds": disclosure_attack_result.get_column("num_rounds"),
+            "num_target_servers": numpy.full(num_rows, classification_result_columns.num_target_servers),
+            "num_non_target_servers": numpy.full(num_rows, classification_result_columns.num_non_target_servers),
+            "num_targets_identified_as_target": classification_result_columns.num_targets_identified_as_target_array,
+            "num_non_targets_identified_as_target": classification_result_columns.num_non_targets_identified_as_target_array,
+        }
+        for column_name, array in column_name_to_array_map.items():
+            self.column_name_to_array_list_map[column_name].append(
+                numpy.asarray(array, dtype=COLUMN_NAME_TO_DTYPE_MAP[column_name])
+            )
+
+        self.x_list.append(x)
+
+    def save(self):
+        os.makedirs(self.result_dir, exist_ok=True)
+
+        num_rows_list = [len(array) for array in self.column_name_to_array_list_map["x"]]
+        for column_name, array_list in self.column_name_to_array_list_map.items():
+            numpy.save(
+                os.path.join(self.result_dir, f"{column_name}.npy"),
+                numpy.concatenate(array_list) if array_list else numpy.empty(0, dtype=COLUMN_NAME_TO_DTYPE_MAP[column_name]),
+            )
+
+        metadata = {
+            "x_name": self.x_name,
+            "x_list": [_to_json_value(x) for x in self.x_list],
+            "row_offset_list": [int(offset) for offset in numpy.cumsum([0] + num_rows_list)],
+            "param_map": self.param_map,
+            "column_name_list": list(COLUMN_NAME_TO_DTYPE_MAP),
+        }
+        with open(os.path.join(self.result_dir, METADATA_FILENAME), "w") as f:
+            json.dump(metadata, f, indent=2)
+
+        log(INFO, "Done", result_dir=self.result_dir, num_rows=metadata["row_offset_list"][-1])
+
+
+class ResultStore:
+    def __init__(self, result_dir: str, mmap_mode: Optional[str] = "r"):
+        self.result_dir = result_dir
+        self.mmap_mode = mmap_mode
+
+        with open(os.path.join(result_dir, METADATA_FILENAME)) as f:
+            self.metadata = json.load(f)
+
+        self.x_name = self.metadata["x_name"]
+        self.x_list = self.metadata["x_list"]
+        self.row_offset_list = self.metadata["row_offset_list"]
+        self.param_map = self.metadata["param_map"]
+        self.num_rows = self.row_offset_list[-1]
+
+        self.column_name_to_array_map = {}
+
+    def __repr__(self):
+        return (
+            "ResultStore( \n"
+            f"\t result_dir= {self.result_dir} \n"
+            f"\t x_name= {self.x_name} \n"
+            f"\t num_rows= {self.num_rows} \n"
+            ")"
+        )
+
+    def column_name_list(self) -> list[str]:
+        return self.metadata["column_name_list"] + [self.x_name] + list(self.param_map)
+
+    def column(self, name: str) -> numpy.ndarray:
+        if name == self.x_name:
+            name = "x"
+
+        if name in self.metadata["column_name_list"]:
+            if name not in self.column_name_to_array_map:
+                self.column_name_to_array_map[name] = numpy.load(
+                    os.path.join(self.result_dir, f"{name}.npy"),
+                    mmap_mode=self.mmap_mode,
+                )
+
+            return self.column_name_to_array_map[name]
+
+        elif name in self.param_map:
+            return numpy.broadcast_to(numpy.asarray(self.param_map[name]), (self.num_rows,))
+
+        raise ValueError(f"Unexpected column name= {name}")
+
+    def get_disclosure_attack_result(self, x: float) -> disclosure_attack.DisclosureAttackResult:
+        """Returns the result for `x` as views into the memory-mapped columns."""
+
+        check(x in self.x_list, "Unexpected x", x=x, x_list=self.x_list)
+        x_index = self.x_list.index(x)
+        row_slice = slice(self.row_offset_list[x_index], self.row_offset_list[x_index + 1])
+        log(DEBUG, "", x=x, row_slice=row_slice)
+
+        classification_result_columns = disclosure_attack.ClassificationResultColumns(
+            num_target_servers=int(self.column("num_target_servers")[row_slice.start]),
+            num_non_target_servers=int(self.column("num_non_target_servers")[row_slice.start]),
+            num_targets_identified_as_target_array=self.column("num_targets_identified_as_target")[row_slice],
+            num_non_targets_identified_as_target_array=self.column("num_non_targets_identified_as_target")[row_slice],
+        )
+        return disclosure_attack.DisclosureAttackResult(
+            time_to_deanonymize_list=self.column("time_to_deanonymize")[row_slice],
+            num_rounds_list=self.column("num_rounds")[row_slice],
+            target_server_set_accuracy=numpy.mean(classification_result_columns.is_target_server_set_correct_array),
+            classification_result_list=classification_result_columns,
+        )
+
+    def get_results_to_plot(self) -> dict[str, list[float]]:
+        return utils.get_results_to_plot(
+            x_list=self.x_list,
+            disclosure_attack_result_given_x_func=self.get_disclosure_attack_result,
+        )
@@ -1,18 +1,20 @@
-import numpy
-
 from typing import Callable
 
 from src.debug_utils import log, DEBUG, INFO
+from src.sim import stats
 
 
 def get_results_to_plot(
     x_list: list,
     disclosure_attack_result_given_x_func: Callable,
+    progress_reporter=None,
 ):
     log(
         INFO, "Started",
         x_list=x_list,
     )
+    if progress_reporter is not None:
+        progress_reporter.start(x_list=x_list)
 
     E_time_to_deanonymize_list = []
     std_time_to_deanonymize_list = []
@@ -22,38 +24,33 @@ def get_results_to_plot(
     std_prob_non_target_identified_as_target_list = []
     E_prob_target_identified_as_non_target_list = []
     std_prob_target_identified_as_non_target_list = []
+    sim_stats_summary_list = []
     for x in x_list:
         log(INFO, f">> x= {x}")
+        if progress_reporter is not None:
+            progress_reporter.start_sweep_point(x)
 
         disclosure_attack_result = disclosure_attack_result_given_x_func(x)
         log(INFO, "", disclosure_attack_result=disclosure_attack_result)
 
         # Sim
-        E_time_to_deanonymize = numpy.mean(disclosure_attack_result.time_to_deanonymize_list)
-        std_time_to_deanonymize = numpy.std(disclosure_attack_result.time_to_deanonymize_list)
+        E_time_to_deanonymize = disclosure_attack_result.mean("time_to_deanonymize")
+        std_time_to_deanonymize = disclosure_attack_result.std("time_to_deanonymize")
         E_time_to_deanonymize_list.append(E_time_to_deanonymize)
         std_time_to_deanonymize_list.append(std_time_to_deanonymize)
 
-        E_num_rounds = numpy.mean(disclosure_attack_result.num_rounds_list)
-        std_num_rounds = numpy.std(disclosure_attack_result.num_rounds_list)
+        E_num_rounds = disclosure_attack_result.mean("num_rounds")
+        std_num_rounds = disclosure_attack_result.std("num_rounds")
         E_num_rounds_list.append(E_num_rounds)
         std_num_rounds_list.append(std_num_rounds)
 
-        prob_target_identified_as_non_target_list = [
-            classification_result.prob_target_identified_as_non_target
-            for classification_result in disclosure_attack_result.classification_result_list
-        ]
-        E_prob_target_identified_as_non_target = numpy.mean(prob_target_identified_as_non_target_list)
-        std_prob_target_identified_as_non_target = numpy.std(prob_target_identified_as_non_target_list)
+        E_prob_target_identified_as_non_target = disclosure_attack_result.mean("prob_target_identified_as_non_target")
+        std_prob_target_identified_as_non_target = disclosure_attack_result.std("prob_target_identified_as_non_target")
         E_prob_target_identified_as_non_target_list.append(E_prob_target_identified_as_non_target)
         std_prob_target_identified_as_non_target_list.append(std_prob_target_identified_as_non_target)
 
-        prob_non_target_identified_as_target_list = [
-            classification_result.prob_non_target_identified_as_target
-            for classification_result in disclosure_attack_result.classification_result_list
-        ]
-        E_prob_non_target_identified_as_target = numpy.mean(prob_non_target_identified_as_target_list)
-        std_prob_non_target_identified_as_target = numpy.std(prob_non_target_identified_as_target_list)
+        E_prob_non_target_identified_as_target = disclosure_attack_result.mean("prob_non_target_identified_as_target")
+        std_prob_non_target_identified_as_target = disclosure_attack_result.std("prob_non_target_identified_as_target")
         E_prob_non_target_identified_as_target_list.append(E_prob_non_target_identified_as_target)
         std_prob_non_target_identified_as_target_list.append(std_prob_non_target_identified_as_target)
 
@@ -68,6 +65,17 @@ def get_results_to_plot(
             target_server_set_accuracy=disclosure_attack_result.target_server_set_accuracy,
         )
 
+        # Perf counters, if the sims are run with `w_stats=True`
+        if disclosure_attack_result.sim_stats_list:
+            sim_stats_summary = stats.get_sim_stats_summary(disclosure_attack_result.sim_stats_list)
+            log(INFO, "", sim_stats_summary=sim_stats_summary)
+            sim_stats_summary_list.append(sim_stats_summary)
+        else:
+            sim_stats_summary_list.append(None)
+
+    if progress_reporter is not None:
+        progress_reporter.stop()
+
     log(
         INFO, "",
         E_time_to_deanonymize_list=E_time_to_deanonymize_list,
@@ -80,7 +88,7 @@ def get_results_to_plot(
         std_prob_non_target_identified_as_target_list=std_prob_non_target_identified_as_target_list,
     )
 
-    return dict(
+    results_dict = dict(
         E_time_to_deanonymize_list=E_time_to_deanonymize_list,
         std_time_to_deanonymize_list=std_time_to_deanonymize_list,
         E_num_rounds_list=E_num_rounds_list,
@@ -90,3 +98,7 @@ def get_results_to_plot(
         E_prob_target_identified_as_non_target_list=E_prob_target_identified_as_non_target_list,
         std_prob_target_identified_as_non_target_list=std_prob_target_identified_as_non_target_list,
     )
+    if any(sim_stats_summary is not None for sim_stats_summary in sim_stats_summary_list):
+        results_dict["sim_stats_summary_list"] = sim_stats_summary_list
+
+    return results_dict
@@ -0,0 +1,293 @@
+"""Shared-directory work queue to shard the replications of a sweep across
+processes and nodes.
+
+Layout of `queue_dir`:
+    manifest.pkl        x_list and the number of tasks per x
+    todo/<task_id>.pkl  Task descriptors waiting to be claimed
+    claimed/<task_id>.pkl
+    done/<task_id>.pkl
+    results/<task_id>.pkl  Result shard (`DisclosureAttackResult`) per task
+
+Workers claim a task by renaming it from `todo/` into `claimed/`. Rename is
+atomic within a file system, so exactly one worker wins each task no matter
+how many workers (local processes or Slurm tasks) poll the same directory.
+
+The sims draw from the global `random` and `numpy.random` states unless
+`crn_seed` is set, and forked workers inherit the same numpy state. So each
+task reseeds both from the seed of the queue and its (x, block) index, which
+makes the shards independent of each other and reproducible.
+
+Usage:
+    # Coordinator
+    work_queue.create_tasks(queue_dir, x_list, sim_kwargs_given_x_func, ...)
+    # Workers; any number of them, on any node that sees `queue_dir`
+    python -m src.exp.work_queue --queue_dir <queue_dir>
+    # Merge
+    x_to_disclosure_attack_result_map = work_queue.get_x_to_disclosure_attack_result_map(queue_dir)
+"""
+
+import argparse
+import dataclasses
+import multiprocessing
+import os
+import pickle
+import random
+import socket
+import time
+
+import numpy
+
+from typing import Callable, Optional
+
+from src.attack import disclosure_attack
+from src.debug_utils import check, log, DEBUG, INFO, WARNING
+from src.sim import sim as sim_module
+
+
+MANIFEST_FILENAME = "manifest.pkl"
+TODO_DIRNAME = "todo"
+CLAIMED_DIRNAME = "claimed"
+DONE_DIRNAME = "done"
+RESULTS_DIRNAME = "results"
+
+
+@dataclasses.dataclass
+class Task:
+    task_id: str
+    x_index: int
+    x: object
+    block_index: int
+    num_samples: int
+    sim_kwargs: dict
+    sim_func: Callable = sim_module.sim_w_disclosure_attack_w_joblib
+    seed: Optional[int] = None
+
+
+def get_task_id(x_index: int, block_index: int) -> str:
+    return f"x_{x_index:04d}_block_{block_index:06d}"
+
+
+def _write_pickle_atomically(obj, file_path: str):
+    tmp_file_path = f"{file_path}.tmp-{socket.gethostname()}-{os.getpid()}"
+    with open(tmp_file_path, "wb") as f:
+        pickle.dump(obj, f)
+
+    os.replace(tmp_file_path, file_path)
+
+
+def _read_pickle(file_path: str):
+    with open(file_path, "rb") as f:
+        return pickle.load(f)
+
+
+def seed_global_rngs(seed_sequence: numpy.random.SeedSequence):
+    numpy.random.seed(seed_sequence.generate_state(4))
+    random.seed(int.from_bytes(seed_sequence.generate_state(4).tobytes(), "little"))
+
+
+def create_tasks(
+    queue_dir: str,
+    x_list: list,
+    sim_kwargs_given_x_func: Callable,
+    num_samples: int,
+    num_samples_per_task: int,
+    sim_func: Callable = sim_module.sim_w_disclosure_attack_w_joblib,
+    seed: Optional[int] = None,
+) -> int:
+    """Writes one task per (x, block of `num_samples_per_task` replications).
+
+    `sim_kwargs_given_x_func(x)` returns the kwargs of `sim_func` except for
+    `num_samples`. Both the kwargs and `sim_func` must be picklable, so
+    `sim_func` has to be a module-level function. The tasks are seeded from
+    `seed`, which is drawn from the OS entropy if not given.
+    """
+    check(num_samples_per_task > 0, "", num_samples_per_task=num_samples_per_task)
+
+    if seed is None:
+        seed = numpy.random.SeedSequence().entropy
+
+    for dirname in [TODO_DIRNAME, CLAIMED_DIRNAME, DONE_DIRNAME, RESULTS_DIRNAME]:
+        os.makedirs(os.path.join(queue_dir, dirname), exist_ok=True)
+
+    num_tasks_per_x = (num_samples + num_samples_per_task - 1) // num_samples_per_task
+    for x_index, x in enumerate(x_list):
+        sim_kwargs = sim_kwargs_given_x_func(x)
+
+        for block_index in range(num_tasks_per_x):
+            if sim_kwargs.get("crn_seed") is not None:
+                # Blocks cover disjoint replications of the common random streams.
+                sim_kwargs = {**sim_kwargs, "first_replication": block_index * num_samples_per_task}
+
+            task = Task(
+                task_id=get_task_id(x_index=x_index, block_index=block_index),
+                x_index=x_index,
+                x=x,
+                block_index=block_index,
+                num_samples=min(num_samples_per_task, num_samples - block_index * num_samples_per_task),
+                sim_kwargs=sim_kwargs,
+                sim_func=sim_func,
+                seed=seed,
+            )
+            _write_pickle_atomically(
+                task, os.path.join(queue_dir, TODO_DIRNAME, f"{task.task_id}.pkl")
+            )
+
+    # Manifest is written last, so its existence means the queue is complete.
+    _write_pickle_atomically(
+        {"x_list": list(x_list), "num_tasks_per_x": num_tasks_per_x},
+        os.path.join(queue_dir, MANIFEST_FILENAME),
+    )
+
+    num_tasks = len(x_list) * num_tasks_per_x
+    log(INFO, "Done", queue_dir=queue_dir, num_tasks=num_tasks)
+    return num_tasks
+
+
+def claim_task(queue_dir: str) -> Optional[Task]:
+    todo_dir = os.path.join(queue_dir, TODO_DIRNAME)
+    for filename in sorted(os.listdir(todo_dir)):
+        if not filename.endswith(".pkl"):
+            continue
+
+        claimed_file_path = os.path.join(queue_dir, CLAIMED_DIRNAME, filename)
+        try:
+            os.rename(os.path.join(todo_dir, filename), claimed_file_path)
+        except FileNotFoundError:
+            # Claimed by another worker in the meantime.
+            continue
+
+        # Refresh mtime to mark the start of the claim, see `requeue_stale_tasks()`.
+        try:
+            os.utime(claimed_file_path)
+            return _read_pickle(claimed_file_path)
+        except FileNotFoundError:
+            # Requeued by `requeue_stale_tasks()` before the mtime was refreshed.
+            continue
+
+    return None
+
+
+def run_task(queue_dir: str, task: Task):
+    log(INFO, "Started", task_id=task.task_id, x=task.x, num_samples=task.num_samples)
+
+    if task.seed is not None:
+        seed_global_rngs(
+            numpy.random.SeedSequence(entropy=task.seed, spawn_key=(task.x_index, task.block_index))
+        )
+
+    disclosure_attack_result = task.sim_func(num_samples=task.num_samples, **task.sim_kwargs)
+
+    _write_pickle_atomically(
+        disclosure_attack_result,
+        os.path.join(queue_dir, RESULTS_DIRNAME, f"{task.task_id}.pkl"),
+    )
+    try:
+        os.replace(
+            os.path.join(queue_dir, CLAIMED_DIRNAME, f"{task.task_id}.pkl"),
+            os.path.join(queue_dir, DONE_DIRNAME, f"{task.task_id}.pkl"),
+        )
+    except FileNotFoundError:
+        # Requeued by `requeue_stale_tasks()` while running. The result is kept, and
+        # the rerun of the task overwrites it.
+        log(WARNING, "Task was requeued while running", task_id=task.task_id)
+        return
+
+    log(INFO, "Done", task_id=task.task_id)
+
+
+def run_worker(
+    queue_dir: str,
+    max_num_tasks: Optional[int] = None,
+) -> int:
+    """Runs tasks until the queue is drained. Returns the number of tasks run."""
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    log(INFO, "Started", queue_dir=queue_dir, worker_id=worker_id)
+
+    # Forked workers start with the numpy state of their parent.
+    seed_global_rngs(numpy.random.SeedSequence())
+
+    num_tasks_run = 0
+    while max_num_tasks is None or num_tasks_run < max_num_tasks:
+        task = claim_task(queue_dir=queue_dir)
+        if task is None:
+            break
+
+        run_task(queue_dir=queue_dir, task=task)
+        num_tasks_run += 1
+
+    log(INFO, "Done", worker_id=worker_id, num_tasks_run=num_tasks_run)
+    return num_tasks_run
+
+
+def run_local_workers(queue_dir: str, num_workers: int):
+    """Runs `num_workers` worker processes on this node without a scheduler."""
+
+    process_list = [
+        multiprocessing.Process(target=run_worker, kwargs={"queue_dir": queue_dir})
+        for _ in range(num_workers)
+    ]
+    for process in process_list:
+        process.start()
+
+    for process in process_list:
+        process.join()
+
+
+def requeue_stale_tasks(queue_dir: str, max_task_duration_in_secs: float) -> int:
+    """Moves the tasks that were claimed more than `max_task_duration_in_secs`
+    ago back to `todo/`, e.g., after their worker was killed by the scheduler.
+    """
+
+    num_requeued_tasks = 0
+    claimed_dir = os.path.join(queue_dir, CLAIMED_DIRNAME)
+    for filename in os.listdir(claimed_dir):
+        claimed_file_path = os.path.join(claimed_dir, filename)
+        try:
+            if time.time() - os.path.getmtime(claimed_file_path) < max_task_duration_in_secs:
+                continue
+
+            os.rename(claimed_file_path, os.path.join(queue_dir, TODO_DIRNAME, filename))
+        except FileNotFoundError:
+            continue
+
+        log(WARNING, "Requeued", filename=filename)
+        num_requeued_tasks += 1
+
+    return num_requeued_tasks
+
+
+def get_x_to_disclosure_attack_result_map(
+    queue_dir: str,
+) -> dict[object, disclosure_attack.DisclosureAttackResult]:
+    manifest = _read_pickle(os.path.join(queue_dir, MANIFEST_FILENAME))
+
+    x_to_disclosure_attack_result_map = {}
+    for x_index, x in enumerate(manifest["x_list"]):
+        disclosure_attack_result_list = []
+        for block_index in range(manifest["num_tasks_per_x"]):
+            result_file_path = os.path.join(
+                queue_dir, RESULTS_DIRNAME, f"{get_task_id(x_index=x_index, block_index=block_index)}.pkl"
+            )
+            check(os.path.exists(result_file_path), "Missing result shard", result_file_path=result_file_path)
+            disclosure_attack_result_list.append(_read_pickle(result_file_path))
+
+        log(DEBUG, "", x=x, num_shards=len(disclosure_attack_result_list))
+        x_to_disclosure_attack_result_map[x] = disclosure_attack.merge_disclosure_attack_results(
+            disclosure_attack_result_list
+        )
+
+    return x_to_disclosure_attack_result_map
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs a work queue worker.")
+    parser.add_argument("--queue_dir", type=str, required=True)
+    parser.add_argument("--max_num_tasks", type=int, default=None)
+    parser.add_argument("--num_local_workers", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.num_local_workers > 1:
+        run_local_workers(queue_dir=args.queue_dir, num_workers=args.num_local_workers)
+    else:
+        run_worker(queue_dir=args.queue_dir, max_num_tasks=args.max_num_tasks)
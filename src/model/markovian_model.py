@@ -1,4 +1,24 @@
-from src.prob import random_variable
+"""Probs of a server being active and of a round being an attack round in
+`TorSystem`, as used to set up the adversary with the analytical model.
+
+A client sends its next request a request cycle after the previous one, where
+the cycle is the idle time, the delay of the request and the delay until the
+last response message arrives. The cycles are sampled by Monte Carlo for general
+idle time and delay distributions. The samples are seeded and cached per RV
+tuple, so repeated calls, e.g., one per replication, return the same probs.
+"""
+
+import functools
+import numbers
+
+import numpy
+
+from src.debug_utils import check
+from src.prob import prob_kernel, random_variable
+
+
+NUM_SAMPLES_FOR_MONTE_CARLO = 2**16
+SEED_FOR_MONTE_CARLO = 0
 
 
 def prob_at_least_n_arrivals(
@@ -6,20 +26,117 @@ def prob_at_least_n_arrivals(
     arrival_rate: float,
     n: int,
 ):
-    num_arrivals_rv = random_variable.Poisson(
-        mu=attack_window_length * arrival_rate
+    return prob_kernel.poisson_sf(n, attack_window_length * arrival_rate)
+
+
+def _to_key_value(value):
+    if isinstance(value, numbers.Number):
+        return value.item() if isinstance(value, numpy.generic) else value
+
+    check(isinstance(value, (list, tuple, numpy.ndarray)), "Cannot key on value", value=value)
+    return tuple(_to_key_value(element) for element in value)
+
+
+def get_rv_key(rv: random_variable.RandomVariable) -> tuple:
+    """Two RVs with the same key have the same distribution. The scipy `dist` is
+    skipped as it is set up from the other attrs.
+    """
+
+    return (type(rv).__name__,) + tuple(
+        (name, _to_key_value(value))
+        for name, value in sorted(vars(rv).items())
+        if name != "dist"
     )
-    return num_arrivals_rv.tail_prob(n)
+
+
+class _RVWithKey:
+    """Hashable wrapper for the RVs to be used as `lru_cache` args."""
+
+    def __init__(self, rv: random_variable.RandomVariable):
+        self.rv = rv
+        self.key = get_rv_key(rv)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+@functools.lru_cache(maxsize=64)
+def _get_request_cycle_sample_array(
+    client_idle_time_rv: _RVWithKey,
+    network_delay_rv: _RVWithKey,
+    num_msgs_to_recv_for_get_request_rv: _RVWithKey,
+) -> numpy.ndarray:
+    rng = numpy.random.default_rng(SEED_FOR_MONTE_CARLO)
+    size = NUM_SAMPLES_FOR_MONTE_CARLO
+
+    client_idle_time_array = client_idle_time_rv.rv.sample(size=size, rng=rng)
+    request_delay_array = network_delay_rv.rv.sample(size=size, rng=rng)
+
+    # The request completes when the last of its `num_msgs` responses arrives.
+    num_msgs_array = numpy.asarray(num_msgs_to_recv_for_get_request_rv.rv.sample(size=size, rng=rng), dtype=int)
+    response_delay_array = network_delay_rv.rv.sample(size=(size, int(num_msgs_array.max())), rng=rng)
+    is_response_array = numpy.arange(response_delay_array.shape[1]) < num_msgs_array[:, numpy.newaxis]
+    last_response_delay_array = numpy.where(is_response_array, response_delay_array, -numpy.inf).max(axis=1)
+
+    return client_idle_time_array + request_delay_array + last_response_delay_array
+
+
+def get_request_cycle_sample_array(
+    client_idle_time_rv: random_variable.RandomVariable,
+    network_delay_rv: random_variable.RandomVariable,
+    num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable,
+) -> numpy.ndarray:
+    return _get_request_cycle_sample_array(
+        _RVWithKey(client_idle_time_rv),
+        _RVWithKey(network_delay_rv),
+        _RVWithKey(num_msgs_to_recv_for_get_request_rv),
+    )
+
+
+def prob_more_than_n_renewals_in_window(
+    cycle_sample_array: numpy.ndarray,
+    window_length: float,
+    n: int,
+) -> float:
+    """Returns `Pr{N > n}` for the number of renewals `N` in a window that starts
+    at a random time. The time from the window start to the first renewal has
+    the equilibrium distribution, i.e., is `U * X` for a length-biased cycle `X`.
+    """
+
+    rng = numpy.random.default_rng(SEED_FOR_MONTE_CARLO)
+    num_samples = cycle_sample_array.size
+
+    length_biased_cycle_array = rng.choice(
+        cycle_sample_array, size=num_samples, p=cycle_sample_array / cycle_sample_array.sum()
+    )
+    time_to_renewal_array = rng.random(num_samples) * length_biased_cycle_array
+    if n > 0:
+        time_to_renewal_array += rng.choice(cycle_sample_array, size=(num_samples, n)).sum(axis=1)
+
+    return float(numpy.mean(time_to_renewal_array <= window_length))
 
 
 def prob_server_active(
     network_delay_rv: random_variable.RandomVariable,
-    client_idle_time_rv: random_variable.Exponential,
+    client_idle_time_rv: random_variable.RandomVariable,
     num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable,
 ) -> float:
+    """A server receives the requests of many clients, whose superposition is
+    close to Poisson regardless of the cycle distribution, so only the mean
+    request cycle matters. As before, there are as many clients as servers.
+    """
+
+    cycle_sample_array = get_request_cycle_sample_array(
+        client_idle_time_rv=client_idle_time_rv,
+        network_delay_rv=network_delay_rv,
+        num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
+    )
     return prob_at_least_n_arrivals(
         attack_window_length=network_delay_rv.max_value,
-        arrival_rate=client_idle_time_rv.mu,
+        arrival_rate=1 / float(numpy.mean(cycle_sample_array)),
         # TODO: Attention!
         n=num_msgs_to_recv_for_get_request_rv.min_value - 1,
     )
@@ -27,12 +144,21 @@ def prob_server_active(
 
 def prob_attack_round(
     network_delay_rv: random_variable.RandomVariable,
-    target_client_idle_time_rv: random_variable.Exponential,
+    target_client_idle_time_rv: random_variable.RandomVariable,
     num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable,
 ) -> float:
-    return prob_at_least_n_arrivals(
-        attack_window_length=network_delay_rv.max_value,
-        arrival_rate=target_client_idle_time_rv.mu,
+    """The requests of the target client form a single renewal process, so the
+    whole request cycle distribution matters.
+    """
+
+    cycle_sample_array = get_request_cycle_sample_array(
+        client_idle_time_rv=target_client_idle_time_rv,
+        network_delay_rv=network_delay_rv,
+        num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
+    )
+    return prob_more_than_n_renewals_in_window(
+        cycle_sample_array=cycle_sample_array,
+        window_length=network_delay_rv.max_value,
         # TODO: Attention!
         n=num_msgs_to_recv_for_get_request_rv.min_value - 1,
     )
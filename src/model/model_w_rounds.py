@@ -1,9 +1,14 @@
-import math
+import numpy
 
 from src.debug_utils import check, DEBUG, ERROR, INFO, log
 
 
 class Model_wRounds():
+    """All the inputs can be numpy arrays, in which case the probs and thresholds
+    are returned as arrays in the broadcast shape of the inputs, e.g., to compute
+    the adversary config for all the sweep points of an experiment at once.
+    """
+
     def __init__(
         self,
         num_clients: int,
@@ -12,13 +17,13 @@ class Model_wRounds():
         prob_server_active: float,
         prob_attack_round: float,
     ):
-        check(num_target_servers <= num_servers, "")
+        check(numpy.all(numpy.asarray(num_target_servers) <= numpy.asarray(num_servers)), "")
 
-        self.num_clients = num_clients
-        self.num_servers = num_servers
-        self.num_target_servers = num_target_servers
-        self.prob_server_active = prob_server_active
-        self.prob_attack_round = prob_attack_round
+        self.num_clients = numpy.asarray(num_clients)
+        self.num_servers = numpy.asarray(num_servers)
+        self.num_target_servers = numpy.asarray(num_target_servers)
+        self.prob_server_active = numpy.asarray(prob_server_active, dtype=float)
+        self.prob_attack_round = numpy.asarray(prob_attack_round, dtype=float)
 
     def __repr__(self):
         return (
@@ -57,7 +62,7 @@ class Model_wRounds():
             (
                 self.prob_target_server_is_active_given_attack_round()
                 - self.prob_target_server_is_active()
-            ) / 2 / math.sqrt(2) / detection_gap_exp_factor
+            ) / 2 / numpy.sqrt(2) / detection_gap_exp_factor
         )
 
     def detection_threshold(
@@ -65,7 +70,7 @@ class Model_wRounds():
         detection_gap_exp_factor: float,
     ) -> float:
         return (
-            math.sqrt(2)
+            numpy.sqrt(2)
             * detection_gap_exp_factor
             * self.max_stdev_of_prob_estimates(
                 detection_gap_exp_factor=detection_gap_exp_factor
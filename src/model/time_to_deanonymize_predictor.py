@@ -0,0 +1,262 @@
+"""Analytical prediction of the number of rounds and the time-to-deanonymize
+of `DisclosureAttack_wOutlierDetection` run against `TorModel_wRounds`, i.e.,
+of what `sim.sim_tor_model()` measures.
+
+The servers are in the sample set of an attack round, or of a baseline
+inspection, with the activity probs of `Model_wRounds`. The attack stops at
+the first round `n >= disclosure_attack.MIN_NUM_ROUNDS` at which the Beta
+posterior of the activity prob of every server has stdev at most `max_stdev`,
+both over the attack and the baseline sample sets. The cdf of the stopping
+round at `n` is approximated by the prob that this holds at `n`, with the server
+counts at `n` taken as independent Binomials. The time is then given by the
+round structure of `TorModel_wRounds`.
+
+`TimeToDeanonymizePredictor.validate()` runs a few simulations to check the
+prediction at a sweep point.
+"""
+
+import dataclasses
+import math
+
+import numpy
+import scipy.stats
+
+from src.attack import disclosure_attack
+from src.debug_utils import check, log, DEBUG, INFO, WARNING
+from src.model import model_w_rounds
+from src.sim import sim, tor_model
+
+
+@dataclasses.dataclass
+class TimeToDeanonymizePrediction:
+    E_num_rounds: float
+    std_num_rounds: float
+    E_time_to_deanonymize: float
+    std_time_to_deanonymize: float
+    # Mass of the num rounds beyond the support that was evaluated.
+    prob_num_rounds_truncated: float = 0
+
+
+def get_prob_zero_and_prob_beta_stdev_below(
+    num_sample_sets: numpy.ndarray,
+    prob_in_sample_set: float,
+    max_stdev: float,
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """For `K ~ Binomial(n, p)` times in `n` sample sets, returns `Pr{K = 0}`, and
+    `Pr{K >= 1 and stdev(Beta(K + 1, n - K + 1)) <= max_stdev}`.
+
+    The stdev condition is `u (n + 2 - u) <= max_stdev^2 (n + 2)^2 (n + 3)` for
+    `u = K + 1`, which holds for `u` outside of the roots of the quadratic.
+    """
+
+    n = numpy.asarray(num_sample_sets, dtype=float)
+    c = max_stdev**2 * (n + 2)**2 * (n + 3)
+    discriminant = (n + 2)**2 - 4 * c
+    sqrt_discriminant = numpy.sqrt(numpy.maximum(discriminant, 0))
+
+    max_k_below_roots = numpy.floor((n + 2 - sqrt_discriminant) / 2) - 1
+    min_k_above_roots = numpy.maximum(
+        numpy.ceil((n + 2 + sqrt_discriminant) / 2) - 1,
+        numpy.maximum(max_k_below_roots + 1, 1),
+    )
+
+    prob_zero = scipy.stats.binom.pmf(0, n, prob_in_sample_set)
+    prob_stdev_below = (
+        scipy.stats.binom.cdf(numpy.maximum(max_k_below_roots, 0), n, prob_in_sample_set) - prob_zero
+        + scipy.stats.binom.sf(min_k_above_roots - 1, n, prob_in_sample_set)
+    )
+    prob_stdev_below = numpy.where(discriminant < 0, 1 - prob_zero, prob_stdev_below)
+
+    return prob_zero, numpy.clip(prob_stdev_below, 0, 1)
+
+
+class TimeToDeanonymizePredictor:
+    def __init__(
+        self,
+        num_clients: int,
+        num_servers: int,
+        num_target_servers: int,
+        prob_server_active: float,
+        prob_attack_round: float,
+        detection_gap_exp_factor: float,
+        max_delivery_time_for_adversary: float = 1,
+    ):
+        check(prob_attack_round > 0, "", prob_attack_round=prob_attack_round)
+
+        self.num_clients = num_clients
+        self.num_servers = num_servers
+        self.num_target_servers = num_target_servers
+        self.prob_server_active = prob_server_active
+        self.prob_attack_round = prob_attack_round
+        self.detection_gap_exp_factor = detection_gap_exp_factor
+        self.max_delivery_time_for_adversary = max_delivery_time_for_adversary
+
+        self.analytical_model = model_w_rounds.Model_wRounds(
+            num_clients=num_clients,
+            num_servers=num_servers,
+            num_target_servers=num_target_servers,
+            prob_server_active=prob_server_active,
+            prob_attack_round=prob_attack_round,
+        )
+        self.max_stdev = float(
+            self.analytical_model.max_stdev_of_prob_estimates(detection_gap_exp_factor=detection_gap_exp_factor)
+        )
+
+    def __repr__(self):
+        return (
+            "TimeToDeanonymizePredictor( \n"
+            f"\t num_servers= {self.num_servers} \n"
+            f"\t num_target_servers= {self.num_target_servers} \n"
+            f"\t prob_server_active= {self.prob_server_active} \n"
+            f"\t prob_attack_round= {self.prob_attack_round} \n"
+            f"\t detection_gap_exp_factor= {self.detection_gap_exp_factor} \n"
+            f"\t max_stdev= {self.max_stdev} \n"
+            ")"
+        )
+
+    def get_mean_and_var_of_time_between_rounds(self) -> tuple[float, float]:
+        D = self.max_delivery_time_for_adversary
+        mean_interval = D / tor_model.RATE_OF_INTERVAL_BETWEEN_ROUNDS
+        return tor_model.TIME_FROM_ACTIVITY_TO_ATTACK * D + mean_interval, mean_interval**2
+
+    def get_E_time_given_num_rounds(self, num_rounds: numpy.ndarray) -> numpy.ndarray:
+        """The first attack round is at `tor_model.TIME_FROM_ACTIVITY_TO_ATTACK`,
+        and the number of rounds until the `n`th attack round is Negative Binomial.
+        """
+
+        mean_time_between_rounds, _ = self.get_mean_and_var_of_time_between_rounds()
+        return (
+            tor_model.TIME_FROM_ACTIVITY_TO_ATTACK * self.max_delivery_time_for_adversary
+            + (numpy.asarray(num_rounds) / self.prob_attack_round - 1) * mean_time_between_rounds
+        )
+
+    def get_num_rounds_cdf_array(self, max_num_rounds: int = None) -> numpy.ndarray:
+        """Returns the cdf of the stopping round over `[0, max_num_rounds]`. By
+        default, `max_num_rounds` is twice the number of rounds after which the
+        Beta stdev is at most `max_stdev` for any count.
+        """
+
+        if max_num_rounds is None:
+            max_num_rounds = 2 * max(disclosure_attack.MIN_NUM_ROUNDS, math.ceil(1 / (4 * self.max_stdev**2)))
+
+        num_rounds_array = numpy.arange(max_num_rounds + 1)
+        num_baseline_sample_sets_array = numpy.round(
+            disclosure_attack.RATE_OF_BASELINE_INSPECTIONS / self.max_delivery_time_for_adversary
+            * numpy.maximum(self.get_E_time_given_num_rounds(num_rounds_array), 0)
+        )
+
+        prob_target_in_sample_set = self.analytical_model.prob_target_server_is_active_given_attack_round()
+        prob_target_in_baseline_sample_set = self.analytical_model.prob_target_server_is_active()
+        prob_non_target_in_sample_set = self.analytical_model.prob_nontarget_server_is_active_given_attack_round()
+        prob_non_target_in_baseline_sample_set = self.analytical_model.prob_nontarget_server_is_active()
+
+        def get_prob_server_done(prob_in_sample_set: float, prob_in_baseline_sample_set: float) -> numpy.ndarray:
+            # A server that has not been in any sample set is not tracked, while
+            # a server that has been in only one kind of set blocks the attack.
+            prob_zero, prob_stdev_below = get_prob_zero_and_prob_beta_stdev_below(
+                num_sample_sets=num_rounds_array,
+                prob_in_sample_set=prob_in_sample_set,
+                max_stdev=self.max_stdev,
+            )
+            prob_zero_baseline, prob_stdev_below_baseline = get_prob_zero_and_prob_beta_stdev_below(
+                num_sample_sets=num_baseline_sample_sets_array,
+                prob_in_sample_set=prob_in_baseline_sample_set,
+                max_stdev=self.max_stdev,
+            )
+            return prob_zero * prob_zero_baseline + prob_stdev_below * prob_stdev_below_baseline
+
+        prob_done_array = (
+            get_prob_server_done(prob_target_in_sample_set, prob_target_in_baseline_sample_set)
+            ** self.num_target_servers
+            * get_prob_server_done(prob_non_target_in_sample_set, prob_non_target_in_baseline_sample_set)
+            ** (self.num_servers - self.num_target_servers)
+        )
+        prob_done_array[num_rounds_array < disclosure_attack.MIN_NUM_ROUNDS] = 0
+
+        # The attack stops at the first round at which it is done.
+        return numpy.maximum.accumulate(prob_done_array)
+
+    def predict(self, max_num_rounds: int = None) -> TimeToDeanonymizePrediction:
+        cdf_array = self.get_num_rounds_cdf_array(max_num_rounds=max_num_rounds)
+        num_rounds_array = numpy.arange(cdf_array.size)
+
+        pmf_array = numpy.diff(cdf_array, prepend=0)
+        # The mass beyond `max_num_rounds` is put at `max_num_rounds`.
+        prob_num_rounds_truncated = 1 - cdf_array[-1]
+        pmf_array[-1] += prob_num_rounds_truncated
+        if prob_num_rounds_truncated > 1e-3:
+            log(WARNING, "Num rounds is truncated", prob_num_rounds_truncated=prob_num_rounds_truncated)
+
+        E_num_rounds = float(pmf_array @ num_rounds_array)
+        var_num_rounds = float(pmf_array @ (num_rounds_array - E_num_rounds)**2)
+
+        # Var[T] = E[Var[T | N]] + Var[E[T | N]]
+        mean_time_between_rounds, var_time_between_rounds = self.get_mean_and_var_of_time_between_rounds()
+        p = self.prob_attack_round
+        E_time_to_deanonymize = float(self.get_E_time_given_num_rounds(E_num_rounds))
+        var_time_to_deanonymize = (
+            (E_num_rounds / p - 1) * var_time_between_rounds
+            + E_num_rounds * (1 - p) / p**2 * mean_time_between_rounds**2
+            + var_num_rounds * (mean_time_between_rounds / p)**2
+        )
+
+        prediction = TimeToDeanonymizePrediction(
+            E_num_rounds=E_num_rounds,
+            std_num_rounds=math.sqrt(var_num_rounds),
+            E_time_to_deanonymize=E_time_to_deanonymize,
+            std_time_to_deanonymize=math.sqrt(max(var_time_to_deanonymize, 0)),
+            prob_num_rounds_truncated=float(prob_num_rounds_truncated),
+        )
+        log(DEBUG, "", predictor=self, prediction=prediction)
+        return prediction
+
+    def validate(
+        self,
+        num_samples: int = 10,
+        max_rel_error: float = 0.2,
+        **kwargs,
+    ) -> dict:
+        """Runs `num_samples` replications of `sim.sim_tor_model()` at this point
+        and returns the predicted and simulated stats with their relative errors.
+        `agrees` is set if the relative errors of the means are at most `max_rel_error`.
+        `kwargs` are passed to `sim.sim_w_disclosure_attack_w_joblib()`.
+        """
+
+        prediction = self.predict()
+        disclosure_attack_result = sim.sim_w_disclosure_attack_w_joblib(
+            num_clients=self.num_clients,
+            num_servers=self.num_servers,
+            num_target_servers=self.num_target_servers,
+            num_samples=num_samples,
+            w_model=True,
+            prob_server_active=self.prob_server_active,
+            prob_attack_round=self.prob_attack_round,
+            detection_gap_exp_factor=self.detection_gap_exp_factor,
+            max_delivery_time_for_adversary=self.max_delivery_time_for_adversary,
+            **kwargs,
+        )
+
+        num_rounds_array = numpy.asarray(disclosure_attack_result.num_rounds_list, dtype=float)
+        time_to_deanonymize_array = numpy.asarray(disclosure_attack_result.time_to_deanonymize_list, dtype=float)
+        E_num_rounds_sim = float(numpy.mean(num_rounds_array))
+        E_time_to_deanonymize_sim = float(numpy.mean(time_to_deanonymize_array))
+
+        rel_error_E_num_rounds = abs(prediction.E_num_rounds - E_num_rounds_sim) / E_num_rounds_sim
+        rel_error_E_time_to_deanonymize = (
+            abs(prediction.E_time_to_deanonymize - E_time_to_deanonymize_sim) / E_time_to_deanonymize_sim
+        )
+        validation = {
+            "prediction": prediction,
+            "E_num_rounds_sim": E_num_rounds_sim,
+            "std_num_rounds_sim": float(numpy.std(num_rounds_array)),
+            "E_time_to_deanonymize_sim": E_time_to_deanonymize_sim,
+            "std_time_to_deanonymize_sim": float(numpy.std(time_to_deanonymize_array)),
+            "rel_error_E_num_rounds": rel_error_E_num_rounds,
+            "rel_error_E_time_to_deanonymize": rel_error_E_time_to_deanonymize,
+            "agrees": (
+                rel_error_E_num_rounds <= max_rel_error
+                and rel_error_E_time_to_deanonymize <= max_rel_error
+            ),
+        }
+        log(INFO, "", predictor=self, **validation)
+        return validation
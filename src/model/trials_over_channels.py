@@ -1,9 +1,15 @@
 import collections
+import dataclasses
+import joblib
 import numpy
 import random
+import scipy.special
+import scipy.stats
 
-from src.debug_utils import log, INFO
-from src.plot_utils import NICE_BLUE, plot
+from typing import Optional
+
+from src.debug_utils import check, log, INFO
+from src.plot_utils import NICE_BLUE, NICE_ORANGE, plot
 
 
 def sample_num_trials_until_k_successes(k: int, p: float) -> int:
@@ -18,7 +24,7 @@ def sample_num_trials_until_k_successes(k: int, p: float) -> int:
     return num_trials
 
 
-def sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes(
+def sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes_trial_by_trial(
     n: int,
     m: int,
     k: int,
@@ -44,26 +50,419 @@ def sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes(
     return sorted(channel_id_to_num_successes_map.values())
 
 
-def sim_sorted_num_trials_over_channels_until_m_channels_reach_k_successes(
+def sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes_array(
     n: int,
     m: int,
     k: int,
     p: float,
     num_samples: int,
+    rng: numpy.random.Generator = None,
+) -> numpy.ndarray:
+    """Returns an array of shape `(num_samples, n)`, in which each row is distributed as
+    `sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes_trial_by_trial()`.
+
+    The trial at which a channel reaches `k` successes is `k` plus a negative binomial
+    number of failures, and the stopping trial `T` is the `m`-th smallest of these.
+    At `T`, a channel that reached `k` successes at trial `t <= T` has `k` plus
+    Binomial(`T - t`, `p`) successes. A channel that reaches `k` successes at `t > T`
+    has its first `k - 1` successes uniformly over the first `t - 1` trials, so it has
+    Hypergeometric(`k - 1`, `t - k`, `T`) successes within the first `T` trials.
+    """
+
+    if rng is None:
+        rng = numpy.random.default_rng()
+
+    trial_to_reach_k_array = k + rng.negative_binomial(k, p, size=(num_samples, n))
+    stopping_trial_array = numpy.partition(trial_to_reach_k_array, m - 1, axis=1)[:, m - 1:m]
+
+    stopping_trial_array = numpy.broadcast_to(stopping_trial_array, trial_to_reach_k_array.shape)
+    is_reached_array = trial_to_reach_k_array <= stopping_trial_array
+
+    num_successes_array = numpy.empty_like(trial_to_reach_k_array)
+    num_successes_array[is_reached_array] = k + rng.binomial(
+        stopping_trial_array[is_reached_array] - trial_to_reach_k_array[is_reached_array], p
+    )
+    is_not_reached_array = ~is_reached_array
+    num_successes_array[is_not_reached_array] = rng.hypergeometric(
+        k - 1,
+        trial_to_reach_k_array[is_not_reached_array] - k,
+        stopping_trial_array[is_not_reached_array],
+    )
+    num_successes_array.sort(axis=1)
+
+    return num_successes_array
+
+
+def sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes(
+    n: int,
+    m: int,
+    k: int,
+    p: float,
+    rng: numpy.random.Generator = None,
 ) -> list[int]:
-    sorted_num_trials_list = [[] for _ in range(n)]
+    return sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes_array(
+        n=n, m=m, k=k, p=p, num_samples=1, rng=rng,
+    )[0].tolist()
+
+
+def sim_sorted_num_trials_over_channels_until_m_channels_reach_k_successes(
+    n: int,
+    m: int,
+    k: int,
+    p: float,
+    num_samples: int,
+    rng: numpy.random.Generator = None,
+) -> list[list[int]]:
+    """Returns the list of samples for each order index."""
+
+    sorted_num_trials_array = sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes_array(
+        n=n, m=m, k=k, p=p, num_samples=num_samples, rng=rng,
+    )
+    return sorted_num_trials_array.T.tolist()
 
-    for s in range(num_samples):
-        log(INFO, f">> s= {s}")
 
-        sorted_num_trials = sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes(
-            n=n, m=m, k=k, p=p,
+@dataclasses.dataclass
+class SortedNumTrialsAccumulator:
+    """Running mean and variance of the sorted number of successes at each order index,
+    kept with Welford's update over batches and merged with Chan's parallel update, so the
+    memory does not grow with the number of samples. If `max_num_successes` is given, also
+    keeps the histogram over `0, ..., max_num_successes` for each order index, with the
+    last column counting the samples above `max_num_successes`.
+    """
+
+    n: int
+    max_num_successes: Optional[int] = None
+
+    def __post_init__(self):
+        self.num_samples = 0
+        self.mean_array = numpy.zeros(self.n)
+        self.sum_square_diff_array = numpy.zeros(self.n)
+        self.histogram_array = (
+            None if self.max_num_successes is None
+            else numpy.zeros((self.n, self.max_num_successes + 2), dtype=numpy.int64)
+        )
+
+    @property
+    def var_array(self) -> numpy.ndarray:
+        return self.sum_square_diff_array / self.num_samples if self.num_samples else numpy.full(self.n, numpy.nan)
+
+    @property
+    def stdev_array(self) -> numpy.ndarray:
+        return numpy.sqrt(self.var_array)
+
+    def _merge_moments(self, num_samples: int, mean_array: numpy.ndarray, sum_square_diff_array: numpy.ndarray):
+        total_num_samples = self.num_samples + num_samples
+        if total_num_samples == 0:
+            return
+
+        delta_array = mean_array - self.mean_array
+        self.mean_array = self.mean_array + delta_array * num_samples / total_num_samples
+        self.sum_square_diff_array = (
+            self.sum_square_diff_array
+            + sum_square_diff_array
+            + delta_array**2 * self.num_samples * num_samples / total_num_samples
+        )
+        self.num_samples = total_num_samples
+
+    def add(self, sorted_num_trials_array: numpy.ndarray):
+        """Adds the samples in the rows of `sorted_num_trials_array` of shape `(num_samples, n)`."""
+
+        num_samples = sorted_num_trials_array.shape[0]
+        if num_samples == 0:
+            return
+
+        mean_array = sorted_num_trials_array.mean(axis=0)
+        self._merge_moments(
+            num_samples=num_samples,
+            mean_array=mean_array,
+            sum_square_diff_array=((sorted_num_trials_array - mean_array) ** 2).sum(axis=0),
+        )
+
+        if self.histogram_array is not None:
+            num_bins = self.max_num_successes + 2
+            bin_array = numpy.minimum(sorted_num_trials_array, self.max_num_successes + 1)
+            self.histogram_array += numpy.bincount(
+                (numpy.arange(self.n) * num_bins + bin_array).ravel(),
+                minlength=self.n * num_bins,
+            ).reshape(self.n, num_bins)
+
+    def merge(self, other: "SortedNumTrialsAccumulator") -> "SortedNumTrialsAccumulator":
+        check(other.n == self.n and other.max_num_successes == self.max_num_successes, "Accumulators do not match")
+
+        self._merge_moments(
+            num_samples=other.num_samples,
+            mean_array=other.mean_array,
+            sum_square_diff_array=other.sum_square_diff_array,
         )
+        if self.histogram_array is not None:
+            self.histogram_array += other.histogram_array
+
+        return self
+
+
+def _sim_sorted_num_trials_over_channels_w_accumulator(
+    n: int,
+    m: int,
+    k: int,
+    p: float,
+    num_samples: int,
+    seed_sequence: numpy.random.SeedSequence,
+    max_num_samples_per_batch: int,
+    max_num_successes: Optional[int],
+) -> SortedNumTrialsAccumulator:
+    rng = numpy.random.default_rng(seed_sequence)
+    accumulator = SortedNumTrialsAccumulator(n=n, max_num_successes=max_num_successes)
 
-        for i in range(n):
-            sorted_num_trials_list[i].append(sorted_num_trials[i])
+    for first_sample in range(0, num_samples, max_num_samples_per_batch):
+        accumulator.add(
+            sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes_array(
+                n=n, m=m, k=k, p=p, num_samples=min(max_num_samples_per_batch, num_samples - first_sample), rng=rng,
+            )
+        )
 
-    return sorted_num_trials_list
+    return accumulator
+
+
+def sim_sorted_num_trials_over_channels_w_joblib(
+    n: int,
+    m: int,
+    k: int,
+    p: float,
+    num_samples: int,
+    seed: int = 0,
+    num_workers: int = None,
+    max_num_samples_per_batch: int = 2**12,
+    max_num_successes: Optional[int] = None,
+) -> SortedNumTrialsAccumulator:
+    """Splits the samples over `num_workers` processes, each drawing from its own stream
+    spawned from `seed`, and returns the merged accumulator. The draws depend on both
+    `seed` and `num_workers`. Memory is `O(n * max_num_samples_per_batch)` per worker.
+    """
+
+    if num_workers is None:
+        num_workers = joblib.cpu_count()
+    num_workers = max(min(num_workers, num_samples), 1)
+
+    num_samples_per_worker_list = [
+        num_samples // num_workers + (1 if i < num_samples % num_workers else 0)
+        for i in range(num_workers)
+    ]
+    seed_sequence_list = numpy.random.SeedSequence(seed).spawn(num_workers)
+
+    accumulator_list = joblib.Parallel(n_jobs=num_workers, prefer="processes")(
+        [
+            joblib.delayed(_sim_sorted_num_trials_over_channels_w_accumulator)(
+                n=n,
+                m=m,
+                k=k,
+                p=p,
+                num_samples=num_samples_for_worker,
+                seed_sequence=seed_sequence,
+                max_num_samples_per_batch=max_num_samples_per_batch,
+                max_num_successes=max_num_successes,
+            )
+            for num_samples_for_worker, seed_sequence in zip(num_samples_per_worker_list, seed_sequence_list)
+        ]
+    )
+
+    accumulator = SortedNumTrialsAccumulator(n=n, max_num_successes=max_num_successes)
+    for accumulator_for_worker in accumulator_list:
+        accumulator.merge(accumulator_for_worker)
+
+    return accumulator
+
+
+def _get_prob_sorted_num_trials_at_most_x_array(
+    n: int,
+    m: int,
+    k: numpy.ndarray,
+    p: numpy.ndarray,
+    t: numpy.ndarray,
+    x: numpy.ndarray,
+) -> numpy.ndarray:
+    """Returns the array of `Pr{T = t, L_x = l}` with shape `broadcast(k, p, t, x).shape + (n + 1,)`
+    for `l = 0, ..., n`, where `T` is the stopping trial and `L_x` is the number of channels with
+    at most `x` successes at `T`. Let `S(t)` be the number of successes of a channel by trial `t`.
+    Given `T = t`, a channel either has `S(t - 1) >= k` (`A` many), or `S(t - 1) = k - 1`
+    and succeeds at `t` (`B` many), or `S(t) < k`, and `T = t` iff `A < m <= A + B`.
+    For `x < k`, the channels with at most `x` successes are all in the last group, and
+    for `x >= k`, the channels with more than `x` successes are all in the first group,
+    so given `L_x = l`, `A` and `A + B` are Binomial over the remaining channels.
+    """
+
+    k, p, t, x = (numpy.asarray(array)[..., numpy.newaxis] for array in (k, p, t, x))
+    num_at_most_x = numpy.arange(n + 1)
+
+    prob_a = scipy.stats.binom.sf(k - 1, t - 1, p)
+    prob_b = scipy.stats.binom.pmf(k - 1, t - 1, p) * p
+    prob_at_most_x = scipy.stats.binom.cdf(x, t, p)
+    prob_more_than_x = scipy.stats.binom.sf(x, t, p)
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        # The Binomial coefficient only depends on `num_at_most_x`, so it is not recomputed
+        # over `(t, x)`.
+        log_binom_coef = (
+            scipy.special.gammaln(n + 1)
+            - scipy.special.gammaln(num_at_most_x + 1)
+            - scipy.special.gammaln(n - num_at_most_x + 1)
+        )
+        prob_num_at_most_x = numpy.exp(
+            log_binom_coef
+            + scipy.special.xlogy(num_at_most_x, prob_at_most_x)
+            + scipy.special.xlogy(n - num_at_most_x, prob_more_than_x)
+        )
+
+        is_x_below_k = x < k
+        num_rest = numpy.where(is_x_below_k, n - num_at_most_x, num_at_most_x)
+        max_num_a_in_rest = numpy.where(is_x_below_k, m - 1, m - n + num_at_most_x - 1)
+        prob_rest = numpy.where(is_x_below_k, prob_more_than_x, prob_at_most_x)
+        prob_rest = numpy.where(prob_rest > 0, prob_rest, numpy.inf)
+        prob_a_in_rest = numpy.where(is_x_below_k, prob_a, prob_a - prob_more_than_x)
+        prob_w_x = prob_num_at_most_x * (
+            scipy.stats.binom.cdf(max_num_a_in_rest, num_rest, numpy.clip(prob_a_in_rest / prob_rest, 0, 1))
+            - scipy.stats.binom.cdf(
+                max_num_a_in_rest, num_rest, numpy.clip((prob_a_in_rest + prob_b) / prob_rest, 0, 1)
+            )
+        )
+
+    return numpy.nan_to_num(prob_w_x)
+
+
+def _get_min_and_max_stopping_trial(
+    n: int,
+    m: int,
+    k: numpy.ndarray,
+    p: numpy.ndarray,
+    tolerance: float,
+    max_chunk_size: int,
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """The stopping trial `T` is between the min and the max of the channels' trials to
+    reach `k` successes, and `Pr{T <= t} = Pr{Binomial(n, F(t)) >= m}`, where `F` is the
+    cdf of a channel's trial to reach `k` successes. Returns the range in which `T` falls
+    with prob at least `1 - 2 * tolerance`.
+    """
+
+    min_t = k + scipy.stats.nbinom.ppf(tolerance / n, k, p).astype(int)
+    max_t = k + scipy.stats.nbinom.isf(tolerance / n, k, p).astype(int)
+    num_t = max_t - min_t + 1
+
+    min_stopping_t = min_t.copy()
+    max_stopping_t = numpy.empty_like(max_t)
+    chunk_size = max(max_chunk_size // num_t.max(), 1)
+    for first in range(0, k.size, chunk_size):
+        index = slice(first, first + chunk_size)
+        t = min_t[index, numpy.newaxis] + numpy.arange(num_t[index].max())
+        k_for_chunk, p_for_chunk = k[index, numpy.newaxis], p[index, numpy.newaxis]
+        prob_reached_by_t = scipy.stats.nbinom.cdf(t - k_for_chunk, k_for_chunk, p_for_chunk)
+        is_t_in_range = t <= max_t[index, numpy.newaxis]
+        min_stopping_t[index] += (
+            (scipy.stats.binom.sf(m - 1, n, prob_reached_by_t) <= tolerance) & is_t_in_range
+        ).sum(axis=1)
+        max_stopping_t[index] = min_t[index] + (
+            (scipy.stats.binom.cdf(m - 1, n, prob_reached_by_t) >= tolerance) & is_t_in_range
+        ).sum(axis=1)
+
+    return min_stopping_t, max_stopping_t
+
+
+def _get_E_and_stdev_sorted_num_trials_over_channels(
+    n: int,
+    m: int,
+    k: numpy.ndarray,
+    p: numpy.ndarray,
+    tolerance: float,
+    max_chunk_size: int,
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Returns the arrays of shape `(len(k), n)` for the 1-D arrays `k` and `p`. The points
+    are evaluated together, each over its own range of trials and successes, padded to the
+    longest range and masked.
+    """
+
+    # The number of successes at the stopping trial is between those by the min and the
+    # max stopping trial.
+    min_t, max_t = _get_min_and_max_stopping_trial(
+        n=n, m=m, k=k, p=p, tolerance=tolerance, max_chunk_size=max_chunk_size,
+    )
+    min_x = scipy.stats.binom.ppf(tolerance / n, min_t, p).astype(int)
+    max_x = numpy.maximum(scipy.stats.binom.isf(tolerance / n, max_t, p).astype(int), k)
+    num_t = max_t - min_t + 1
+    num_x = max_x - min_x + 1
+
+    E_array = numpy.zeros((k.size, n))
+    stdev_array = numpy.zeros((k.size, n))
+
+    # Points of similar size are put in the same chunk to keep the padding small.
+    index_array = numpy.argsort(num_t * num_x, kind="stable")
+    first = 0
+    while first < index_array.size:
+        last = first + 1
+        while (
+            last < index_array.size
+            and (last + 1 - first) * num_t[index_array[first:last + 1]].max()
+            * num_x[index_array[first:last + 1]].max() * (n + 1) <= max_chunk_size
+        ):
+            last += 1
+
+        index = index_array[first:last]
+        x = min_x[index, numpy.newaxis] + numpy.arange(num_x[index].max())
+        is_x_in_range = x <= max_x[index, numpy.newaxis]
+
+        prob_at_most_x_array = numpy.zeros(x.shape + (n + 1,))
+        chunk_size = max(max_chunk_size // (x.size * (n + 1)), 1)
+        for first_t in range(0, num_t[index].max(), chunk_size):
+            t = min_t[index, numpy.newaxis] + numpy.arange(first_t, min(first_t + chunk_size, num_t[index].max()))
+            prob_array = _get_prob_sorted_num_trials_at_most_x_array(
+                n=n,
+                m=m,
+                k=k[index, numpy.newaxis, numpy.newaxis],
+                p=p[index, numpy.newaxis, numpy.newaxis],
+                t=t[:, :, numpy.newaxis],
+                x=x[:, numpy.newaxis, :],
+            )
+            is_t_in_range = t <= max_t[index, numpy.newaxis]
+            prob_at_most_x_array += (prob_array * is_t_in_range[:, :, numpy.newaxis, numpy.newaxis]).sum(axis=1)
+
+        # Conditions on the truncated range of the stopping trial, as otherwise the missing
+        # mass adds up over `x` in the second moment.
+        prob_at_most_x_array /= prob_at_most_x_array.sum(axis=-1, keepdims=True)
+
+        # Pr{j-th smallest <= x} = Pr{L_x >= j} for j = 1, ..., n.
+        cdf_array = numpy.cumsum(prob_at_most_x_array[..., ::-1], axis=-1)[..., ::-1][..., 1:]
+        tail_array = numpy.clip(1 - cdf_array, 0, 1) * is_x_in_range[..., numpy.newaxis]
+
+        # The second moment is taken around the mean to avoid the cancellation in `E[X^2] - E^2`.
+        E = min_x[index, numpy.newaxis] + tail_array.sum(axis=1)
+        var = (min_x[index, numpy.newaxis] - E) ** 2 + (
+            (2 * (x[..., numpy.newaxis] - E[:, numpy.newaxis, :]) + 1) * tail_array
+        ).sum(axis=1)
+        E_array[index] = E
+        stdev_array[index] = numpy.sqrt(numpy.maximum(var, 0))
+
+        first = last
+
+    return E_array, stdev_array
+
+
+def get_E_and_stdev_sorted_num_trials_over_channels(
+    n: int,
+    m: int,
+    k,
+    p,
+    tolerance: float = 1e-9,
+    max_chunk_size: int = 2**22,
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Returns the exact mean and stdev of the sorted number of successes over the channels,
+    as estimated by `sim_sorted_num_trials_over_channels_until_m_channels_reach_k_successes()`.
+    Accepts arrays of `k` and `p`, and returns arrays of shape `broadcast(k, p).shape + (n,)`.
+    The range of trials and successes is truncated where the probs are below `tolerance`.
+    """
+
+    k, p = numpy.broadcast_arrays(numpy.asarray(k, dtype=int), numpy.asarray(p, dtype=float))
+    E_array, stdev_array = _get_E_and_stdev_sorted_num_trials_over_channels(
+        n=n, m=m, k=k.ravel(), p=p.ravel(), tolerance=tolerance, max_chunk_size=max_chunk_size,
+    )
+
+    return E_array.reshape(k.shape + (n,)), stdev_array.reshape(k.shape + (n,))
 
 
 def plot_sorted_num_trials_over_channels(
@@ -72,24 +471,27 @@ def plot_sorted_num_trials_over_channels(
     k: int,
     p: float,
     num_samples: int,
+    w_exact: bool = False,
 ):
-    log(INFO, "Started", n=n, m=m, k=k, p=p, num_samples=num_samples)
+    log(INFO, "Started", n=n, m=m, k=k, p=p, num_samples=num_samples, w_exact=w_exact)
 
-    sorted_num_trials_over_channels = sim_sorted_num_trials_over_channels_until_m_channels_reach_k_successes(
+    accumulator = sim_sorted_num_trials_over_channels_w_joblib(
         n=n, m=m, k=k, p=p, num_samples=num_samples
     )
-    E_num_trials_list = [
-        numpy.mean(ls) for ls in sorted_num_trials_over_channels
-    ]
-    stdev_num_trials_list = [
-        numpy.std(ls) for ls in sorted_num_trials_over_channels
-    ]
+    E_num_trials_list = accumulator.mean_array
+    stdev_num_trials_list = accumulator.stdev_array
 
     # Plot
     fontsize = 14
 
     x_list = list(range(1, n + 1))
-    plot.errorbar(x_list, E_num_trials_list, yerr=stdev_num_trials_list, color=NICE_BLUE, marker="o")
+    plot.errorbar(x_list, E_num_trials_list, yerr=stdev_num_trials_list, color=NICE_BLUE, marker="o", label="Sim")
+
+    if w_exact:
+        E_num_trials_array, stdev_num_trials_array = get_E_and_stdev_sorted_num_trials_over_channels(n=n, m=m, k=k, p=p)
+        plot.errorbar(x_list, E_num_trials_array, yerr=stdev_num_trials_array, color=NICE_ORANGE, label="Exact")
+
+    plot.legend(loc="best", framealpha=0.5, fontsize=fontsize)
     plot.xlabel("Order index", fontsize=fontsize)
     plot.ylabel("Number of successes", fontsize=fontsize)
 
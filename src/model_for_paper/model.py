@@ -1,11 +1,13 @@
 import dataclasses
 import enum
 import math
+import numpy
+import scipy.stats
 
 from typing import Optional
 
 from src.debug_utils import check, log, DEBUG, INFO
-from src.prob import random_variable
+from src.prob import prob_kernel, random_variable
 
 
 class SamplingDist(enum.Enum):
@@ -13,10 +15,15 @@ class SamplingDist(enum.Enum):
     GAUSSIAN = "gaussian"
 
 
+# Default for the calls that do not pass `sampling_dist`.
 # SAMPLING_DIST = SamplingDist.BINOMIAL
 SAMPLING_DIST = SamplingDist.GAUSSIAN
 
 
+def get_sampling_dist(sampling_dist: Optional[SamplingDist]) -> SamplingDist:
+    return SAMPLING_DIST if sampling_dist is None else sampling_dist
+
+
 @dataclasses.dataclass
 class CandidateServer:
     non_target_arrival_rate: float
@@ -24,9 +31,8 @@ class CandidateServer:
     num_target_packets: int
 
     def __post_init__(self):
-        self.num_non_target_arrivals_rv = random_variable.Poisson(
-            mu=self.attack_window_length * self.non_target_arrival_rate
-        )
+        # Mean of the Poisson number of non-target arrivals in an attack window.
+        self.mean_num_non_target_arrivals = self.attack_window_length * self.non_target_arrival_rate
         self.prob_active_in_attack_win = self.get_prob_active_in_attack_win()
         self.prob_active_in_baseline_win = self.get_prob_active_in_baseline_win()
 
@@ -40,7 +46,7 @@ class CandidateServer:
         self,
         num_packets_to_deem_active: float,
     ) -> float:
-        return self.num_non_target_arrivals_rv.tail_prob(num_packets_to_deem_active - 1)
+        return prob_kernel.poisson_sf(num_packets_to_deem_active - 1, self.mean_num_non_target_arrivals)
 
     def _gaussian_sampling_dist(
         self,
@@ -59,35 +65,40 @@ class CandidateServer:
         self,
         num_attack_rounds: int,
         threshold_to_identify_as_target: float,
+        sampling_dist: Optional[SamplingDist] = None,
     ) -> float:
-        if SAMPLING_DIST == SamplingDist.BINOMIAL:
+        sampling_dist = get_sampling_dist(sampling_dist)
+        if sampling_dist == SamplingDist.BINOMIAL:
             return self._prob_error_w_binomial_sampling_dist(
                 num_attack_rounds=num_attack_rounds,
                 threshold_to_identify_as_target=threshold_to_identify_as_target,
             )
 
-        elif SAMPLING_DIST == SamplingDist.GAUSSIAN:
+        elif sampling_dist == SamplingDist.GAUSSIAN:
             return self._prob_error_w_gaussian_sampling_dist(
                 num_attack_rounds=num_attack_rounds,
                 threshold_to_identify_as_target=threshold_to_identify_as_target,
             )
 
-    def _gaussian_sampling_rv_for_detection_w_baseline(
-        self,
-        num_attack_rounds: int,
-    ) -> random_variable.RandomVariable:
+    def _gaussian_mu_and_stdev_per_round_for_detection_w_baseline(self) -> tuple[float, float]:
+        """Stdev of the difference of the estimates after `n` rounds is `stdev / sqrt(n)`."""
+
         mu = self.prob_active_in_attack_win - self.prob_active_in_baseline_win
         check(mu >= 0, "")
 
-        var_attack_win = (
-            self.prob_active_in_attack_win * (1 - self.prob_active_in_attack_win)
-            / num_attack_rounds
-        )
+        var_attack_win = self.prob_active_in_attack_win * (1 - self.prob_active_in_attack_win)
         var_baseline_win = (
             self.prob_active_in_baseline_win * (1 - self.prob_active_in_baseline_win)
-            / num_attack_rounds / self.num_baseline_wins_per_attack_win
+            / self.num_baseline_wins_per_attack_win
         )
-        sigma = math.sqrt(var_attack_win + var_baseline_win)
+        return mu, math.sqrt(var_attack_win + var_baseline_win)
+
+    def _gaussian_sampling_rv_for_detection_w_baseline(
+        self,
+        num_attack_rounds: int,
+    ) -> random_variable.RandomVariable:
+        mu, stdev = self._gaussian_mu_and_stdev_per_round_for_detection_w_baseline()
+        sigma = stdev / math.sqrt(num_attack_rounds)
 
         return random_variable.Normal(
             mu=mu,
@@ -101,7 +112,13 @@ class NonTargetServer(CandidateServer):
         """A candidate server is identified as "active" during an attack window,
         only if it receives at least `num_target_packets` many packets.
         """
-        return self.num_non_target_arrivals_rv.tail_prob(self.num_target_packets - 1)
+        return prob_kernel.poisson_sf(self.num_target_packets - 1, self.mean_num_non_target_arrivals)
+
+    def get_gaussian_gap_and_stdev(self, threshold_to_identify_as_target: float) -> tuple[float, float]:
+        """Prob of error after `n` rounds is `Phi(-gap * sqrt(n) / stdev)`."""
+
+        p = self.prob_active_in_attack_win
+        return threshold_to_identify_as_target - p, math.sqrt(p * (1 - p))
 
     def _prob_error_w_gaussian_sampling_dist(
         self,
@@ -118,11 +135,11 @@ class NonTargetServer(CandidateServer):
         num_attack_rounds: int,
         threshold_to_identify_as_target: float,
     ) -> float:
-        rv = random_variable.Binomial(
-            n=num_attack_rounds,
-            p=self.prob_active_in_attack_win,
+        return prob_kernel.binom_sf(
+            num_attack_rounds * threshold_to_identify_as_target,
+            num_attack_rounds,
+            self.prob_active_in_attack_win,
         )
-        return rv.tail_prob(num_attack_rounds * threshold_to_identify_as_target)
 
 
 @dataclasses.dataclass
@@ -131,49 +148,41 @@ class TargetServer(CandidateServer):
 
     def get_prob_active_in_attack_win_w_num_packets_to_deem_active(
         self,
-        num_packets_to_deem_active: int,
-    ) -> float:
+        num_packets_to_deem_active,
+    ):
         """A candidate server is deemed "active" during an attack window,
         only if it receives at least `num_packets_to_deem_active` many packets.
+        Accepts an array of `num_packets_to_deem_active`, for which an array is returned.
+
+        Pr{active} = sum_k Pr{k target arrivals} * Pr{non-target arrivals >= num_packets_to_deem_active - k},
+        which is computed as the product of the pmf array over `k` with the matrix
+        of the shifted Poisson survival probs.
         """
+
+        num_packets_to_deem_active = numpy.asarray(num_packets_to_deem_active)
         if self.num_target_servers == 1:
-            return 1
+            prob_active_in_attack_win = numpy.ones(num_packets_to_deem_active.shape)
 
         else:
-            num_target_arrivals_rv = random_variable.Binomial(
-                n=self.num_target_packets,
-                p=1 / self.num_target_servers,
+            num_target_arrivals_array = numpy.arange(self.num_target_packets + 1)
+            prob_num_target_arrivals_array = scipy.stats.binom.pmf(
+                num_target_arrivals_array,
+                self.num_target_packets,
+                1 / self.num_target_servers,
             )
-
-            prob_active_in_attack_win = 0
-            for num_target_arrivals in range(self.num_target_packets + 1):
-                prob_num_target_arrivals = num_target_arrivals_rv.pdf(num_target_arrivals)
-                min_non_target_arrivals_for_active = max(0, num_packets_to_deem_active - num_target_arrivals)
-
-                prob_active_in_attack_win += (
-                    prob_num_target_arrivals
-                    * (
-                        self.num_non_target_arrivals_rv.tail_prob(
-                            min_non_target_arrivals_for_active - 1
-                        ) if min_non_target_arrivals_for_active > 0 else 1
-                    )
+            # Note: `sf(x) = Pr{X > x}` is 1 for `x < 0`.
+            prob_enough_non_target_arrivals_array = numpy.exp(
+                prob_kernel.poisson_logsf_array(
+                    num_packets_to_deem_active[..., numpy.newaxis] - num_target_arrivals_array - 1,
+                    self.mean_num_non_target_arrivals,
                 )
-                # log(
-                #     INFO, "",
-                #     prob_num_target_arrivals=prob_num_target_arrivals,
-                #     num_non_target_arrivals_rv_tail_prob=self.num_non_target_arrivals_rv.tail_prob(
-                #         min_non_target_arrivals_for_active - 1
-                #     ),
-                # )
-
-            # log(
-            #     INFO, "***",
-            #     prob_active_in_attack_win=prob_active_in_attack_win,
-            #     prob_active_in_baseline_win=self.num_non_target_arrivals_rv.tail_prob(
-            #         num_packets_to_deem_active - 1
-            #     ),
-            # )
-            return prob_active_in_attack_win
+            )
+            prob_active_in_attack_win = prob_enough_non_target_arrivals_array @ prob_num_target_arrivals_array
+
+        if prob_active_in_attack_win.ndim == 0:
+            return float(prob_active_in_attack_win)
+
+        return prob_active_in_attack_win
 
     def _get_prob_active_in_attack_win(self) -> float:
         """A candidate server is deemed "active" during an attack window,
@@ -184,32 +193,35 @@ class TargetServer(CandidateServer):
             return 1
 
         else:
-            num_target_arrivals_rv = random_variable.Binomial(
-                n=self.num_target_packets,
-                p=1 / self.num_target_servers,
+            prob_at_least_one_target_arrival = prob_kernel.binom_sf(
+                0, self.num_target_packets, 1 / self.num_target_servers
             )
-
-            prob_at_least_one_target_arrival = num_target_arrivals_rv.tail_prob(0)
-            prob_at_least_one_non_target_arrival = self.num_non_target_arrivals_rv.tail_prob(0)
+            prob_at_least_one_non_target_arrival = prob_kernel.poisson_sf(0, self.mean_num_non_target_arrivals)
             return (
                 prob_at_least_one_target_arrival
                 + (1 - prob_at_least_one_target_arrival) * prob_at_least_one_non_target_arrival
             )
 
+    def get_gaussian_gap_and_stdev(self, threshold_to_identify_as_target: float) -> tuple[float, float]:
+        """Prob of error after `n` rounds is `Phi(-gap * sqrt(n) / stdev)`."""
+
+        p = self.prob_active_in_attack_win
+        return p - threshold_to_identify_as_target, math.sqrt(p * (1 - p))
+
     def _prob_error_w_binomial_sampling_dist(
         self,
         num_attack_rounds: int,
         threshold_to_identify_as_target: float,
     ) -> float:
-        rv = random_variable.Binomial(
-            n=num_attack_rounds,
-            p=self.prob_active_in_attack_win,
-        )
         # log(
         #     INFO, "",
         #     num_attack_rounds_X_threshold_to_identify_as_target=num_attack_rounds * threshold_to_identify_as_target,
         # )
-        return rv.cdf(num_attack_rounds * threshold_to_identify_as_target)
+        return prob_kernel.binom_cdf(
+            num_attack_rounds * threshold_to_identify_as_target,
+            num_attack_rounds,
+            self.prob_active_in_attack_win,
+        )
 
     def _prob_error_w_gaussian_sampling_dist(
         self,
@@ -250,12 +262,19 @@ class NonTargetServer_wBaseline(NonTargetServer, Server_wBaseline):
         self,
         num_attack_rounds: int,
         threshold_to_identify_as_target: float,
+        sampling_dist: Optional[SamplingDist] = None,
     ) -> float:
+        """Detection with baseline is only modeled with the Gaussian sampling dist."""
+
         sampling_rv = self._gaussian_sampling_rv_for_detection_w_baseline(
             num_attack_rounds=num_attack_rounds,
         )
         return sampling_rv.tail_prob(threshold_to_identify_as_target)
 
+    def get_gaussian_gap_and_stdev(self, threshold_to_identify_as_target: float) -> tuple[float, float]:
+        mu, stdev = self._gaussian_mu_and_stdev_per_round_for_detection_w_baseline()
+        return threshold_to_identify_as_target - mu, stdev
+
     def get_prob_active_in_attack_win(self) -> float:
         return self.get_prob_active_in_baseline_win()
 
@@ -266,12 +285,19 @@ class TargetServer_wBaseline(TargetServer, Server_wBaseline):
         self,
         num_attack_rounds: int,
         threshold_to_identify_as_target: float,
+        sampling_dist: Optional[SamplingDist] = None,
     ) -> float:
+        """Detection with baseline is only modeled with the Gaussian sampling dist."""
+
         sampling_rv = self._gaussian_sampling_rv_for_detection_w_baseline(
             num_attack_rounds=num_attack_rounds,
         )
         return sampling_rv.cdf(threshold_to_identify_as_target)
 
+    def get_gaussian_gap_and_stdev(self, threshold_to_identify_as_target: float) -> tuple[float, float]:
+        mu, stdev = self._gaussian_mu_and_stdev_per_round_for_detection_w_baseline()
+        return mu - threshold_to_identify_as_target, stdev
+
 
 @dataclasses.dataclass
 class ExpSetup:
@@ -300,59 +326,46 @@ class ExpSetup:
     def prob_target_as_non_target(
         self,
         num_attack_rounds: int,
+        sampling_dist: Optional[SamplingDist] = None,
     ) -> float:
         return self.target_server.prob_error(
             num_attack_rounds=num_attack_rounds,
             threshold_to_identify_as_target=self.target_detection_threshold,
+            sampling_dist=sampling_dist,
         )
 
     def prob_non_target_as_target(
         self,
         num_attack_rounds: int,
+        sampling_dist: Optional[SamplingDist] = None,
     ) -> float:
         return self.non_target_server.prob_error(
             num_attack_rounds=num_attack_rounds,
             threshold_to_identify_as_target=self.target_detection_threshold,
+            sampling_dist=sampling_dist,
         )
 
+    def w_binomial_sampling_dist(self, sampling_dist: Optional[SamplingDist] = None) -> bool:
+        return get_sampling_dist(sampling_dist) == SamplingDist.BINOMIAL
+
     def get_min_num_attack_rounds(
         self,
         max_prob_error: float,
+        sampling_dist: Optional[SamplingDist] = None,
     ) -> int:
-        num_attack_rounds = 1
-        while True:
-            prob_target_as_non_target = self.prob_target_as_non_target(num_attack_rounds=num_attack_rounds)
-            prob_non_target_as_target = self.prob_non_target_as_target(num_attack_rounds=num_attack_rounds)
-            # log(
-            #     INFO, "",
-            #     prob_target_as_non_target=prob_target_as_non_target,
-            #     prob_non_target_as_target=prob_non_target_as_target,
-            # )
-            if (
-                prob_target_as_non_target > max_prob_error
-                or prob_non_target_as_target > max_prob_error
-            ):
-                num_attack_rounds *= 2
-
-            else:
-                break
-
-        left, right = 1, num_attack_rounds
-        while left < right:
-            mid = (left + right) // 2
-
-            prob_target_as_non_target = self.prob_target_as_non_target(num_attack_rounds=mid)
-            prob_non_target_as_target = self.prob_non_target_as_target(num_attack_rounds=mid)
-            if (
-                prob_target_as_non_target > max_prob_error
-                or prob_non_target_as_target > max_prob_error
-            ):
-                left = mid + 1
-
-            else:
-                right = mid
-
-        return left
+        """Raises `OverflowError` if the prob of error does not go below
+        `max_prob_error` for any number of rounds.
+        """
+
+        num_attack_rounds = get_min_num_attack_rounds_array(
+            exp_setup_list=[self],
+            max_prob_error=max_prob_error,
+            sampling_dist=sampling_dist,
+        )[0]
+        if math.isinf(num_attack_rounds):
+            raise OverflowError(f"No number of attack rounds achieves max_prob_error= {max_prob_error}")
+
+        return int(num_attack_rounds)
 
 
 @dataclasses.dataclass
@@ -413,3 +426,421 @@ class ExpSetup_wBaseline(ExpSetup):
                 - self.target_server.prob_active_in_baseline_win
             ) * self.alpha
         )
+
+    def w_binomial_sampling_dist(self, sampling_dist: Optional[SamplingDist] = None) -> bool:
+        return False
+
+    def get_optimal_num_packets_to_deem_active_and_alpha(
+        self,
+        max_prob_error: float,
+        max_num_packets_to_deem_active: int = None,
+        num_alphas_to_bracket: int = 32,
+        alpha_tolerance: float = 1e-4,
+    ) -> tuple[int, float, float]:
+        """Returns `(num_packets_to_deem_active, alpha, num_attack_rounds)` that
+        minimizes the min number of attack rounds over `num_packets_to_deem_active`
+        in `[1, max_num_packets_to_deem_active]` and `alpha` in `(0, 1)`, regardless
+        of `self.num_packets_to_deem_active` and `self.alpha`. `num_attack_rounds`
+        is `inf` if no pair achieves `max_prob_error`.
+
+        All thresholds are searched at once. For each threshold, `alpha` is
+        bracketed by a scan over `num_alphas_to_bracket` values and then narrowed
+        down by golden-section search. Increasing `alpha` trades the errors on
+        the non-target servers for the errors on the target server, so the number
+        of rounds is unimodal in `alpha`. The errors at the number of rounds break
+        the ties between the `alpha`s that need the same number of rounds.
+        """
+
+        if max_num_packets_to_deem_active is None:
+            max_num_packets_to_deem_active = self.num_target_packets
+        check(max_num_packets_to_deem_active >= 1, "", max_num_packets_to_deem_active=max_num_packets_to_deem_active)
+
+        num_packets_to_deem_active_array = numpy.arange(1, max_num_packets_to_deem_active + 1)
+
+        def get_objective_and_num_attack_rounds(alpha: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+            """`alpha` is of shape `(num_thresholds, num_alphas)`."""
+
+            attack_perf_grid = get_attack_perf_grid_w_baseline(
+                non_target_arrival_rate=self.non_target_arrival_rate,
+                attack_window_length=self.attack_window_length,
+                num_target_packets=self.num_target_packets,
+                num_target_servers=self.num_target_servers,
+                alpha=alpha,
+                max_prob_error=max_prob_error,
+                num_packets_to_deem_active=num_packets_to_deem_active_array[:, numpy.newaxis],
+                num_baseline_wins_per_attack_win=self.num_baseline_wins_per_attack_win,
+            )
+            num_attack_rounds = attack_perf_grid.num_attack_rounds
+            max_prob_error_at_num_attack_rounds = numpy.maximum(
+                attack_perf_grid.prob_target_as_non_target,
+                attack_perf_grid.prob_non_target_as_target,
+            )
+            objective = numpy.where(
+                numpy.isinf(num_attack_rounds),
+                numpy.inf,
+                num_attack_rounds + max_prob_error_at_num_attack_rounds / max_prob_error,
+            )
+            return objective, num_attack_rounds
+
+        # Bracket
+        alpha_grid = numpy.linspace(0, 1, num_alphas_to_bracket + 2)
+        objective, _ = get_objective_and_num_attack_rounds(alpha_grid[numpy.newaxis, 1:-1])
+        index_array = objective.argmin(axis=1) + 1
+        lower_alpha = alpha_grid[index_array - 1]
+        upper_alpha = alpha_grid[index_array + 1]
+
+        # Golden-section search
+        inv_golden_ratio = (math.sqrt(5) - 1) / 2
+        while (upper_alpha - lower_alpha).max() > alpha_tolerance:
+            step = inv_golden_ratio * (upper_alpha - lower_alpha)
+            alpha = numpy.stack([upper_alpha - step, lower_alpha + step], axis=1)
+            objective, _ = get_objective_and_num_attack_rounds(alpha)
+
+            w_lower_alpha = objective[:, 0] <= objective[:, 1]
+            upper_alpha = numpy.where(w_lower_alpha, alpha[:, 1], upper_alpha)
+            lower_alpha = numpy.where(w_lower_alpha, lower_alpha, alpha[:, 0])
+
+        # The bracketing scan is evaluated again so that the search never returns
+        # a worse `alpha` than the scan.
+        alpha = numpy.concatenate(
+            [
+                ((lower_alpha + upper_alpha) / 2)[:, numpy.newaxis],
+                numpy.broadcast_to(alpha_grid[1:-1], (num_packets_to_deem_active_array.size, num_alphas_to_bracket)),
+            ],
+            axis=1,
+        )
+        objective, num_attack_rounds = get_objective_and_num_attack_rounds(alpha)
+        i, j = numpy.unravel_index(objective.argmin(), objective.shape)
+
+        log(
+            DEBUG, "",
+            num_packets_to_deem_active=num_packets_to_deem_active_array[i],
+            alpha=alpha[i, j],
+            num_attack_rounds=num_attack_rounds[i, j],
+        )
+        return int(num_packets_to_deem_active_array[i]), float(alpha[i, j]), float(num_attack_rounds[i, j])
+
+
+def get_min_num_attack_rounds_w_gaussian_sampling_dist(
+    gap: numpy.ndarray,
+    stdev: numpy.ndarray,
+    max_prob_error: float,
+) -> numpy.ndarray:
+    """Returns the min `n` such that `Phi(-gap * sqrt(n) / stdev) <= max_prob_error`,
+    and `inf` if there is no such `n`. For `gap > 0`, the prob of error decreases
+    in `n`, hence `n = ceil((z * stdev / gap)^2)` with `z = Phi^{-1}(1 - max_prob_error)`.
+    Otherwise, it does not decrease in `n`, so only `n = 1` needs to be checked.
+    For `stdev = 0`, the estimate is exact, so `n = 1` works iff `gap > 0`.
+    """
+
+    gap, stdev = numpy.broadcast_arrays(
+        numpy.asarray(gap, dtype=float),
+        numpy.asarray(stdev, dtype=float),
+    )
+    num_attack_rounds = numpy.full(gap.shape, numpy.inf)
+
+    def prob_error(n: numpy.ndarray, index: numpy.ndarray) -> numpy.ndarray:
+        return scipy.stats.norm.cdf(-gap[index] * numpy.sqrt(n) / stdev[index])
+
+    num_attack_rounds[(stdev == 0) & (gap > 0)] = 1
+
+    index = (stdev > 0) & (gap <= 0)
+    num_attack_rounds[index & (scipy.stats.norm.cdf(-gap / numpy.where(stdev > 0, stdev, 1)) <= max_prob_error)] = 1
+
+    index = (stdev > 0) & (gap > 0)
+    z = max(scipy.stats.norm.isf(max_prob_error), 0)
+    n = numpy.maximum(numpy.ceil((z * stdev[index] / gap[index]) ** 2), 1)
+    # Correct for the rounding errors around the boundary.
+    n = numpy.where(prob_error(n, index) > max_prob_error, n + 1, n)
+    n = numpy.where((n > 1) & (prob_error(n - 1, index) <= max_prob_error), n - 1, n)
+    num_attack_rounds[index] = n
+
+    return num_attack_rounds
+
+
+def get_min_num_attack_rounds_w_binomial_sampling_dist(
+    prob_target_active: numpy.ndarray,
+    prob_non_target_active: numpy.ndarray,
+    threshold_to_identify_as_target: numpy.ndarray,
+    max_prob_error: float,
+    max_num_attack_rounds: int = 2**20,
+    max_chunk_size: int = 2**20,
+) -> numpy.ndarray:
+    """Returns the min `n` for which both errors of `_prob_error_w_binomial_sampling_dist()`
+    are at most `max_prob_error`, and `inf` if there is no such `n <= max_num_attack_rounds`.
+    The errors are not monotone in `n` due to the rounding of `n * threshold`, so the
+    candidates are scanned in chunks of increasing size rather than bisected. The infeasible
+    points are scanned up to `max_num_attack_rounds`, so it is to be raised only as needed.
+    The points are scanned in blocks such that the arrays over the points and the
+    candidates have at most `max_chunk_size` entries.
+
+    The errors are compared in log space. A tail is at least its boundary term, so the
+    candidates whose boundary terms exceed `max_prob_error` are dropped with the cheap
+    log pmf before the tails are computed for the rest.
+    """
+
+    log_max_prob_error = math.log(max_prob_error)
+
+    prob_target_active, prob_non_target_active, threshold_to_identify_as_target = numpy.broadcast_arrays(
+        numpy.asarray(prob_target_active, dtype=float),
+        numpy.asarray(prob_non_target_active, dtype=float),
+        numpy.asarray(threshold_to_identify_as_target, dtype=float),
+    )
+    num_attack_rounds = numpy.full(prob_target_active.shape, numpy.inf)
+
+    index_array = numpy.arange(prob_target_active.size)
+    first_n, last_n = 1, 64
+    while index_array.size and first_n <= max_num_attack_rounds:
+        n_array = numpy.arange(first_n, min(last_n, max_num_attack_rounds) + 1)
+        num_points_per_block = max(max_chunk_size // n_array.size, 1)
+
+        is_found_list = []
+        for start in range(0, index_array.size, num_points_per_block):
+            index_array_for_block = index_array[start : start + num_points_per_block]
+            n, num_rounds_as_target, p_target, p_non_target = numpy.broadcast_arrays(
+                n_array[numpy.newaxis, :],
+                numpy.floor(
+                    n_array[numpy.newaxis, :]
+                    * threshold_to_identify_as_target.flat[index_array_for_block][:, numpy.newaxis]
+                ),
+                prob_target_active.flat[index_array_for_block][:, numpy.newaxis],
+                prob_non_target_active.flat[index_array_for_block][:, numpy.newaxis],
+            )
+
+            is_feasible = (
+                (prob_kernel.binom_logpmf_array(num_rounds_as_target, n, p_target) <= log_max_prob_error)
+                & (prob_kernel.binom_logpmf_array(num_rounds_as_target + 1, n, p_non_target) <= log_max_prob_error)
+            )
+            is_feasible[is_feasible] = (
+                (
+                    prob_kernel.binom_logcdf_array(
+                        num_rounds_as_target[is_feasible], n[is_feasible], p_target[is_feasible]
+                    ) <= log_max_prob_error
+                )
+                & (
+                    prob_kernel.binom_logsf_array(
+                        num_rounds_as_target[is_feasible], n[is_feasible], p_non_target[is_feasible]
+                    ) <= log_max_prob_error
+                )
+            )
+
+            is_found = is_feasible.any(axis=1)
+            num_attack_rounds.flat[index_array_for_block[is_found]] = n_array[is_feasible[is_found].argmax(axis=1)]
+            is_found_list.append(is_found)
+
+        index_array = index_array[~numpy.concatenate(is_found_list)]
+
+        first_n, last_n = last_n + 1, last_n + min(2 * last_n, 2**16)
+
+    return num_attack_rounds
+
+
+def get_min_num_attack_rounds_array(
+    exp_setup_list: list[ExpSetup],
+    max_prob_error: float,
+    sampling_dist: Optional[SamplingDist] = None,
+) -> numpy.ndarray:
+    """Returns the min number of attack rounds for each setup, with `inf` for
+    the setups in which the prob of error cannot go below `max_prob_error`.
+    """
+
+    num_attack_rounds_array = numpy.full(len(exp_setup_list), numpy.inf)
+
+    binomial_index_list = [i for i, exp_setup in enumerate(exp_setup_list) if exp_setup.w_binomial_sampling_dist(sampling_dist)]
+    if binomial_index_list:
+        num_attack_rounds_array[binomial_index_list] = get_min_num_attack_rounds_w_binomial_sampling_dist(
+            prob_target_active=[exp_setup_list[i].target_server.prob_active_in_attack_win for i in binomial_index_list],
+            prob_non_target_active=[exp_setup_list[i].non_target_server.prob_active_in_attack_win for i in binomial_index_list],
+            threshold_to_identify_as_target=[exp_setup_list[i].target_detection_threshold for i in binomial_index_list],
+            max_prob_error=max_prob_error,
+        )
+
+    gaussian_index_list = [i for i, exp_setup in enumerate(exp_setup_list) if not exp_setup.w_binomial_sampling_dist(sampling_dist)]
+    if gaussian_index_list:
+        target_gap_and_stdev_array = numpy.array(
+            [
+                exp_setup_list[i].target_server.get_gaussian_gap_and_stdev(exp_setup_list[i].target_detection_threshold)
+                for i in gaussian_index_list
+            ]
+        )
+        non_target_gap_and_stdev_array = numpy.array(
+            [
+                exp_setup_list[i].non_target_server.get_gaussian_gap_and_stdev(exp_setup_list[i].target_detection_threshold)
+                for i in gaussian_index_list
+            ]
+        )
+        num_attack_rounds_array[gaussian_index_list] = numpy.maximum(
+            get_min_num_attack_rounds_w_gaussian_sampling_dist(
+                gap=target_gap_and_stdev_array[:, 0],
+                stdev=target_gap_and_stdev_array[:, 1],
+                max_prob_error=max_prob_error,
+            ),
+            get_min_num_attack_rounds_w_gaussian_sampling_dist(
+                gap=non_target_gap_and_stdev_array[:, 0],
+                stdev=non_target_gap_and_stdev_array[:, 1],
+                max_prob_error=max_prob_error,
+            ),
+        )
+
+    return num_attack_rounds_array
+
+
+@dataclasses.dataclass
+class AttackPerfGrid:
+    """Arrays in the broadcast shape of the parameters of `get_attack_perf_grid_w_baseline()`.
+    Errors are given at `num_attack_rounds`, and are `nan` where it is `inf`.
+    """
+
+    prob_target_active_in_attack_win: numpy.ndarray
+    prob_target_active_in_baseline_win: numpy.ndarray
+    prob_non_target_active_in_attack_win: numpy.ndarray
+    target_detection_threshold: numpy.ndarray
+    num_attack_rounds: numpy.ndarray
+    prob_target_as_non_target: numpy.ndarray
+    prob_non_target_as_target: numpy.ndarray
+
+
+def _get_prob_target_active_w_num_packets_to_deem_active_array(
+    mean_num_non_target_arrivals: numpy.ndarray,
+    num_target_packets: numpy.ndarray,
+    num_target_servers: numpy.ndarray,
+    num_packets_to_deem_active: numpy.ndarray,
+) -> numpy.ndarray:
+    """Vectorized `TargetServer.get_prob_active_in_attack_win_w_num_packets_to_deem_active()`
+    over all of its parameters, for 1-D arrays of the same length.
+    """
+
+    num_target_arrivals_array = numpy.arange(num_target_packets.max() + 1)
+    # Note: `pmf(k)` is 0 for `k > num_target_packets`.
+    prob_num_target_arrivals_array = scipy.stats.binom.pmf(
+        num_target_arrivals_array,
+        num_target_packets[:, numpy.newaxis],
+        1 / num_target_servers[:, numpy.newaxis],
+    )
+    prob_enough_non_target_arrivals_array = numpy.exp(
+        prob_kernel.poisson_logsf_array(
+            num_packets_to_deem_active[:, numpy.newaxis] - num_target_arrivals_array - 1,
+            mean_num_non_target_arrivals[:, numpy.newaxis],
+        )
+    )
+    prob_active = (prob_num_target_arrivals_array * prob_enough_non_target_arrivals_array).sum(axis=1)
+
+    return numpy.where(num_target_servers == 1, 1, prob_active)
+
+
+def _get_gaussian_prob_error_array(
+    gap: numpy.ndarray,
+    stdev: numpy.ndarray,
+    num_attack_rounds: numpy.ndarray,
+) -> numpy.ndarray:
+    # Same as `_gaussian_sampling_rv_for_detection_w_baseline()`, including the
+    # small sigma in place of 0.
+    with numpy.errstate(invalid="ignore"):
+        sigma = stdev / numpy.sqrt(num_attack_rounds)
+        prob_error = scipy.stats.norm.cdf(-gap / numpy.where(sigma > 0, sigma, 0.000001))
+
+    return numpy.where(numpy.isinf(num_attack_rounds), numpy.nan, prob_error)
+
+
+def get_attack_perf_grid_w_baseline(
+    non_target_arrival_rate: numpy.ndarray,
+    attack_window_length: numpy.ndarray,
+    num_target_packets: numpy.ndarray,
+    num_target_servers: numpy.ndarray,
+    alpha: numpy.ndarray,
+    max_prob_error: float,
+    num_packets_to_deem_active: numpy.ndarray = 1,
+    num_baseline_wins_per_attack_win: numpy.ndarray = 1,
+    num_attack_rounds: numpy.ndarray = None,
+    max_chunk_size: int = 2**20,
+) -> AttackPerfGrid:
+    """Evaluates `ExpSetup_wBaseline` over the broadcast of the given parameter
+    arrays without building a setup per point, e.g., pass `rate[:, None]` and
+    `alpha[None, :]` for a 2-D grid over the two. `num_packets_to_deem_active = 1`
+    is the same as `None` in `ExpSetup_wBaseline`. The errors are evaluated at
+    `num_attack_rounds`, which defaults to the min number of attack rounds.
+
+    The points are evaluated in chunks such that the intermediate arrays over the
+    number of target arrivals have at most `max_chunk_size` entries.
+    """
+
+    param_array_list = numpy.broadcast_arrays(
+        numpy.asarray(non_target_arrival_rate, dtype=float),
+        numpy.asarray(attack_window_length, dtype=float),
+        numpy.asarray(num_target_packets, dtype=int),
+        numpy.asarray(num_target_servers, dtype=int),
+        numpy.asarray(alpha, dtype=float),
+        numpy.asarray(num_packets_to_deem_active, dtype=int),
+        numpy.asarray(num_baseline_wins_per_attack_win, dtype=float),
+        numpy.asarray(numpy.inf if num_attack_rounds is None else num_attack_rounds, dtype=float),
+    )
+    shape = param_array_list[0].shape
+    check(numpy.all(param_array_list[5] >= 1), "`num_packets_to_deem_active` must be at least 1")
+
+    field_name_list = [field.name for field in dataclasses.fields(AttackPerfGrid)]
+    field_name_to_array_map = {field_name: numpy.empty(shape) for field_name in field_name_list}
+
+    size = math.prod(shape)
+    num_points_per_chunk = max(max_chunk_size // (int(param_array_list[2].max(initial=0)) + 1), 1)
+    for start in range(0, size, num_points_per_chunk):
+        (
+            non_target_arrival_rate_,
+            attack_window_length_,
+            num_target_packets_,
+            num_target_servers_,
+            alpha_,
+            num_packets_to_deem_active_,
+            num_baseline_wins_per_attack_win_,
+            num_attack_rounds_,
+        ) = [param_array.flat[start : start + num_points_per_chunk] for param_array in param_array_list]
+
+        mean_num_non_target_arrivals = attack_window_length_ * non_target_arrival_rate_
+        prob_target_active_in_attack_win = _get_prob_target_active_w_num_packets_to_deem_active_array(
+            mean_num_non_target_arrivals=mean_num_non_target_arrivals,
+            num_target_packets=num_target_packets_,
+            num_target_servers=num_target_servers_,
+            num_packets_to_deem_active=num_packets_to_deem_active_,
+        )
+        # The non-target server is active in the attack and baseline windows
+        # with the same prob.
+        prob_active_in_baseline_win = numpy.exp(
+            prob_kernel.poisson_logsf_array(num_packets_to_deem_active_ - 1, mean_num_non_target_arrivals)
+        )
+        target_detection_threshold = (prob_target_active_in_attack_win - prob_active_in_baseline_win) * alpha_
+
+        var_in_baseline_win = prob_active_in_baseline_win * (1 - prob_active_in_baseline_win)
+        target_gap = prob_target_active_in_attack_win - prob_active_in_baseline_win - target_detection_threshold
+        target_stdev = numpy.sqrt(
+            prob_target_active_in_attack_win * (1 - prob_target_active_in_attack_win)
+            + var_in_baseline_win / num_baseline_wins_per_attack_win_
+        )
+        non_target_gap = target_detection_threshold
+        non_target_stdev = numpy.sqrt(2 * var_in_baseline_win)
+
+        if num_attack_rounds is None:
+            num_attack_rounds_ = numpy.maximum(
+                get_min_num_attack_rounds_w_gaussian_sampling_dist(
+                    gap=target_gap, stdev=target_stdev, max_prob_error=max_prob_error,
+                ),
+                get_min_num_attack_rounds_w_gaussian_sampling_dist(
+                    gap=non_target_gap, stdev=non_target_stdev, max_prob_error=max_prob_error,
+                ),
+            )
+
+        chunk_field_name_to_array_map = {
+            "prob_target_active_in_attack_win": prob_target_active_in_attack_win,
+            "prob_target_active_in_baseline_win": prob_active_in_baseline_win,
+            "prob_non_target_active_in_attack_win": prob_active_in_baseline_win,
+            "target_detection_threshold": target_detection_threshold,
+            "num_attack_rounds": num_attack_rounds_,
+            "prob_target_as_non_target": _get_gaussian_prob_error_array(
+                gap=target_gap, stdev=target_stdev, num_attack_rounds=num_attack_rounds_,
+            ),
+            "prob_non_target_as_target": _get_gaussian_prob_error_array(
+                gap=non_target_gap, stdev=non_target_stdev, num_attack_rounds=num_attack_rounds_,
+            ),
+        }
+        for field_name, array in chunk_field_name_to_array_map.items():
+            field_name_to_array_map[field_name].flat[start : start + num_points_per_chunk] = array
+
+    return AttackPerfGrid(**field_name_to_array_map)
@@ -1,8 +1,6 @@
 import dataclasses
 import numpy
 
-from typing import Callable
-
 from src.debug_utils import log, DEBUG, ERROR, INFO
 from src.model_for_paper import model
 from src.plot_utils import NICE_BLUE, NICE_ORANGE, NICE_RED, plot
@@ -189,16 +187,30 @@ def _plot_attack_perf(
     plot.gcf().clear()
 
 
-def _get_attack_perf_to_plot(
+def _get_attack_perf_to_plot_from_grid(
     x_list: list,
-    attack_perf_point_for_given_x: Callable,
+    attack_perf_grid: model.AttackPerfGrid,
 ) -> AttackPerf:
+    """`attack_perf_grid` is evaluated over `x_list`."""
+
     attack_perf = AttackPerf()
+    for i, x in enumerate(x_list):
+        num_attack_rounds = attack_perf_grid.num_attack_rounds[i]
+        if numpy.isinf(num_attack_rounds):
+            log(ERROR, "No number of attack rounds achieves max_prob_error", x=x)
+            continue
 
-    for x in x_list:
-        attack_perf_point = attack_perf_point_for_given_x(x)
-        if attack_perf_point:
-            attack_perf.add(attack_perf_point)
+        perf_point = AttackPerfPoint(
+            x=x,
+            num_attack_rounds=int(num_attack_rounds),
+            prob_target_as_non_target=attack_perf_grid.prob_target_as_non_target[i],
+            prob_non_target_as_target=attack_perf_grid.prob_non_target_as_target[i],
+            prob_target_active_in_attack_win=attack_perf_grid.prob_target_active_in_attack_win[i],
+            prob_target_active_in_baseline_win=attack_perf_grid.prob_target_active_in_baseline_win[i],
+            prob_non_target_active_in_attack_win=attack_perf_grid.prob_non_target_active_in_attack_win[i],
+        )
+        log(DEBUG, "", x=x, perf_point=perf_point)
+        attack_perf.add(perf_point)
 
     return attack_perf
 
@@ -219,72 +231,22 @@ def plot_attack_perf_vs_non_target_arrival_rate(
         alpha=alpha,
     )
 
-    def attack_perf_point_for_given_x(
-        non_target_arrival_rate: float,
-    ) -> AttackPerfPoint:
-        # exp_setup = model.ExpSetup_wTargetVsNonTarget(
-        #     non_target_arrival_rate=non_target_arrival_rate,
-        #     attack_window_length=attack_window_length,
-        #     num_target_packets=num_target_packets,
-        #     num_target_servers=num_target_servers,
-        #     alpha=alpha,
-        # )
-        exp_setup = model.ExpSetup_wBaseline(
-            non_target_arrival_rate=non_target_arrival_rate,
+    x_list = numpy.linspace(
+        # start=0.1 / attack_window_length,
+        start=0,
+        stop=10 / attack_window_length,
+        num=50,
+    )
+    attack_perf = _get_attack_perf_to_plot_from_grid(
+        x_list=x_list,
+        attack_perf_grid=model.get_attack_perf_grid_w_baseline(
+            non_target_arrival_rate=x_list,
             attack_window_length=attack_window_length,
             num_target_packets=num_target_packets,
             num_target_servers=num_target_servers,
             alpha=alpha,
-            num_baseline_wins_per_attack_win=1,
-        )
-
-        try:
-            num_attack_rounds = exp_setup.get_min_num_attack_rounds(max_prob_error=max_prob_error)
-            log(
-                INFO, "",
-                num_attack_rounds=num_attack_rounds,
-                non_target_arrival_rate=non_target_arrival_rate,
-            )
-        except OverflowError:
-            log(
-                ERROR, "OverflowError",
-                non_target_arrival_rate=non_target_arrival_rate,
-            )
-            return None
-
-        perf_point = AttackPerfPoint(
-            x=non_target_arrival_rate,
-            num_attack_rounds=num_attack_rounds,
-            prob_target_as_non_target=exp_setup.prob_target_as_non_target(
-                num_attack_rounds=num_attack_rounds
-            ),
-            prob_non_target_as_target=exp_setup.prob_non_target_as_target(
-                num_attack_rounds=num_attack_rounds
-            ),
-            prob_target_active_in_attack_win=exp_setup.target_server.prob_active_in_attack_win,
-            prob_target_active_in_baseline_win=(
-                exp_setup.target_server.prob_active_in_baseline_win
-                if hasattr(exp_setup.target_server, "prob_active_in_baseline_win")
-                else None
-            ),
-            prob_non_target_active_in_attack_win=exp_setup.non_target_server.prob_active_in_attack_win,
-        )
-        log(
-            INFO, "",
-            non_target_arrival_rate=non_target_arrival_rate,
-            perf_point=perf_point,
-        )
-
-        return perf_point
-
-    attack_perf = _get_attack_perf_to_plot(
-        x_list=numpy.linspace(
-            # start=0.1 / attack_window_length,
-            start=0,
-            stop=10 / attack_window_length,
-            num=50,
+            max_prob_error=max_prob_error,
         ),
-        attack_perf_point_for_given_x=attack_perf_point_for_given_x,
     )
     # log(
     #     INFO, "",
@@ -323,56 +285,18 @@ def plot_attack_perf_vs_num_packets_to_deem_active(
     alpha: float,
     non_target_arrival_rate: float,
 ):
-    def attack_perf_point_for_given_x(
-        num_packets_to_deem_active: float,
-    ) -> AttackPerfPoint:
-        exp_setup = model.ExpSetup_wBaseline(
+    x_list = list(range(1, num_target_packets))
+    attack_perf = _get_attack_perf_to_plot_from_grid(
+        x_list=x_list,
+        attack_perf_grid=model.get_attack_perf_grid_w_baseline(
             non_target_arrival_rate=non_target_arrival_rate,
             attack_window_length=attack_window_length,
             num_target_packets=num_target_packets,
             num_target_servers=num_target_servers,
             alpha=alpha,
-            num_baseline_wins_per_attack_win=1,
-            num_packets_to_deem_active=num_packets_to_deem_active,
-        )
-
-        num_attack_rounds = exp_setup.get_min_num_attack_rounds(
-            max_prob_error=max_prob_error
-        )
-        log(
-            INFO, "",
-            num_attack_rounds=num_attack_rounds,
-            num_packets_to_deem_active=num_packets_to_deem_active,
-        )
-
-        perf_point = AttackPerfPoint(
-            x=num_packets_to_deem_active,
-            num_attack_rounds=num_attack_rounds,
-            prob_target_as_non_target=exp_setup.prob_target_as_non_target(
-                num_attack_rounds=num_attack_rounds
-            ),
-            prob_non_target_as_target=exp_setup.prob_non_target_as_target(
-                num_attack_rounds=num_attack_rounds
-            ),
-            prob_target_active_in_attack_win=exp_setup.target_server.prob_active_in_attack_win,
-            prob_target_active_in_baseline_win=(
-                exp_setup.target_server.prob_active_in_baseline_win
-                if hasattr(exp_setup.target_server, "prob_active_in_baseline_win")
-                else None
-            ),
-            prob_non_target_active_in_attack_win=exp_setup.non_target_server.prob_active_in_attack_win,
-        )
-        log(
-            INFO, "",
-            num_packets_to_deem_active=num_packets_to_deem_active,
-            perf_point=perf_point,
-        )
-
-        return perf_point
-
-    attack_perf = _get_attack_perf_to_plot(
-        x_list=list(range(1, num_target_packets)),
-        attack_perf_point_for_given_x=attack_perf_point_for_given_x,
+            max_prob_error=max_prob_error,
+            num_packets_to_deem_active=x_list,
+        ),
     )
     # log(
     #     INFO, "",
@@ -402,3 +326,75 @@ def plot_attack_perf_vs_num_packets_to_deem_active(
         title=title,
         plot_name=plot_name,
     )
+
+
+PARAM_NAME_TO_LABEL_MAP = {
+    "non_target_arrival_rate": r"$\mu_{\mathrm{non-target}}$",
+    "attack_window_length": r"$T_{\mathrm{attack-win}}$",
+    "num_target_packets": r"$N_{\mathrm{target-packets}}$",
+    "num_target_servers": r"$N_{\mathrm{target-servers}}$",
+    "alpha": r"$\alpha$",
+    "num_packets_to_deem_active": r"$n_{\mathrm{packets-to-deem-active}}$",
+}
+
+
+def plot_num_attack_rounds_heatmap(
+    max_prob_error: float,
+    x_name: str,
+    x_list: list,
+    y_name: str,
+    y_list: list,
+    **fixed_param_name_to_value_map,
+):
+    """Plots the min number of attack rounds over the 2-D grid of the params
+    `x_name` and `y_name` of `model.get_attack_perf_grid_w_baseline()`, for the
+    other params fixed as given in `fixed_param_name_to_value_map`.
+    """
+
+    log(
+        INFO, "",
+        max_prob_error=max_prob_error,
+        x_name=x_name,
+        y_name=y_name,
+        fixed_param_name_to_value_map=fixed_param_name_to_value_map,
+    )
+
+    attack_perf_grid = model.get_attack_perf_grid_w_baseline(
+        **{
+            x_name: numpy.asarray(x_list)[numpy.newaxis, :],
+            y_name: numpy.asarray(y_list)[:, numpy.newaxis],
+            **fixed_param_name_to_value_map,
+        },
+        max_prob_error=max_prob_error,
+    )
+    # Points at which no number of attack rounds achieves `max_prob_error` are left blank.
+    num_attack_rounds_grid = numpy.where(
+        numpy.isinf(attack_perf_grid.num_attack_rounds), numpy.nan, attack_perf_grid.num_attack_rounds
+    )
+
+    fontsize = 14
+    fig, ax = plot.subplots()
+    mesh = ax.pcolormesh(x_list, y_list, numpy.log10(num_attack_rounds_grid), shading="nearest")
+    color_bar = fig.colorbar(mesh, ax=ax)
+    color_bar.set_label(r"$\log_{10} N_{\mathrm{attack-round}}$", fontsize=fontsize)
+    plot.xlabel(PARAM_NAME_TO_LABEL_MAP[x_name], fontsize=fontsize)
+    plot.ylabel(PARAM_NAME_TO_LABEL_MAP[y_name], fontsize=fontsize)
+
+    title = ", ".join(
+        [r"$\mathrm{max-}p_{\mathrm{error}} =$" + fr"${max_prob_error}$"]
+        + [
+            PARAM_NAME_TO_LABEL_MAP[param_name] + fr" $= {value}$"
+            for param_name, value in fixed_param_name_to_value_map.items()
+        ]
+    )
+    st = plot.suptitle(title, fontsize=fontsize)
+
+    fig.set_size_inches(7, 5)
+    plot_name = (
+        "plot_num_attack_rounds_heatmap"
+        f"_max_prob_error_{max_prob_error}"
+        f"_{x_name}_vs_{y_name}"
+        + "".join(f"_{param_name}_{value}" for param_name, value in fixed_param_name_to_value_map.items())
+    )
+    plot.savefig(f"plots/{plot_name}.pdf", bbox_extra_artists=[st], bbox_inches="tight")
+    plot.gcf().clear()
@@ -0,0 +1,193 @@
+"""Memoized Poisson and Binomial probabilities for the analytical models.
+
+The models evaluate the same few (k, mu) and (k, n, p) points over and over,
+e.g., `sim.get_adversary()` rebuilds the markovian model for every replication,
+and building a frozen `scipy.stats` distribution for each evaluation costs much
+more than the evaluation itself. The kernels here call the scipy functions
+directly and keep the results in bounded LRU caches, so a repeated evaluation
+is a dictionary lookup. Arguments must be hashable scalars; use the `*_array`
+kernels below for arrays.
+
+The `*_array` kernels return the log of the Binomial and Poisson tails over
+arrays, computed with the regularized incomplete beta and gamma functions.
+The tails are computed directly rather than as `1 - cdf`, so small tails do not
+cancel out, and where the incomplete beta or gamma underflows, the tail is
+computed from its boundary term in log space.
+"""
+
+import functools
+import numpy
+
+import scipy.special
+import scipy.stats
+
+
+MAX_CACHE_SIZE = 2**16
+
+
+@functools.lru_cache(maxsize=MAX_CACHE_SIZE)
+def poisson_pmf(k: int, mu: float) -> float:
+    return float(scipy.stats.poisson.pmf(k, mu))
+
+
+@functools.lru_cache(maxsize=MAX_CACHE_SIZE)
+def poisson_cdf(k: float, mu: float) -> float:
+    return float(scipy.stats.poisson.cdf(k, mu))
+
+
+@functools.lru_cache(maxsize=MAX_CACHE_SIZE)
+def poisson_sf(k: float, mu: float) -> float:
+    """Returns Pr{X > k}."""
+
+    return float(scipy.stats.poisson.sf(k, mu))
+
+
+@functools.lru_cache(maxsize=MAX_CACHE_SIZE)
+def binom_pmf(k: int, n: int, p: float) -> float:
+    return float(scipy.stats.binom.pmf(k, n, p))
+
+
+@functools.lru_cache(maxsize=MAX_CACHE_SIZE)
+def binom_cdf(k: float, n: int, p: float) -> float:
+    return float(scipy.stats.binom.cdf(k, n, p))
+
+
+@functools.lru_cache(maxsize=MAX_CACHE_SIZE)
+def binom_sf(k: float, n: int, p: float) -> float:
+    """Returns Pr{X > k}."""
+
+    return float(scipy.stats.binom.sf(k, n, p))
+
+
+def binom_logpmf_array(k: numpy.ndarray, n: numpy.ndarray, p: numpy.ndarray) -> numpy.ndarray:
+    k, n, p = numpy.broadcast_arrays(*(numpy.asarray(x, dtype=float) for x in (k, n, p)))
+    with numpy.errstate(invalid="ignore"):
+        logpmf = (
+            scipy.special.gammaln(n + 1) - scipy.special.gammaln(k + 1) - scipy.special.gammaln(n - k + 1)
+            + scipy.special.xlogy(k, p) + scipy.special.xlog1py(n - k, -p)
+        )
+    return numpy.where((0 <= k) & (k <= n), logpmf, -numpy.inf)
+
+
+def binom_logcdf_array(k: numpy.ndarray, n: numpy.ndarray, p: numpy.ndarray) -> numpy.ndarray:
+    """Returns log Pr{X <= k}. In the underflow region, the tail is `pmf(k) / (1 - r)`
+    with the geometric ratio `r = pmf(k - 1) / pmf(k)`.
+    """
+
+    k, n, p = numpy.broadcast_arrays(*(numpy.asarray(x, dtype=float) for x in (k, n, p)))
+    k = numpy.floor(k)
+    index = (0 <= k) & (k < n)
+    logcdf = numpy.where(k < 0, -numpy.inf, 0.0)
+
+    k, n, p = k[index], n[index], p[index]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        cdf = scipy.special.betainc(n - k, k + 1, 1 - p)
+        r = k * (1 - p) / ((n - k + 1) * p)
+        logcdf[index] = numpy.where(
+            cdf > 0,
+            numpy.log(cdf),
+            binom_logpmf_array(k, n, p) - numpy.log1p(-r),
+        )
+
+    return logcdf
+
+
+def binom_logsf_array(k: numpy.ndarray, n: numpy.ndarray, p: numpy.ndarray) -> numpy.ndarray:
+    """Returns log Pr{X > k}. In the underflow region, the tail is `pmf(k + 1) / (1 - r)`
+    with the geometric ratio `r = pmf(k + 2) / pmf(k + 1)`.
+    """
+
+    k, n, p = numpy.broadcast_arrays(*(numpy.asarray(x, dtype=float) for x in (k, n, p)))
+    k = numpy.floor(k)
+    index = (0 <= k) & (k < n)
+    logsf = numpy.where(k < 0, 0.0, -numpy.inf)
+
+    k, n, p = k[index], n[index], p[index]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        sf = scipy.special.betainc(k + 1, n - k, p)
+        r = (n - k - 1) * p / ((k + 2) * (1 - p))
+        logsf[index] = numpy.where(
+            sf > 0,
+            numpy.log(sf),
+            binom_logpmf_array(k + 1, n, p) - numpy.log1p(-r),
+        )
+
+    return logsf
+
+
+def poisson_logpmf_array(k: numpy.ndarray, mu: numpy.ndarray) -> numpy.ndarray:
+    k, mu = numpy.broadcast_arrays(*(numpy.asarray(x, dtype=float) for x in (k, mu)))
+    logpmf = scipy.special.xlogy(k, mu) - mu - scipy.special.gammaln(k + 1)
+    return numpy.where(k >= 0, logpmf, -numpy.inf)
+
+
+def poisson_logcdf_array(k: numpy.ndarray, mu: numpy.ndarray) -> numpy.ndarray:
+    """Returns log Pr{X <= k}. In the underflow region, the tail is `pmf(k) / (1 - k / mu)`."""
+
+    k, mu = numpy.broadcast_arrays(*(numpy.asarray(x, dtype=float) for x in (k, mu)))
+    k = numpy.floor(k)
+    index = k >= 0
+    logcdf = numpy.full(k.shape, -numpy.inf)
+
+    k, mu = k[index], mu[index]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        cdf = scipy.special.gammaincc(k + 1, mu)
+        logcdf[index] = numpy.where(
+            cdf > 0,
+            numpy.log(cdf),
+            poisson_logpmf_array(k, mu) - numpy.log1p(-k / mu),
+        )
+
+    return logcdf
+
+
+def poisson_logsf_array(k: numpy.ndarray, mu: numpy.ndarray) -> numpy.ndarray:
+    """Returns log Pr{X > k}. In the underflow region, the tail is `pmf(k + 1) / (1 - mu / (k + 2))`."""
+
+    k, mu = numpy.broadcast_arrays(*(numpy.asarray(x, dtype=float) for x in (k, mu)))
+    k = numpy.floor(k)
+    index = k >= 0
+    logsf = numpy.zeros(k.shape)
+
+    k, mu = k[index], mu[index]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        sf = scipy.special.gammainc(k + 1, mu)
+        logsf[index] = numpy.where(
+            sf > 0,
+            numpy.log(sf),
+            poisson_logpmf_array(k + 1, mu) - numpy.log1p(-mu / (k + 2)),
+        )
+
+    return logsf
+
+
+KERNEL_LIST = [
+    poisson_pmf,
+    poisson_cdf,
+    poisson_sf,
+    binom_pmf,
+    binom_cdf,
+    binom_sf,
+]
+
+
+def get_cache_info() -> dict[str, dict]:
+    return {
+        kernel.__name__: kernel.cache_info()._asdict()
+        for kernel in KERNEL_LIST
+    }
+
+
+def get_num_cache_hits_and_misses() -> tuple[int, int]:
+    num_hits, num_misses = 0, 0
+    for kernel in KERNEL_LIST:
+        cache_info = kernel.cache_info()
+        num_hits += cache_info.hits
+        num_misses += cache_info.misses
+
+    return num_hits, num_misses
+
+
+def clear_caches():
+    for kernel in KERNEL_LIST:
+        kernel.cache_clear()
@@ -0,0 +1,43 @@
+"""Seeded random streams for running simulations with common random numbers.
+
+Replication `i` at every sweep point draws from the same stream `i`, and each
+component of the system (e.g., the idle times of client `c3`) draws from its
+own substream. Substreams are keyed by the component name rather than by the
+order in which they are created, so adding servers or clients at a sweep point
+does not shift the draws of the other components.
+"""
+
+import zlib
+
+import numpy
+
+
+def _get_spawn_key_entry(component_key) -> int:
+    if isinstance(component_key, int):
+        return component_key
+
+    return zlib.crc32(str(component_key).encode())
+
+
+class RandomStreams:
+    def __init__(self, seed: int, replication: int):
+        self.seed = seed
+        self.replication = replication
+
+    def __repr__(self):
+        return f"RandomStreams(seed= {self.seed}, replication= {self.replication})"
+
+    def get_rng(self, *component) -> numpy.random.Generator:
+        """Returns a generator for the substream of `component`, e.g.,
+        `get_rng("client", "c3", "idle_time")`. Calls with the same `component`
+        return generators that produce the same draws.
+        """
+
+        seed_sequence = numpy.random.SeedSequence(
+            entropy=self.seed,
+            spawn_key=(
+                self.replication,
+                *(_get_spawn_key_entry(component_key) for component_key in component),
+            ),
+        )
+        return numpy.random.Generator(numpy.random.PCG64(seed_sequence))
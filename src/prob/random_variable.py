@@ -7,6 +7,10 @@ import scipy.stats
 
 
 class RandomVariable:
+    """`sample()` returns a single value if `size` is None, and an array of shape `size`
+    otherwise. The draws are from `rng` if given.
+    """
+
     def __init__(self, min_value: float, max_value: float):
         self.min_value = min_value
         self.max_value = max_value
@@ -33,8 +37,11 @@ class Normal(RandomVariable):
     def mean(self) -> float:
         return self.mu
 
-    def sample(self) -> float:
-        return self.dist.rvs(size=1)[0]
+    def sample(self, size: int = None, rng: numpy.random.Generator = None):
+        if size is None:
+            return self.dist.rvs(size=1, random_state=rng)[0]
+
+        return self.dist.rvs(size=size, random_state=rng)
 
 
 class TruncatedNormal(RandomVariable):
@@ -68,8 +75,11 @@ class TruncatedNormal(RandomVariable):
     def stdev(self) -> float:
         return self.dist.std()
 
-    def sample(self) -> float:
-        return self.dist.rvs(size=1)[0]
+    def sample(self, size: int = None, rng: numpy.random.Generator = None):
+        if size is None:
+            return self.dist.rvs(size=1, random_state=rng)[0]
+
+        return self.dist.rvs(size=size, random_state=rng)
 
 
 class Exponential(RandomVariable):
@@ -120,8 +130,17 @@ class Exponential(RandomVariable):
 
         return self.mu / (s + self.mu)
 
-    def sample(self) -> float:
-        return self.D + random.expovariate(self.mu)
+    def sample(self, size: int = None, rng: numpy.random.Generator = None):
+        if size is None:
+            if rng is None:
+                return self.D + random.expovariate(self.mu)
+
+            return self.D + rng.exponential(1 / self.mu)
+
+        if rng is None:
+            return self.D + numpy.random.exponential(1 / self.mu, size=size)
+
+        return self.D + rng.exponential(1 / self.mu, size=size)
 
 
 class Poisson(RandomVariable):
@@ -144,8 +163,8 @@ class Poisson(RandomVariable):
     def cdf(self, x: float) -> float:
         return self.dist.cdf(x)
 
-    def sample(self) -> int:
-        return self.dist.rvs()
+    def sample(self, size: int = None, rng: numpy.random.Generator = None):
+        return self.dist.rvs(size=size, random_state=rng)
 
 
 class Uniform(RandomVariable):
@@ -164,8 +183,8 @@ class Uniform(RandomVariable):
         self.max_value = max_value
         self.dist = scipy.stats.uniform(loc=self.min_value, scale=self.max_value - self.min_value)
 
-    def sample(self) -> float:
-        return self.dist.rvs()
+    def sample(self, size: int = None, rng: numpy.random.Generator = None):
+        return self.dist.rvs(size=size, random_state=rng)
 
 
 class DiscreteUniform(RandomVariable):
@@ -204,8 +223,8 @@ class DiscreteUniform(RandomVariable):
     def moment(self, i: int) -> float:
         return self.dist.moment(i)
 
-    def sample(self) -> float:
-        return self.dist.rvs()  # [0]
+    def sample(self, size: int = None, rng: numpy.random.Generator = None):
+        return self.dist.rvs(size=size, random_state=rng)
 
 
 class BoundedZipf(RandomVariable):
@@ -215,7 +234,7 @@ class BoundedZipf(RandomVariable):
 
         self.value_list = numpy.arange(self.min_value, self.max_value + 1)
         weight_list = [float(value) ** (-a) for value in self.value_list]
-        self.prob_list = [weight / sum(weight_l) for weight in weight_list]
+        self.prob_list = [weight / sum(weight_list) for weight in weight_list]
         self.dist = scipy.stats.rv_discrete(
             name="bounded_zipf", values=(self.value_list, self.prob_list)
         )
@@ -233,17 +252,20 @@ class BoundedZipf(RandomVariable):
         #   return sum(self.prob_list[:(x-self.min_value+1)])
         return self.dist.cdf(x)
 
-    def inverse_cdf(self, pob: float) -> float:
+    def inverse_cdf(self, prob: float) -> float:
         return self.dist.ppf(prob)
 
     def tail_prob(self, x: float) -> float:
-        return 1 - self.cfd(x)
+        return 1 - self.cdf(x)
 
     def mean(self) -> float:
         return self.dist.mean()
 
-    def sample(self) -> float:
-        return self.dist.rvs(size=1)[0]
+    def sample(self, size: int = None, rng: numpy.random.Generator = None):
+        if size is None:
+            return self.dist.rvs(size=1, random_state=rng)[0]
+
+        return self.dist.rvs(size=size, random_state=rng)
 
 
 class Beta(RandomVariable):
@@ -279,8 +301,11 @@ class Beta(RandomVariable):
 
         return self.stdev() / mean
 
-    def sample(self) -> float:
-        return self.dist.rvs(size=1)[0] * self.D
+    def sample(self, size: int = None, rng: numpy.random.Generator = None):
+        if size is None:
+            return self.dist.rvs(size=1, random_state=rng)[0] * self.D
+
+        return self.dist.rvs(size=size, random_state=rng) * self.D
 
 
 class Binomial(RandomVariable):
@@ -313,5 +338,8 @@ class Binomial(RandomVariable):
     def stdev(self) -> float:
         return self.dist.std()
 
-    def sample(self) -> float:
-        return self.dist.rvs(size=1)[0]
+    def sample(self, size: int = None, rng: numpy.random.Generator = None):
+        if size is None:
+            return self.dist.rvs(size=1, random_state=rng)[0]
+
+        return self.dist.rvs(size=size, random_state=rng)
@@ -2,8 +2,8 @@ import random
 import simpy
 
 from src.attack import adversary as adversary_module
-from src.prob import random_variable
-from src.sim import message, node
+from src.prob import random_stream, random_variable
+from src.sim import message, node, trace
 
 from src.debug_utils import DEBUG, slog
 
@@ -16,12 +16,22 @@ class Client(node.Node):
         server_id_list: list[int],
         client_idle_time_rv: random_variable.RandomVariable,
         num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable,
+        random_streams: random_stream.RandomStreams = None,
     ):
         super().__init__(env=env, _id=_id)
         self.server_id_list = server_id_list
         self.client_idle_time_rv = client_idle_time_rv
         self.num_msgs_to_recv_for_get_request_rv = num_msgs_to_recv_for_get_request_rv
 
+        # Set only in the common-random-numbers mode, otherwise the global generators are used.
+        self.idle_time_rng = None
+        self.server_choice_rng = None
+        self.num_msgs_rng = None
+        if random_streams is not None:
+            self.idle_time_rng = random_streams.get_rng("client", _id, "idle_time")
+            self.server_choice_rng = random_streams.get_rng("client", _id, "server_choice")
+            self.num_msgs_rng = random_streams.get_rng("client", _id, "num_msgs")
+
         # To be set while getting connected to the network
         self.next_hop = None
 
@@ -71,15 +81,20 @@ class Client(node.Node):
             yield self.token_store.get()
 
             # Wait idle
-            idle_time = self.client_idle_time_rv.sample()
+            idle_time = self.client_idle_time_rv.sample(rng=self.idle_time_rng)
             slog(
                 DEBUG, self.env, self, "waiting idle", idle_time=idle_time
             )
             yield self.env.timeout(idle_time)
 
             # Send GET request
-            server_id = random.choice(self.server_id_list)
-            self.num_msgs_to_recv_for_get_request = self.num_msgs_to_recv_for_get_request_rv.sample()
+            if self.server_choice_rng is None:
+                server_id = random.choice(self.server_id_list)
+            else:
+                server_id = self.server_id_list[self.server_choice_rng.integers(len(self.server_id_list))]
+            self.num_msgs_to_recv_for_get_request = self.num_msgs_to_recv_for_get_request_rv.sample(
+                rng=self.num_msgs_rng
+            )
             msg = message.GetRequest(
                 _id=msg_id,
                 src_id=self._id,
@@ -88,6 +103,8 @@ class Client(node.Node):
             )
             slog(DEBUG, self.env, self, "sending", msg=msg)
             self.next_hop.put(msg)
+            if self.tracer is not None:
+                self.tracer.record(trace.EventType.CLIENT_SENT, self.env.now, self._id, server_id, msg_id)
             if self.adversary:
                 self.adversary.client_sent_msg(msg=msg)
 
@@ -2,9 +2,9 @@ import heapq
 
 import simpy
 
-from src.prob import random_variable
+from src.prob import random_stream, random_variable
 from src.sim import client as client_module
-from src.sim import message
+from src.sim import message, trace
 from src.sim import node as node_module
 from src.sim import server as server_module
 
@@ -25,6 +25,8 @@ class Network(node_module.Node):
         self.client_id_list = []
         self.server_id_list = []
 
+        self.num_msgs_delivered = 0
+
     def __repr__(self):
         # return (
         #     "Network( \n"
@@ -83,6 +85,9 @@ class Network_wZeroDelay(Network):
             dst_node = self.id_to_node_map[msg.dst_id]
             slog(DEBUG, self.env, self, "forwarding", msg=msg, dst_node=dst_node)
             dst_node.put(msg)
+            self.num_msgs_delivered += 1
+            if self.tracer is not None:
+                self.tracer.record(trace.EventType.NETWORK_DELIVERED, self.env.now, msg.src_id, msg.dst_id, msg._id)
 
 
 class Network_wDelayAssignedPerMessage(Network):
@@ -91,9 +96,15 @@ class Network_wDelayAssignedPerMessage(Network):
         env: simpy.Environment,
         _id: str,
         delay_rv: random_variable.RandomVariable,
+        random_streams: random_stream.RandomStreams = None,
     ):
         super().__init__(env=env, _id=_id)
         self.delay_rv = delay_rv
+        self.random_streams = random_streams
+
+        # Delays are drawn from a separate stream per sender in the common-random-numbers
+        # mode, so the delays of a node do not depend on how many other nodes there are.
+        self.src_id_to_rng_map = {}
 
         self.forward_time_and_msg_heapq = []
 
@@ -112,10 +123,19 @@ class Network_wDelayAssignedPerMessage(Network):
 
         return f"Network_wZeroDelay(_id= {self._id})"
 
+    def get_rng(self, src_id: str):
+        if self.random_streams is None:
+            return None
+
+        if src_id not in self.src_id_to_rng_map:
+            self.src_id_to_rng_map[src_id] = self.random_streams.get_rng("network_delay", src_id)
+
+        return self.src_id_to_rng_map[src_id]
+
     def put(self, msg: message.Message):
         slog(DEBUG, self.env, self, "recved", msg=msg)
 
-        delay = self.delay_rv.sample()
+        delay = self.delay_rv.sample(rng=self.get_rng(src_id=msg.src_id))
         forward_time = self.env.now + delay
         heapq.heappush(self.forward_time_and_msg_heapq, (forward_time, msg))
 
@@ -147,6 +167,9 @@ class Network_wDelayAssignedPerMessage(Network):
                 dst_node = self.id_to_node_map[msg.dst_id]
                 slog(DEBUG, self.env, self, "forwarding", msg=msg, dst_node=dst_node)
                 dst_node.put(msg)
+                self.num_msgs_delivered += 1
+                if self.tracer is not None:
+                    self.tracer.record(trace.EventType.NETWORK_DELIVERED, self.env.now, msg.src_id, msg.dst_id, msg._id)
 
             else:
                 slog(DEBUG, self.env, self, "wait interrupted by msg arrival")
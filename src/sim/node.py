@@ -1,7 +1,7 @@
 import simpy
 
 from src.debug_utils import *
-from src.sim import message
+from src.sim import message, trace
 
 
 class Node:
@@ -9,5 +9,8 @@ class Node:
         self.env = env
         self._id = _id
 
+        # Set in the tracing mode.
+        self.tracer: trace.EventTracer = None
+
     def __repr__(self):
         return "Node( \n" f"\t id= {self._id} \n" ")"
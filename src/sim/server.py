@@ -1,7 +1,7 @@
 import simpy
 
 from src.attack import adversary as adversary_module
-from src.sim import message, node
+from src.sim import message, node, trace
 
 from src.debug_utils import DEBUG, slog
 
@@ -60,6 +60,10 @@ class Server(node.Node):
                         dst_id=msg.src_id,
                     )
                     self.next_hop.put(msg_)
+                    if self.tracer is not None:
+                        self.tracer.record(
+                            trace.EventType.SERVER_SENT, self.env.now, self._id, msg_.dst_id, msg_._id
+                        )
                     slog(
                         DEBUG, self.env, self,
                         "sent",
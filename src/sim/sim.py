@@ -1,64 +1,100 @@
 import joblib
+import os
 import simpy
+import time
+
+from typing import Callable
 
-from src import utils
 from src.attack import (
     adversary as adversary_module,
     disclosure_attack,
 )
-from src.debug_utils import check, DEBUG, ERROR, INFO, log
+from src.debug_utils import check, DEBUG, ERROR, INFO, log, log_replication
 from src.model import markovian_model, model_w_rounds
-from src.prob import random_variable
+from src.prob import random_stream, random_variable
 from src.sim import (
+    stats,
     tor as tor_module,
     tor_model as tor_model_module,
+    trace,
 )
 
 
+def get_analytical_model(**kwargs) -> model_w_rounds.Model_wRounds:
+    """Any of the params can be arrays, see `Model_wRounds`. The probs are taken from
+    `prob_server_active` and `prob_attack_round` if given, and otherwise computed
+    from the random variables of `TorSystem` with `markovian_model`.
+    """
+
+    if (
+        kwargs.get("prob_server_active") is not None
+        and kwargs.get("prob_attack_round") is not None
+    ):
+        prob_server_active = kwargs["prob_server_active"]
+        prob_attack_round = kwargs["prob_attack_round"]
+    elif (
+        "network_delay_rv" in kwargs
+        and "client_idle_time_rv" in kwargs
+        and "target_client_idle_time_rv" in kwargs
+        and "num_msgs_to_recv_for_get_request_rv" in kwargs
+    ):
+        prob_server_active = markovian_model.prob_server_active(
+            network_delay_rv=kwargs["network_delay_rv"],
+            client_idle_time_rv=kwargs["client_idle_time_rv"],
+            num_msgs_to_recv_for_get_request_rv=kwargs["num_msgs_to_recv_for_get_request_rv"],
+        )
+        prob_attack_round = markovian_model.prob_attack_round(
+            network_delay_rv=kwargs["network_delay_rv"],
+            target_client_idle_time_rv=kwargs["target_client_idle_time_rv"],
+            num_msgs_to_recv_for_get_request_rv=kwargs["num_msgs_to_recv_for_get_request_rv"],
+        )
+    else:
+        log(ERROR, "", kwargs=kwargs)
+        raise ValueError("Unexpected kwargs")
+
+    log(
+        INFO, "",
+        prob_server_active=prob_server_active,
+        prob_attack_round=prob_attack_round,
+    )
+    return model_w_rounds.Model_wRounds(
+        num_clients=kwargs["num_clients"],
+        num_servers=kwargs["num_servers"],
+        num_target_servers=kwargs["num_target_servers"],
+        prob_server_active=prob_server_active,
+        prob_attack_round=prob_attack_round,
+    )
+
+
+def get_max_stdev_and_detection_threshold(
+    detection_gap_exp_factor: float,
+    **kwargs,
+) -> tuple[float, float]:
+    """`kwargs` are passed to `get_analytical_model()`. Returns arrays if any of
+    the params is an array.
+    """
+
+    analytical_model = get_analytical_model(**kwargs)
+    return (
+        analytical_model.max_stdev_of_prob_estimates(
+            detection_gap_exp_factor=detection_gap_exp_factor,
+        ),
+        analytical_model.detection_threshold(
+            detection_gap_exp_factor=detection_gap_exp_factor,
+        ),
+    )
+
+
 def get_adversary(
     env: simpy.Environment,
     max_delivery_time_for_adversary: float,
     **kwargs,
 ) -> adversary_module.Adversary:
-    if (
-        "detection_gap_exp_factor" in kwargs
-        or "num_servers_to_exclude_from_threshold" in kwargs
-    ):
-        if (
-            "prob_server_active" in kwargs
-            and "prob_attack_round" in kwargs
-        ):
-            prob_server_active = kwargs["prob_server_active"]
-            prob_attack_round = kwargs["prob_attack_round"]
-        elif (
-            "network_delay_rv" in kwargs
-            and "client_idle_time_rv" in kwargs
-            and "target_client_idle_time_rv" in kwargs
-            and "num_msgs_to_recv_for_get_request_rv" in kwargs
-        ):
-            prob_server_active = markovian_model.prob_server_active(
-                network_delay_rv=kwargs["network_delay_rv"],
-                client_idle_time_rv=kwargs["client_idle_time_rv"],
-                num_msgs_to_recv_for_get_request_rv=kwargs["num_msgs_to_recv_for_get_request_rv"],
-            )
-            prob_attack_round = markovian_model.prob_attack_round(
-                network_delay_rv=kwargs["network_delay_rv"],
-                target_client_idle_time_rv=kwargs["target_client_idle_time_rv"],
-                num_msgs_to_recv_for_get_request_rv=kwargs["num_msgs_to_recv_for_get_request_rv"],
-            )
-
-        log(
-            INFO, "",
-            prob_server_active=prob_server_active,
-            prob_attack_round=prob_attack_round,
-        )
-        analytical_model = model_w_rounds.Model_wRounds(
-            num_clients=kwargs["num_clients"],
-            num_servers=kwargs["num_servers"],
-            num_target_servers=kwargs["num_target_servers"],
-            prob_server_active=prob_server_active,
-            prob_attack_round=prob_attack_round,
-        )
+    """The outlier detection adversaries take `max_stdev` and `detection_threshold`
+    from `kwargs` if both are given, e.g., as precomputed for the whole sweep with
+    `get_max_stdev_and_detection_threshold()`, and otherwise compute them from
+    `detection_gap_exp_factor` with the analytical model.
+    """
 
     if "stability_threshold" in kwargs:
         return disclosure_attack.DisclosureAttack_wBaselineInspection_wStationaryRounds(
@@ -67,43 +103,32 @@ def get_adversary(
             stability_threshold=kwargs["stability_threshold"],
         )
 
-    elif "max_stdev" in kwargs:
-        return disclosure_attack.DisclosureAttack_wOutlierDetection(
-            env=env,
-            max_delivery_time_for_adversary=max_delivery_time_for_adversary,
-            max_stdev=kwargs["max_stdev"],
-        )
+    if "max_stdev" in kwargs and "detection_threshold" in kwargs:
+        max_stdev = kwargs["max_stdev"]
+        detection_threshold = kwargs["detection_threshold"]
 
     elif "detection_gap_exp_factor" in kwargs:
-        detection_gap_exp_factor = kwargs["detection_gap_exp_factor"]
-        return disclosure_attack.DisclosureAttack_wOutlierDetection(
-            env=env,
-            max_delivery_time_for_adversary=max_delivery_time_for_adversary,
-            max_stdev=analytical_model.max_stdev_of_prob_estimates(
-                detection_gap_exp_factor=detection_gap_exp_factor,
-            ),
-            detection_threshold=analytical_model.detection_threshold(
-                detection_gap_exp_factor=detection_gap_exp_factor,
-            ),
-        )
+        max_stdev, detection_threshold = get_max_stdev_and_detection_threshold(**kwargs)
 
-    elif "num_servers_to_exclude_from_threshold" in kwargs:
-        detection_gap_exp_factor = kwargs["detection_gap_exp_factor"]
+    else:
+        log(ERROR, "", kwargs=kwargs)
+        raise ValueError("Unexpected kwargs")
+
+    if "num_servers_to_exclude_from_threshold" in kwargs:
         return disclosure_attack.DisclosureAttack_wOutlierDetection_wEarlyTermination(
             env=env,
             max_delivery_time_for_adversary=max_delivery_time_for_adversary,
-            max_stdev=analytical_model.max_stdev_of_prob_estimates(
-                detection_gap_exp_factor=detection_gap_exp_factor,
-            ),
-            detection_threshold=analytical_model.detection_threshold(
-                detection_gap_exp_factor=detection_gap_exp_factor,
-            ),
+            max_stdev=float(max_stdev),
+            detection_threshold=float(detection_threshold),
             num_servers_to_exclude_from_threshold=kwargs["num_servers_to_exclude_from_threshold"],
         )
 
-    else:
-        log(ERROR, "", kwargs=kwargs)
-        raise ValueError("Unexpected kwargs")
+    return disclosure_attack.DisclosureAttack_wOutlierDetection(
+        env=env,
+        max_delivery_time_for_adversary=max_delivery_time_for_adversary,
+        max_stdev=float(max_stdev),
+        detection_threshold=float(detection_threshold),
+    )
 
 
 def sim_tor(
@@ -115,12 +140,25 @@ def sim_tor(
     target_client_idle_time_rv: random_variable.RandomVariable,
     num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable,
     num_samples: int,
+    random_streams: random_stream.RandomStreams = None,
+    trace_file_path: str = None,
+    w_stats: bool = False,
+    memory_sample_interval: float = None,
     **kwargs,
 ):
+    """If `trace_file_path` is given, the events are recorded with `trace.EventTracer`
+    and dumped to `trace_file_path` at the end of the run. If `w_stats` is set,
+    `stats.SimStats` of the run is appended to the returned list. If
+    `memory_sample_interval` is given, the state sizes and the traced memory are
+    sampled by `stats.MemorySampler` into `SimStats.memory_sample_list`.
+    """
+
+    start_time = time.perf_counter()
+    w_stats = w_stats or memory_sample_interval is not None
     if "max_delivery_time_for_adversary" not in kwargs:
         kwargs["max_delivery_time_for_adversary"] = network_delay_rv.max_value
 
-    env = simpy.Environment()
+    env = stats.Environment_wEventCounter() if w_stats else simpy.Environment()
 
     adversary = get_adversary(
         env=env,
@@ -133,6 +171,11 @@ def sim_tor(
         num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
         **kwargs,
     )
+    if random_streams is not None:
+        adversary.rng = random_streams.get_rng("adversary")
+    if w_stats:
+        sim_stats = stats.SimStats()
+        stats.time_adversary_hooks(adversary=adversary, sim_stats=sim_stats)
 
     tor = tor_module.TorSystem(
         env=env,
@@ -143,10 +186,21 @@ def sim_tor(
         client_idle_time_rv=client_idle_time_rv,
         target_client_idle_time_rv=target_client_idle_time_rv,
         num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
+        random_streams=random_streams,
+        tracer=trace.EventTracer() if trace_file_path is not None else None,
     )
 
     tor.register_adversary(adversary=adversary)
+    if memory_sample_interval is not None:
+        memory_sampler = stats.MemorySampler(
+            env=env,
+            interval=memory_sample_interval,
+            adversary=adversary,
+            network=tor.network,
+        )
     tor.run()
+    if trace_file_path is not None:
+        tor.tracer.dump(trace_file_path)
 
     # Return the result
     result_list = [
@@ -156,6 +210,13 @@ def sim_tor(
     ]
     if isinstance(adversary, disclosure_attack.DisclosureAttack_wBayesianEstimate):
         result_list.append(adversary.get_server_id_to_signal_map())
+    if w_stats:
+        sim_stats.wall_clock_time_in_secs = time.perf_counter() - start_time
+        sim_stats.num_events = env.num_events
+        sim_stats.num_msgs_delivered = tor.network.num_msgs_delivered
+        if memory_sample_interval is not None:
+            sim_stats.memory_sample_list = memory_sampler.stop()
+        result_list.append(sim_stats)
 
     return result_list
 
@@ -168,9 +229,14 @@ def sim_tor_model(
     prob_attack_round: float,
     num_samples: int,
     max_delivery_time_for_adversary: float = 1,
+    random_streams: random_stream.RandomStreams = None,
+    w_stats: bool = False,
+    memory_sample_interval: float = None,
     **kwargs,
 ):
-    env = simpy.Environment()
+    start_time = time.perf_counter()
+    w_stats = w_stats or memory_sample_interval is not None
+    env = stats.Environment_wEventCounter() if w_stats else simpy.Environment()
 
     adversary = get_adversary(
         env=env,
@@ -182,6 +248,11 @@ def sim_tor_model(
         prob_attack_round=prob_attack_round,
         **kwargs,
     )
+    if random_streams is not None:
+        adversary.rng = random_streams.get_rng("adversary")
+    if w_stats:
+        sim_stats = stats.SimStats()
+        stats.time_adversary_hooks(adversary=adversary, sim_stats=sim_stats)
 
     tor_model = tor_model_module.TorModel_wRounds(
         env=env,
@@ -191,9 +262,16 @@ def sim_tor_model(
         max_delivery_time_for_adversary=max_delivery_time_for_adversary,
         prob_server_active=prob_server_active,
         prob_attack_round=prob_attack_round,
+        random_streams=random_streams,
     )
 
     tor_model.register_adversary(adversary=adversary)
+    if memory_sample_interval is not None:
+        memory_sampler = stats.MemorySampler(
+            env=env,
+            interval=memory_sample_interval,
+            adversary=adversary,
+        )
     tor_model.run()
 
     # Return the result
@@ -204,10 +282,29 @@ def sim_tor_model(
     ]
     if isinstance(adversary, disclosure_attack.DisclosureAttack_wBayesianEstimate):
         result_list.append(adversary.get_server_id_to_signal_map())
+    if w_stats:
+        sim_stats.wall_clock_time_in_secs = time.perf_counter() - start_time
+        sim_stats.num_events = env.num_events
+        if memory_sample_interval is not None:
+            sim_stats.memory_sample_list = memory_sampler.stop()
+        result_list.append(sim_stats)
 
     return result_list
 
 
+def sim_replication(sim_func: Callable, replication: int, progress_reporter=None, **kwargs):
+    """Runs `sim_func` with its logs tagged with `replication`."""
+
+    with log_replication(replication):
+        if progress_reporter is None:
+            return sim_func(**kwargs)
+
+        progress_reporter.replication_started(replication)
+        sim_result = sim_func(**kwargs)
+        progress_reporter.replication_completed(replication, sim_result)
+        return sim_result
+
+
 def sim_w_disclosure_attack_w_joblib(
     num_clients: int,
     num_servers: int,
@@ -220,32 +317,90 @@ def sim_w_disclosure_attack_w_joblib(
     num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable = None,
     prob_server_active: bool = None,
     prob_attack_round: bool = None,
+    crn_seed: int = None,
+    first_replication: int = 0,
+    trace_dir: str = None,
+    progress_reporter=None,
     **kwargs,
 ) -> disclosure_attack.DisclosureAttackResult:
-    true_target_server_id_set = set(
-        f"{utils.get_server_id(server_rank)}" for server_rank in range(num_target_servers)
-    )
+    """If `crn_seed` is given, runs with common random numbers: replication `i`
+    draws from `RandomStreams(seed=crn_seed, replication=first_replication + i)`,
+    so sweep points called with the same `crn_seed` share their randomness.
+
+    If `trace_dir` is given (only for `w_model=False`), the event trace of
+    replication `i` is dumped to `<trace_dir>/replication_<i>.npz`.
+
+    If `progress_reporter` (`exp.progress.ProgressReporter`) is given, it is
+    notified as the replications start and complete, and the sims are run with
+    `w_stats=True` (unless set otherwise) to count the simulated events.
+    """
+
+    def get_trace_file_path(sample_index: int) -> str:
+        if trace_dir is None:
+            return None
+
+        return os.path.join(trace_dir, f"replication_{first_replication + sample_index}.npz")
+
+    if trace_dir is not None:
+        os.makedirs(trace_dir, exist_ok=True)
+
+    def get_random_streams(sample_index: int) -> random_stream.RandomStreams:
+        if crn_seed is None:
+            return None
+
+        return random_stream.RandomStreams(seed=crn_seed, replication=first_replication + sample_index)
+
+    if progress_reporter is not None:
+        progress_reporter.add_replications(num_samples)
+        kwargs.setdefault("w_stats", True)
+
+    if (
+        "detection_gap_exp_factor" in kwargs
+        and "stability_threshold" not in kwargs
+        and not ("max_stdev" in kwargs and "detection_threshold" in kwargs)
+    ):
+        # Computed once for all the replications rather than in each.
+        max_stdev, detection_threshold = get_max_stdev_and_detection_threshold(
+            num_clients=num_clients,
+            num_servers=num_servers,
+            num_target_servers=num_target_servers,
+            prob_server_active=prob_server_active if w_model else None,
+            prob_attack_round=prob_attack_round if w_model else None,
+            network_delay_rv=network_delay_rv,
+            client_idle_time_rv=client_idle_time_rv,
+            target_client_idle_time_rv=target_client_idle_time_rv,
+            num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
+            **kwargs,
+        )
+        kwargs = {**kwargs, "max_stdev": float(max_stdev), "detection_threshold": float(detection_threshold)}
 
     if w_model:
         sim_result_list = joblib.Parallel(n_jobs=-1, prefer="threads")(
             [
-                joblib.delayed(sim_tor_model)(
+                joblib.delayed(sim_replication)(
+                    sim_func=sim_tor_model,
+                    replication=first_replication + sample_index,
+                    progress_reporter=progress_reporter,
                     num_clients=num_clients,
                     num_servers=num_servers,
                     num_target_servers=num_target_servers,
                     prob_server_active=prob_server_active,
                     prob_attack_round=prob_attack_round,
                     num_samples=num_samples,
+                    random_streams=get_random_streams(sample_index),
                     **kwargs,
                 )
-                for _ in range(num_samples)
+                for sample_index in range(num_samples)
             ]
         )
 
     else:
         sim_result_list = joblib.Parallel(n_jobs=-1, prefer="threads")(
             [
-                joblib.delayed(sim_tor)(
+                joblib.delayed(sim_replication)(
+                    sim_func=sim_tor,
+                    replication=first_replication + sample_index,
+                    progress_reporter=progress_reporter,
                     num_clients=num_clients,
                     num_servers=num_servers,
                     network_delay_rv=network_delay_rv,
@@ -254,83 +409,16 @@ def sim_w_disclosure_attack_w_joblib(
                     num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
                     num_target_servers=num_target_servers,
                     num_samples=num_samples,
+                    random_streams=get_random_streams(sample_index),
+                    trace_file_path=get_trace_file_path(sample_index),
                     **kwargs,
                 )
-                for _ in range(num_samples)
+                for sample_index in range(num_samples)
             ]
         )
 
-    time_to_deanonymize_list = []
-    num_rounds_list = []
-    num_correct_target_server_sets = 0
-    classification_result_list = []
-    for sim_result in sim_result_list:
-        target_server_id_set = sim_result[0]
-        time_to_deanonymize = sim_result[1]
-        num_rounds = sim_result[2]
-        log(
-            INFO, "",
-            target_server_id_set=target_server_id_set,
-            time_to_deanonymize=time_to_deanonymize,
-            num_rounds=num_rounds,
-        )
-
-        time_to_deanonymize_list.append(time_to_deanonymize)
-        num_rounds_list.append(num_rounds)
-
-        num_correct_target_server_sets += int(true_target_server_id_set == target_server_id_set)
-
-        # Append `classification_result`
-        num_targets_identified_as_target = 0
-        num_non_targets_identified_as_target = 0
-        for target_server_id in target_server_id_set:
-            if target_server_id in true_target_server_id_set:
-                num_targets_identified_as_target += 1
-            else:
-                num_non_targets_identified_as_target += 1
-
-        classification_result = disclosure_attack.ClassificationResult(
-            num_targets_identified_as_target=num_targets_identified_as_target,
-            num_targets_identified_as_non_target=num_target_servers - num_targets_identified_as_target,
-            num_non_targets_identified_as_target=num_non_targets_identified_as_target,
-            num_non_targets_identified_as_non_target=num_servers - num_target_servers - num_non_targets_identified_as_target,
-        )
-        classification_result_list.append(classification_result)
-
-    target_server_set_accuracy = num_correct_target_server_sets / num_samples
-    if "stability_threshold" in kwargs:
-        return disclosure_attack.DisclosureAttackResult(
-            time_to_deanonymize_list=time_to_deanonymize_list,
-            num_rounds_list=num_rounds_list,
-            target_server_set_accuracy=target_server_set_accuracy,
-            classification_result_list=classification_result_list,
-        )
-
-    elif "max_stdev" in kwargs or "detection_gap_exp_factor" in kwargs:
-        signal_strength_for_target_server_list = []
-        signal_strength_for_non_target_server_list = []
-        for sim_result in sim_result_list:
-            server_id_to_signal_map = sim_result[3]
-            log(INFO, "", server_id_to_signal_map=server_id_to_signal_map)
-
-            signal_strength_for_target_server_list.extend(
-                [
-                    server_id_to_signal_map[utils.get_server_id(server_rank)]
-                    for server_rank in range(num_target_servers)
-                ]
-            )
-            signal_strength_for_non_target_server_list.extend(
-                [
-                    server_id_to_signal_map[utils.get_server_id(server_rank)]
-                    for server_rank in range(num_target_servers, num_servers)
-                ]
-            )
-
-        return disclosure_attack.DisclosureAttackResult_wSignalSampleStrength(
-            time_to_deanonymize_list=time_to_deanonymize_list,
-            num_rounds_list=num_rounds_list,
-            target_server_set_accuracy=target_server_set_accuracy,
-            classification_result_list=classification_result_list,
-            signal_strength_for_target_server_list=signal_strength_for_target_server_list,
-            signal_strength_for_non_target_server_list=signal_strength_for_non_target_server_list,
-        )
+    return disclosure_attack.get_disclosure_attack_result(
+        sim_result_list=sim_result_list,
+        num_servers=num_servers,
+        num_target_servers=num_target_servers,
+    )
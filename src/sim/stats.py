@@ -0,0 +1,289 @@
+"""Performance counters of a single simulation run, returned with its result
+when the `sim` functions are called with `w_stats=True`.
+"""
+
+import dataclasses
+import os
+import threading
+import time
+import tracemalloc
+
+import numpy
+import simpy
+
+from typing import Callable, Optional
+
+
+# `get_sample_candidate_set()` is included to cover the baseline inspection
+# rounds, which run in the own process of the adversary rather than in a hook.
+ADVERSARY_HOOK_NAME_LIST = [
+    "client_sent_msg",
+    "client_completed_get_request",
+    "server_recved_msg",
+    "server_sent_msg",
+    "get_sample_candidate_set",
+]
+
+# State that grows with the simulated time unless it is trimmed.
+ADVERSARY_STRUCTURE_NAME_LIST = [
+    "server_id_to_time_epochs_msg_sent_map",
+    "server_id_to_weight_map",
+    "server_id_to_baseline_weight_map",
+    "server_id_weight_diff_map",
+    "server_id_to_num_times_in_sample_set_map",
+    "server_id_to_num_in_baseline_sample_set_map",
+]
+NETWORK_STRUCTURE_NAME_LIST = [
+    "forward_time_and_msg_heapq",
+]
+
+
+class Environment_wEventCounter(simpy.Environment):
+    def __init__(self, initial_time: float = 0):
+        super().__init__(initial_time=initial_time)
+        self.num_events = 0
+
+    def step(self):
+        self.num_events += 1
+        super().step()
+
+
+@dataclasses.dataclass
+class SimStats:
+    wall_clock_time_in_secs: float = 0
+    num_events: int = 0
+    num_msgs_delivered: Optional[int] = None
+    adversary_hook_name_to_num_calls_map: dict[str, int] = dataclasses.field(default_factory=dict)
+    time_in_adversary_in_secs: float = 0
+    memory_sample_list: Optional[list["MemorySample"]] = None
+
+    @property
+    def time_in_engine_in_secs(self) -> float:
+        return self.wall_clock_time_in_secs - self.time_in_adversary_in_secs
+
+    @property
+    def events_per_sec(self) -> float:
+        return self.num_events / self.wall_clock_time_in_secs if self.wall_clock_time_in_secs > 0 else numpy.nan
+
+
+def time_adversary_hooks(adversary, sim_stats: SimStats):
+    """Wraps the hooks of `adversary` in place to count the calls and to add the
+    time spent in them to `sim_stats`. Only the outermost hook call is timed,
+    e.g., `get_sample_candidate_set()` called within `client_completed_get_request()`
+    is counted but not timed twice.
+    """
+
+    depth = 0
+
+    def get_timed_hook(hook_name: str, hook: Callable) -> Callable:
+        def timed_hook(*args, **kwargs):
+            nonlocal depth
+
+            sim_stats.adversary_hook_name_to_num_calls_map[hook_name] += 1
+            if depth > 0:
+                return hook(*args, **kwargs)
+
+            depth += 1
+            start_time = time.perf_counter()
+            try:
+                return hook(*args, **kwargs)
+            finally:
+                sim_stats.time_in_adversary_in_secs += time.perf_counter() - start_time
+                depth -= 1
+
+        return timed_hook
+
+    for hook_name in ADVERSARY_HOOK_NAME_LIST:
+        hook = getattr(adversary, hook_name, None)
+        if hook is None:
+            continue
+
+        sim_stats.adversary_hook_name_to_num_calls_map[hook_name] = 0
+        setattr(adversary, hook_name, get_timed_hook(hook_name=hook_name, hook=hook))
+
+
+def get_sim_stats_summary(sim_stats_list: list[SimStats]) -> dict[str, float]:
+    """Returns the means over the replications of a sweep point."""
+
+    wall_clock_time_array = numpy.array([s.wall_clock_time_in_secs for s in sim_stats_list])
+    time_in_adversary_array = numpy.array([s.time_in_adversary_in_secs for s in sim_stats_list])
+    num_events_array = numpy.array([s.num_events for s in sim_stats_list])
+
+    summary = {
+        "E_wall_clock_time_in_secs": numpy.mean(wall_clock_time_array),
+        "E_num_events": numpy.mean(num_events_array),
+        "E_time_in_adversary_in_secs": numpy.mean(time_in_adversary_array),
+        "E_time_in_engine_in_secs": numpy.mean(wall_clock_time_array - time_in_adversary_array),
+        "events_per_sec": num_events_array.sum() / wall_clock_time_array.sum(),
+        "frac_time_in_adversary": time_in_adversary_array.sum() / wall_clock_time_array.sum(),
+    }
+
+    if all(s.num_msgs_delivered is not None for s in sim_stats_list):
+        summary["E_num_msgs_delivered"] = numpy.mean([s.num_msgs_delivered for s in sim_stats_list])
+
+    for hook_name in ADVERSARY_HOOK_NAME_LIST:
+        if all(hook_name in s.adversary_hook_name_to_num_calls_map for s in sim_stats_list):
+            summary[f"E_num_calls_{hook_name}"] = numpy.mean(
+                [s.adversary_hook_name_to_num_calls_map[hook_name] for s in sim_stats_list]
+            )
+
+    if all(s.memory_sample_list for s in sim_stats_list):
+        for structure_name in sim_stats_list[0].memory_sample_list[0].structure_name_to_num_entries_map:
+            summary[f"E_max_num_entries_{structure_name}"] = numpy.mean(
+                [
+                    max(
+                        memory_sample.structure_name_to_num_entries_map.get(structure_name, 0)
+                        for memory_sample in s.memory_sample_list
+                    )
+                    for s in sim_stats_list
+                ]
+            )
+
+    return summary
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~  Memory  ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+@dataclasses.dataclass
+class MemorySample:
+    time: float
+    structure_name_to_num_entries_map: dict[str, int]
+    traced_memory_in_bytes: Optional[int] = None
+    peak_traced_memory_in_bytes: Optional[int] = None
+    # [(file_name:line_number, size_in_bytes)]
+    top_allocation_list: Optional[list[tuple[str, int]]] = None
+
+
+def get_num_entries(structure) -> int:
+    """For a map of lists, e.g., `server_id_to_time_epochs_msg_sent_map`,
+    returns the total length of the lists.
+    """
+
+    if isinstance(structure, dict):
+        return sum(
+            len(value) if isinstance(value, (list, set, dict)) else 1
+            for value in structure.values()
+        )
+
+    return len(structure)
+
+
+# tracemalloc is process-wide, so it is stopped only after the last sampler
+# among the replications running in parallel threads is done.
+_tracemalloc_lock = threading.Lock()
+_num_tracemalloc_users = 0
+_tracemalloc_started_here = False
+
+
+def start_tracemalloc():
+    global _num_tracemalloc_users, _tracemalloc_started_here
+
+    with _tracemalloc_lock:
+        if _num_tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_started_here = True
+        _num_tracemalloc_users += 1
+
+
+def stop_tracemalloc():
+    global _num_tracemalloc_users, _tracemalloc_started_here
+
+    with _tracemalloc_lock:
+        _num_tracemalloc_users -= 1
+        if _num_tracemalloc_users == 0 and _tracemalloc_started_here:
+            tracemalloc.stop()
+            _tracemalloc_started_here = False
+
+
+class MemorySampler:
+    """Samples the sizes of the adversary and network state every `interval` in
+    simulated time, as well as the traced memory if `w_tracemalloc` is set.
+    Note that the traced memory covers the whole process, i.e., all the
+    replications that run in parallel threads.
+    """
+
+    def __init__(
+        self,
+        env: simpy.Environment,
+        interval: float,
+        adversary,
+        network=None,
+        w_tracemalloc: bool = True,
+        num_top_allocations: int = 10,
+    ):
+        self.env = env
+        self.interval = interval
+        self.adversary = adversary
+        self.network = network
+        self.w_tracemalloc = w_tracemalloc
+        self.num_top_allocations = num_top_allocations
+
+        self.memory_sample_list = []
+        if self.w_tracemalloc:
+            start_tracemalloc()
+        self.process = env.process(self.run())
+
+    def __repr__(self):
+        return f"MemorySampler(interval= {self.interval}, w_tracemalloc= {self.w_tracemalloc})"
+
+    def get_structure_name_to_num_entries_map(self) -> dict[str, int]:
+        structure_name_to_num_entries_map = {}
+        for obj, structure_name_list in [
+            (self.adversary, ADVERSARY_STRUCTURE_NAME_LIST),
+            (self.network, NETWORK_STRUCTURE_NAME_LIST),
+        ]:
+            for structure_name in structure_name_list:
+                structure = getattr(obj, structure_name, None)
+                if structure is not None:
+                    structure_name_to_num_entries_map[structure_name] = get_num_entries(structure)
+
+        return structure_name_to_num_entries_map
+
+    def sample(self):
+        memory_sample = MemorySample(
+            time=self.env.now,
+            structure_name_to_num_entries_map=self.get_structure_name_to_num_entries_map(),
+        )
+
+        if self.w_tracemalloc and tracemalloc.is_tracing():
+            memory_sample.traced_memory_in_bytes, memory_sample.peak_traced_memory_in_bytes = tracemalloc.get_traced_memory()
+            statistic_list = tracemalloc.take_snapshot().statistics("lineno")[:self.num_top_allocations]
+            memory_sample.top_allocation_list = [
+                (f"{os.path.basename(statistic.traceback[0].filename)}:{statistic.traceback[0].lineno}", statistic.size)
+                for statistic in statistic_list
+            ]
+
+        self.memory_sample_list.append(memory_sample)
+
+    def run(self):
+        while True:
+            self.sample()
+            yield self.env.timeout(self.interval)
+
+    def stop(self) -> list[MemorySample]:
+        """Takes a last sample and returns the samples."""
+
+        self.sample()
+        if self.w_tracemalloc:
+            stop_tracemalloc()
+            self.w_tracemalloc = False
+
+        return self.memory_sample_list
+
+
+def get_structure_name_to_growth_rate_map(memory_sample_list: list[MemorySample]) -> dict[str, float]:
+    """Returns the least-squares slope of the number of entries over the
+    simulated time for each structure, i.e., the entries added per unit time.
+    """
+
+    time_array = numpy.array([memory_sample.time for memory_sample in memory_sample_list])
+    if len(time_array) < 2 or numpy.ptp(time_array) == 0:
+        return {}
+
+    structure_name_to_growth_rate_map = {}
+    for structure_name in memory_sample_list[0].structure_name_to_num_entries_map:
+        num_entries_array = numpy.array(
+            [memory_sample.structure_name_to_num_entries_map[structure_name] for memory_sample in memory_sample_list]
+        )
+        structure_name_to_growth_rate_map[structure_name] = numpy.polyfit(time_array, num_entries_array, deg=1)[0]
+
+    return structure_name_to_growth_rate_map
@@ -6,12 +6,13 @@ from src.attack import (
     adversary as adversary_module,
     disclosure_attack,
 )
-from src.prob import random_variable
+from src.prob import random_stream, random_variable
 from src.sim import client as client_module
 from src.sim import network as network_module
 from src.sim import server as server_module
+from src.sim import trace
 
-from src.debug_utils import check, DEBUG, INFO, log, WARNING
+from src.debug_utils import check, DEBUG, log, WARNING
 
 
 class TorSystem():
@@ -25,6 +26,8 @@ class TorSystem():
         client_idle_time_rv: random_variable.RandomVariable,
         target_client_idle_time_rv: random_variable.RandomVariable,
         num_msgs_to_recv_for_get_request_rv: random_variable.RandomVariable,
+        random_streams: random_stream.RandomStreams = None,
+        tracer: trace.EventTracer = None,
     ):
         check(num_target_servers <= num_servers, "")
 
@@ -36,13 +39,16 @@ class TorSystem():
         self.client_idle_time_rv = client_idle_time_rv
         self.target_client_idle_time_rv = target_client_idle_time_rv
         self.num_msgs_to_recv_for_get_request_rv = num_msgs_to_recv_for_get_request_rv
+        self.tracer = tracer
 
         # Network
         self.network = network_module.Network_wDelayAssignedPerMessage(
             env=self.env,
             _id="n",
             delay_rv=network_delay_rv,
+            random_streams=random_streams,
         )
+        self.network.tracer = tracer
 
         # Servers
         self.server_list = []
@@ -52,6 +58,7 @@ class TorSystem():
                 _id=f"{utils.get_server_id(server_rank)}",
             )
             server.next_hop = self.network
+            server.tracer = tracer
             self.server_list.append(server)
 
             self.network.register_server(server)
@@ -68,6 +75,7 @@ class TorSystem():
                     ],
                     client_idle_time_rv=target_client_idle_time_rv,
                     num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
+                    random_streams=random_streams,
                 )
 
             else:
@@ -77,9 +85,11 @@ class TorSystem():
                     server_id_list=[self.server_list[i % num_servers]._id],
                     client_idle_time_rv=client_idle_time_rv,
                     num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
+                    random_streams=random_streams,
                 )
 
             client.next_hop = self.network
+            client.tracer = tracer
             self.network.register_client(client)
 
     def __repr__(self):
@@ -96,6 +106,8 @@ class TorSystem():
 
     def register_adversary(self, adversary: adversary_module.Adversary):
         self.adversary = adversary
+        if self.tracer is not None:
+            self.adversary.tracer = self.tracer
 
         client_list = self.network.get_client_list()
         log(WARNING, "", client_list=client_list)
@@ -162,10 +174,6 @@ def sim_w_disclosure_attack_w_joblib(
             tor.get_num_rounds()
         )
 
-    true_target_server_id_set = set(
-        f"{utils.get_server_id(server_rank)}" for server_rank in range(num_target_servers)
-    )
-
     sim_result_list = joblib.Parallel(n_jobs=-1, prefer="threads")(
         [
             joblib.delayed(sim)()
@@ -173,46 +181,8 @@ def sim_w_disclosure_attack_w_joblib(
         ]
     )
 
-    time_to_deanonymize_list = []
-    num_rounds_list = []
-    num_correct_target_server_sets = 0
-    classification_result_list = []
-    for sim_result in sim_result_list:
-        target_server_id_set = sim_result[0]
-        time_to_deanonymize = sim_result[1]
-        num_rounds = sim_result[2]
-        log(
-            INFO, "",
-            target_server_id_set=target_server_id_set,
-            time_to_deanonymize=time_to_deanonymize,
-            num_rounds=num_rounds,
-        )
-
-        time_to_deanonymize_list.append(time_to_deanonymize)
-        num_rounds_list.append(num_rounds)
-
-        num_correct_target_server_sets += int(true_target_server_id_set == target_server_id_set)
-
-        # Append `classification_result`
-        num_targets_identified_as_target = 0
-        num_non_targets_identified_as_target = 0
-        for target_server_id in target_server_id_set:
-            if target_server_id in true_target_server_id_set:
-                num_targets_identified_as_target += 1
-            else:
-                num_non_targets_identified_as_target += 1
-
-        classification_result = disclosure_attack.ClassificationResult(
-            num_targets_identified_as_target=num_targets_identified_as_target,
-            num_targets_identified_as_non_target=num_target_servers - num_targets_identified_as_target,
-            num_non_targets_identified_as_target=num_non_targets_identified_as_target,
-            num_non_targets_identified_as_non_target=num_servers - num_target_servers - num_non_targets_identified_as_target,
-        )
-        classification_result_list.append(classification_result)
-
-    return disclosure_attack.DisclosureAttackResult(
-        time_to_deanonymize_list=time_to_deanonymize_list,
-        num_rounds_list=num_rounds_list,
-        target_server_set_accuracy=num_correct_target_server_sets / num_samples,
-        classification_result_list=classification_result_list,
+    return disclosure_attack.get_disclosure_attack_result(
+        sim_result_list=sim_result_list,
+        num_servers=num_servers,
+        num_target_servers=num_target_servers,
     )
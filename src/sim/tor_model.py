@@ -9,10 +9,18 @@ from src.attack import (
 )
 from src.debug_utils import check, DEBUG, ERROR, INFO, log
 from src.model import model_w_rounds
-from src.prob import random_variable
+from src.prob import random_stream, random_variable
 from src.sim import message
 
 
+# Round structure of `TorModel_wRounds.generate_model_events()`, in units of
+# `max_delivery_time_for_adversary`: the attack round follows the server activity
+# after `TIME_FROM_ACTIVITY_TO_ATTACK`, and the rounds are separated by exponential
+# intervals with rate `RATE_OF_INTERVAL_BETWEEN_ROUNDS`.
+TIME_FROM_ACTIVITY_TO_ATTACK = 0.1
+RATE_OF_INTERVAL_BETWEEN_ROUNDS = 0.3
+
+
 class TorModel_wRounds:
     def __init__(
         self,
@@ -23,6 +31,7 @@ class TorModel_wRounds:
         max_delivery_time_for_adversary: float,
         prob_server_active: float,
         prob_attack_round: float,
+        random_streams: random_stream.RandomStreams = None,
     ):
         check(num_target_servers <= num_servers, "")
 
@@ -34,6 +43,20 @@ class TorModel_wRounds:
         self.prob_server_active = prob_server_active
         self.prob_attack_round = prob_attack_round
 
+        # Set only in the common-random-numbers mode, otherwise the global generators are used.
+        # Each server has its own activity stream, so the activity of a server does not depend
+        # on `num_servers`.
+        self.server_activity_rng_list = None
+        self.attack_round_rng = None
+        self.interval_rng = None
+        if random_streams is not None:
+            self.server_activity_rng_list = [
+                random_streams.get_rng("server", utils.get_server_id(server_rank), "activity")
+                for server_rank in range(num_servers)
+            ]
+            self.attack_round_rng = random_streams.get_rng("attack_round")
+            self.interval_rng = random_streams.get_rng("round_interval")
+
         self.generate_model_events_process = env.process(self.generate_model_events())
 
     def __repr__(self):
@@ -64,16 +87,23 @@ class TorModel_wRounds:
     def generate_model_events(self):
         log(DEBUG, "Started")
 
-        interval_rv = random_variable.Exponential(mu=0.3 / self.max_delivery_time_for_adversary)
+        interval_rv = random_variable.Exponential(mu=RATE_OF_INTERVAL_BETWEEN_ROUNDS / self.max_delivery_time_for_adversary)
         target_client_id = -1
         msg_count = 0
         while True:
             # Pick the servers that will receive a message.
-            server_id_set = {
-                utils.get_server_id(server_rank)
-                for server_rank in range(self.num_servers)
-                if random.random() <= self.prob_server_active
-            }
+            if self.server_activity_rng_list is None:
+                server_id_set = {
+                    utils.get_server_id(server_rank)
+                    for server_rank in range(self.num_servers)
+                    if random.random() <= self.prob_server_active
+                }
+            else:
+                server_id_set = {
+                    utils.get_server_id(server_rank)
+                    for server_rank, rng in enumerate(self.server_activity_rng_list)
+                    if rng.random() <= self.prob_server_active
+                }
 
             # Generate "server received" events.
             for server_id in server_id_set:
@@ -85,13 +115,19 @@ class TorModel_wRounds:
                 )
                 self.adversary.server_sent_msg(msg=msg)
 
-            yield self.env.timeout(0.1 * self.max_delivery_time_for_adversary)
+            yield self.env.timeout(TIME_FROM_ACTIVITY_TO_ATTACK * self.max_delivery_time_for_adversary)
 
             # Generate "client completed request" event.
-            if random.random() <= self.prob_attack_round:
-                target_server_id = utils.get_server_id(
-                    random.randint(0, self.num_target_servers - 1)
-                )
+            if self.attack_round_rng is None:
+                is_attack_round = random.random() <= self.prob_attack_round
+                target_server_rank = random.randint(0, self.num_target_servers - 1) if is_attack_round else None
+            else:
+                # Both are drawn in every round to keep the stream aligned across sweep points.
+                is_attack_round = self.attack_round_rng.random() <= self.prob_attack_round
+                target_server_rank = int(self.attack_round_rng.integers(self.num_target_servers))
+
+            if is_attack_round:
+                target_server_id = utils.get_server_id(target_server_rank)
                 msg = message.Message(
                     _id=f"{msg_count}",
                     _type=None,
@@ -105,7 +141,7 @@ class TorModel_wRounds:
                 )
 
             # Wait long enough for the next round.
-            interval = interval_rv.sample()
+            interval = interval_rv.sample(rng=self.interval_rng)
             yield self.env.timeout(interval)
 
         log(DEBUG, "Done")
@@ -183,11 +219,6 @@ def sim_w_disclosure_attack_w_joblib(
 
         return result_list
 
-    true_target_server_id_set = set(
-        f"{utils.get_server_id(server_rank)}" for server_rank in range(num_target_servers)
-    )
-    # log(WARNING, "", true_target_server_id_set=true_target_server_id_set)
-
     sim_result_list = joblib.Parallel(n_jobs=-1, prefer="threads")(
         [
             joblib.delayed(sim)()
@@ -195,77 +226,8 @@ def sim_w_disclosure_attack_w_joblib(
         ]
     )
 
-    time_to_deanonymize_list = []
-    num_rounds_list = []
-    num_correct_target_server_sets = 0
-    classification_result_list = []
-    for sim_result in sim_result_list:
-        target_server_id_set = sim_result[0]
-        time_to_deanonymize = sim_result[1]
-        num_rounds = sim_result[2]
-        log(
-            INFO, "",
-            target_server_id_set=target_server_id_set,
-            time_to_deanonymize=time_to_deanonymize,
-            num_rounds=num_rounds,
-        )
-
-        time_to_deanonymize_list.append(time_to_deanonymize)
-        num_rounds_list.append(num_rounds)
-
-        num_correct_target_server_sets += int(true_target_server_id_set == target_server_id_set)
-
-        # Append `classification_result`
-        num_targets_identified_as_target = 0
-        num_non_targets_identified_as_target = 0
-        for target_server_id in target_server_id_set:
-            if target_server_id in true_target_server_id_set:
-                num_targets_identified_as_target += 1
-            else:
-                num_non_targets_identified_as_target += 1
-
-        classification_result = disclosure_attack.ClassificationResult(
-            num_targets_identified_as_target=num_targets_identified_as_target,
-            num_targets_identified_as_non_target=num_target_servers - num_targets_identified_as_target,
-            num_non_targets_identified_as_target=num_non_targets_identified_as_target,
-            num_non_targets_identified_as_non_target=num_servers - num_target_servers - num_non_targets_identified_as_target,
-        )
-        classification_result_list.append(classification_result)
-
-    target_server_set_accuracy = num_correct_target_server_sets / num_samples
-    if "stability_threshold" in kwargs:
-        return disclosure_attack.DisclosureAttackResult(
-            time_to_deanonymize_list=time_to_deanonymize_list,
-            num_rounds_list=num_rounds_list,
-            target_server_set_accuracy=target_server_set_accuracy,
-            classification_result_list=classification_result_list,
-        )
-
-    elif "max_stdev" in kwargs:
-        signal_strength_for_target_server_list = []
-        signal_strength_for_non_target_server_list = []
-        for sim_result in sim_result_list:
-            server_id_to_signal_map = sim_result[3]
-            log(INFO, "", server_id_to_signal_map=server_id_to_signal_map)
-
-            signal_strength_for_target_server_list.extend(
-                [
-                    server_id_to_signal_map[utils.get_server_id(server_rank)]
-                    for server_rank in range(num_target_servers)
-                ]
-            )
-            signal_strength_for_non_target_server_list.extend(
-                [
-                    server_id_to_signal_map[utils.get_server_id(server_rank)]
-                    for server_rank in range(num_target_servers, num_servers)
-                ]
-            )
-
-        return disclosure_attack.DisclosureAttackResult_wSignalSampleStrength(
-            time_to_deanonymize_list=time_to_deanonymize_list,
-            num_rounds_list=num_rounds_list,
-            target_server_set_accuracy=target_server_set_accuracy,
-            classification_result_list=classification_result_list,
-            signal_strength_for_target_server_list=signal_strength_for_target_server_list,
-            signal_strength_for_non_target_server_list=signal_strength_for_non_target_server_list,
-        )
+    return disclosure_attack.get_disclosure_attack_result(
+        sim_result_list=sim_result_list,
+        num_servers=num_servers,
+        num_target_servers=num_target_servers,
+    )
@@ -0,0 +1,119 @@
+"""Binary event tracing for the simulations.
+
+Events are recorded into preallocated numpy ring buffers (one per column) and
+dumped to an uncompressed npz file, which `load_trace()` reads back without
+parsing any text. Node ids are stored as indices into `node_id_array`.
+"""
+
+import dataclasses
+import enum
+
+import numpy
+
+from src.debug_utils import check, log, DEBUG
+
+
+class EventType(enum.IntEnum):
+    CLIENT_SENT = 0
+    SERVER_SENT = 1
+    NETWORK_DELIVERED = 2
+    ADVERSARY_ROUND = 3
+
+
+ADVERSARY_NODE_ID = "adversary"
+
+
+class EventTracer:
+    def __init__(self, capacity: int = 2**20):
+        check(capacity > 0, "", capacity=capacity)
+        self.capacity = capacity
+
+        self.event_type_array = numpy.zeros(capacity, dtype=numpy.uint8)
+        self.time_array = numpy.zeros(capacity, dtype=numpy.float64)
+        self.src_index_array = numpy.zeros(capacity, dtype=numpy.int32)
+        self.dst_index_array = numpy.zeros(capacity, dtype=numpy.int32)
+        self.msg_id_array = numpy.zeros(capacity, dtype=numpy.int64)
+
+        self.node_id_to_index_map = {}
+        self.num_events = 0
+
+    def __repr__(self):
+        return f"EventTracer(capacity= {self.capacity}, num_events= {self.num_events})"
+
+    def get_node_index(self, node_id) -> int:
+        node_index = self.node_id_to_index_map.get(node_id)
+        if node_index is None:
+            node_index = len(self.node_id_to_index_map)
+            self.node_id_to_index_map[node_id] = node_index
+
+        return node_index
+
+    def record(self, event_type: EventType, time: float, src_id, dst_id, msg_id):
+        """When the buffers are full, the oldest events are overwritten."""
+
+        i = self.num_events % self.capacity
+        self.event_type_array[i] = event_type
+        self.time_array[i] = time
+        self.src_index_array[i] = self.get_node_index(src_id)
+        self.dst_index_array[i] = self.get_node_index(dst_id)
+        self.msg_id_array[i] = msg_id if isinstance(msg_id, int) else -1
+        self.num_events += 1
+
+    def get_column_map(self) -> dict[str, numpy.ndarray]:
+        """Returns the recorded events in chronological order."""
+
+        if self.num_events <= self.capacity:
+            index_array = numpy.arange(self.num_events)
+        else:
+            index_array = numpy.roll(numpy.arange(self.capacity), -(self.num_events % self.capacity))
+
+        return {
+            "event_type_array": self.event_type_array[index_array],
+            "time_array": self.time_array[index_array],
+            "src_index_array": self.src_index_array[index_array],
+            "dst_index_array": self.dst_index_array[index_array],
+            "msg_id_array": self.msg_id_array[index_array],
+        }
+
+    def dump(self, file_path: str):
+        node_id_array = numpy.array([str(node_id) for node_id in self.node_id_to_index_map])
+        numpy.savez(
+            file_path,
+            node_id_array=node_id_array,
+            num_events_dropped=numpy.array(max(self.num_events - self.capacity, 0)),
+            **self.get_column_map(),
+        )
+        log(DEBUG, "Done", file_path=file_path, num_events=self.num_events)
+
+
+@dataclasses.dataclass
+class Trace:
+    event_type_array: numpy.ndarray
+    time_array: numpy.ndarray
+    src_index_array: numpy.ndarray
+    dst_index_array: numpy.ndarray
+    msg_id_array: numpy.ndarray
+    node_id_array: numpy.ndarray
+    num_events_dropped: int
+
+    def __len__(self):
+        return len(self.event_type_array)
+
+    def get_node_index(self, node_id: str) -> int:
+        return int(numpy.flatnonzero(self.node_id_array == node_id)[0])
+
+    def get_event_mask(self, event_type: EventType) -> numpy.ndarray:
+        return self.event_type_array == event_type
+
+
+def load_trace(file_path: str) -> Trace:
+    with numpy.load(file_path) as npz_file:
+        return Trace(
+            event_type_array=npz_file["event_type_array"],
+            time_array=npz_file["time_array"],
+            src_index_array=npz_file["src_index_array"],
+            dst_index_array=npz_file["dst_index_array"],
+            msg_id_array=npz_file["msg_id_array"],
+            node_id_array=npz_file["node_id_array"],
+            num_events_dropped=int(npz_file["num_events_dropped"]),
+        )
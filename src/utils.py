@@ -1,2 +1,6 @@
 def get_server_id(server_rank: int):
     return f"s{server_rank}"
+
+
+def get_server_rank(server_id: str) -> int:
+    return int(server_id[1:])
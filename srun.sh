@@ -36,6 +36,31 @@ srun python ${PWD}/tests/exp/${FILE}.py
   # rm log/*
   sbatch job_script.sh
 
+elif [ $1 = "q" ]; then
+  # Workers of `src/exp/work_queue.py`. Tasks must have been created by the
+  # coordinator beforehand, e.g., `python tests/exp/exp_perf_vs_num_servers_w_work_queue.py c`.
+  QUEUE_DIR="log/work_queue/exp_perf_vs_num_servers"
+
+  NTASKS=4
+  echo "#!/bin/bash
+#SBATCH --partition=main             # Partition (job queue)
+#SBATCH --job-name=work_queue
+#SBATCH --nodes=${NTASKS}            # Number of nodes you require
+#SBATCH --ntasks=${NTASKS}           # Total # of tasks across all nodes
+#SBATCH --cpus-per-task=1            # Cores per task (>1 if multithread tasks)
+#SBATCH --mem=8000                   # Real memory (RAM) required (MB)
+#SBATCH --time=48:00:00              # Total run time limit (HH:MM:SS)
+#SBATCH --export=ALL                 # Export your current env to the job env
+#SBATCH --output=log/work_queue.%N.%j.out
+#SBATCH --error=log/work_queue.%N.%j.err
+
+cd ${HOME}/disclosure-attack-on-anonymity
+
+srun python -m src.exp.work_queue --queue_dir ${QUEUE_DIR}
+  " > job_script.sh
+
+  sbatch job_script.sh
+
 elif [ $1 = "l" ]; then
   squeue -u mfa51
 
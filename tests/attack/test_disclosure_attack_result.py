@@ -0,0 +1,52 @@
+import numpy
+
+from src import utils
+from src.attack import disclosure_attack
+
+
+def test_get_disclosure_attack_result():
+    num_servers = 5
+    num_target_servers = 2
+    sim_result_list = [
+        [{"s0", "s1"}, 10, 100],
+        [["s0", "s3"], 20, 200],
+        [set(), 30, 300],
+        [{"s0", "s1", "s2", "s4"}, 40, 400],
+    ]
+
+    disclosure_attack_result = disclosure_attack.get_disclosure_attack_result(
+        sim_result_list=sim_result_list,
+        num_servers=num_servers,
+        num_target_servers=num_target_servers,
+    )
+
+    true_target_server_id_set = {utils.get_server_id(server_rank) for server_rank in range(num_target_servers)}
+    for sim_result, classification_result in zip(
+        sim_result_list, disclosure_attack_result.classification_result_list
+    ):
+        num_targets_identified_as_target = len(set(sim_result[0]) & true_target_server_id_set)
+        num_non_targets_identified_as_target = len(set(sim_result[0]) - true_target_server_id_set)
+        assert classification_result == disclosure_attack.ClassificationResult(
+            num_targets_identified_as_target=num_targets_identified_as_target,
+            num_targets_identified_as_non_target=num_target_servers - num_targets_identified_as_target,
+            num_non_targets_identified_as_target=num_non_targets_identified_as_target,
+            num_non_targets_identified_as_non_target=num_servers - num_target_servers - num_non_targets_identified_as_target,
+        )
+
+    assert disclosure_attack_result.target_server_set_accuracy == 0.25
+    assert disclosure_attack_result.mean("time_to_deanonymize") == 25
+    assert disclosure_attack_result.quantile("num_rounds", 0.5) == 250
+    assert numpy.allclose(
+        disclosure_attack_result.get_column("prob_target_identified_as_non_target"),
+        [0, 0.5, 1, 0],
+    )
+    assert numpy.allclose(
+        disclosure_attack_result.get_column("prob_non_target_identified_as_target"),
+        [0, 1 / 3, 0, 2 / 3],
+    )
+
+    merged_disclosure_attack_result = disclosure_attack.merge_disclosure_attack_results(
+        [disclosure_attack_result, disclosure_attack_result]
+    )
+    assert len(merged_disclosure_attack_result.classification_result_list) == 8
+    assert merged_disclosure_attack_result.target_server_set_accuracy == 0.25
@@ -0,0 +1,48 @@
+import argparse
+import logging
+
+from src.debug_utils import log, INFO, LOGGER_NAME
+from src.exp import benchmark
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput benchmarks of the simulator.")
+    parser.add_argument("--output", type=str, default="log/bench_throughput.json")
+    parser.add_argument("--baseline", type=str, default=None, help="JSON file written by an earlier run")
+    parser.add_argument("--regression_tolerance", type=float, default=0.1)
+    parser.add_argument("--num_nodes_list", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--num_events", type=int, default=10000)
+    parser.add_argument("--num_rounds", type=int, default=100)
+    parser.add_argument("--num_samples", type=int, default=10000)
+    parser.add_argument("--max_time_in_secs", type=float, default=60)
+    args = parser.parse_args()
+
+    # Logs of the simulator would otherwise dominate the measured cost.
+    logging.getLogger(LOGGER_NAME).setLevel(logging.ERROR)
+
+    benchmark_result_list = benchmark.run_benchmarks(
+        num_nodes_list=args.num_nodes_list,
+        num_events=args.num_events,
+        num_rounds=args.num_rounds,
+        num_samples=args.num_samples,
+        max_time_in_secs=args.max_time_in_secs,
+    )
+    benchmark.save_benchmark_results(benchmark_result_list, file_path=args.output)
+
+    if args.baseline:
+        comparison_list = benchmark.compare_w_baseline(
+            benchmark_result_list=benchmark_result_list,
+            baseline_benchmark_result_list=benchmark.load_benchmark_results(args.baseline),
+            regression_tolerance=args.regression_tolerance,
+        )
+
+        logging.getLogger(LOGGER_NAME).setLevel(logging.INFO)
+        for comparison in comparison_list:
+            print(
+                f"{'REGRESSION' if comparison['is_regression'] else 'ok':>10}  "
+                f"{comparison['speedup']:6.2f}x  {comparison['name']} {comparison['param_map']}"
+            )
+        log(
+            INFO, "Done",
+            num_regressions=sum(comparison["is_regression"] for comparison in comparison_list),
+        )
@@ -0,0 +1,29 @@
+import argparse
+import logging
+
+from src.debug_utils import LOGGER_NAME
+from src.exp import profiling
+
+
+if __name__ == "__main__":
+    regime_name_to_kwargs_map = profiling.get_regime_name_to_kwargs_map()
+
+    parser = argparse.ArgumentParser(description="Profiles the replications of a single sweep point.")
+    parser.add_argument("--regime", type=str, default="model_w_outlier_detection", choices=list(regime_name_to_kwargs_map))
+    parser.add_argument("--output_dir", type=str, default=None, help="Defaults to log/profile/<regime>")
+    parser.add_argument("--num_replications", type=int, default=3)
+    parser.add_argument("--top_n", type=int, default=30)
+    parser.add_argument("--w_sampling_profiler", action="store_true")
+    args = parser.parse_args()
+
+    # Logs of the simulator would otherwise dominate the profile.
+    logging.getLogger(LOGGER_NAME).setLevel(logging.ERROR)
+
+    stats_ = profiling.profile_sweep_point(
+        output_dir=args.output_dir or f"log/profile/{args.regime}",
+        num_replications=args.num_replications,
+        top_n=args.top_n,
+        w_sampling_profiler=args.w_sampling_profiler,
+        **regime_name_to_kwargs_map[args.regime],
+    )
+    stats_.sort_stats("tottime").print_stats(args.top_n)
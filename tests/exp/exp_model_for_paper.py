@@ -46,3 +46,15 @@ if __name__ == "__main__":
         alpha=alpha,
         non_target_arrival_rate=non_target_arrival_rate,
     )
+
+    # plot.plot_num_attack_rounds_heatmap(
+    #     max_prob_error=max_prob_error,
+    #     x_name="non_target_arrival_rate",
+    #     x_list=[i * 10 / attack_window_length / 49 for i in range(50)],
+    #     y_name="num_packets_to_deem_active",
+    #     y_list=list(range(1, num_target_packets)),
+    #     attack_window_length=attack_window_length,
+    #     num_target_packets=num_target_packets,
+    #     num_target_servers=num_target_servers,
+    #     alpha=alpha,
+    # )
@@ -1,4 +1,4 @@
-from src.exp import plot
+from src.exp import plot, progress
 from src.prob import random_variable
 
 
@@ -39,4 +39,8 @@ if __name__ == "__main__":
         prob_server_active=prob_server_active,
         prob_attack_round=prob_attack_round,
         detection_gap_exp_factor=detection_gap_exp_factor,
+        progress_reporter=progress.ProgressReporter(
+            status_file_path="log/progress_exp_perf_vs_max_delivery_time.json",
+            interval_in_secs=10 * 60,
+        ),
     )
@@ -0,0 +1,76 @@
+import sys
+
+from src.exp import plot, work_queue
+from src.prob import random_variable
+
+
+QUEUE_DIR = "log/work_queue/exp_perf_vs_num_servers"
+
+
+if __name__ == "__main__":
+    num_servers_list = [10, 20, 50, 100]
+    num_target_servers = 2
+    num_samples = 20
+    num_samples_per_task = 2
+    w_model = False
+
+    network_delay_rv = random_variable.Uniform(min_value=1, max_value=1)
+    mu = 1
+    client_idle_time_rv = random_variable.Exponential(mu=mu)
+    target_client_idle_time_rv = random_variable.Exponential(mu=mu/2)
+    num_msgs_to_recv_for_get_request_rv = random_variable.DiscreteUniform(min_value=1, max_value=1)
+
+    detection_gap_exp_factor = 2
+
+    def sim_kwargs_given_x_func(num_servers: int) -> dict:
+        return dict(
+            num_clients=num_servers,
+            num_servers=num_servers,
+            num_target_servers=num_target_servers,
+            w_model=w_model,
+            network_delay_rv=network_delay_rv,
+            client_idle_time_rv=client_idle_time_rv,
+            target_client_idle_time_rv=target_client_idle_time_rv,
+            num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
+            detection_gap_exp_factor=detection_gap_exp_factor,
+        )
+
+    # Usage:
+    # - `c`: Coordinator writes the tasks.
+    # - `w <num_workers>`: Runs local workers. Under Slurm, run
+    #   `python -m src.exp.work_queue --queue_dir <QUEUE_DIR>` in each task instead.
+    # - `m`: Merges the result shards and plots.
+    mode = sys.argv[1]
+    if mode == "c":
+        work_queue.create_tasks(
+            queue_dir=QUEUE_DIR,
+            x_list=num_servers_list,
+            sim_kwargs_given_x_func=sim_kwargs_given_x_func,
+            num_samples=num_samples,
+            num_samples_per_task=num_samples_per_task,
+        )
+
+    elif mode == "w":
+        work_queue.run_local_workers(queue_dir=QUEUE_DIR, num_workers=int(sys.argv[2]))
+
+    elif mode == "m":
+        x_to_disclosure_attack_result_map = work_queue.get_x_to_disclosure_attack_result_map(
+            queue_dir=QUEUE_DIR
+        )
+
+        title, plot_name_tail = plot.get_title_and_plot_name_tail(
+            w_model=w_model,
+            num_target_servers=num_target_servers,
+            num_samples=num_samples,
+            network_delay_rv=network_delay_rv,
+            client_idle_time_rv=client_idle_time_rv,
+            num_msgs_to_recv_for_get_request_rv=num_msgs_to_recv_for_get_request_rv,
+            detection_gap_exp_factor=detection_gap_exp_factor,
+        )
+        plot.plot_perf(
+            x_list=num_servers_list,
+            disclosure_attack_result_given_x_func=x_to_disclosure_attack_result_map.__getitem__,
+            x_label=r"$N_{\mathrm{server}}$",
+            title=title,
+            plot_name=f"plot_perf_vs_nservers_{plot_name_tail}",
+        )
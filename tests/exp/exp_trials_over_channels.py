@@ -14,5 +14,5 @@ if __name__ == "__main__":
     num_samples = 100
 
     trials_over_channels.plot_sorted_num_trials_over_channels(
-        n=n, m=m, k=k, p=p, num_samples=num_samples
+        n=n, m=m, k=k, p=p, num_samples=num_samples, w_exact=True,
     )
@@ -0,0 +1,25 @@
+from src.exp import benchmark
+
+
+def test_compare_w_baseline(tmp_path):
+    benchmark_result_list = [
+        benchmark.bench_tor_model(num_clients=5, num_servers=5, num_events=100, max_time_in_secs=10),
+        benchmark.bench_random_variable(
+            rv_name="Exponential",
+            rv=benchmark.get_random_variable_name_to_rv_map()["Exponential"],
+            num_samples=100,
+        ),
+    ]
+    assert benchmark_result_list[0].num_ops == 100
+
+    file_path = str(tmp_path / "bench.json")
+    benchmark.save_benchmark_results(benchmark_result_list, file_path=file_path)
+    baseline_benchmark_result_list = benchmark.load_benchmark_results(file_path)
+    baseline_benchmark_result_list[0].time_in_secs /= 2
+
+    comparison_list = benchmark.compare_w_baseline(
+        benchmark_result_list=benchmark_result_list,
+        baseline_benchmark_result_list=baseline_benchmark_result_list,
+    )
+    assert [comparison["is_regression"] for comparison in comparison_list] == [True, False]
+    assert comparison_list[1]["speedup"] == 1
@@ -0,0 +1,23 @@
+import os
+
+from src.exp import profiling
+
+
+def test_profile_sweep_point(tmp_path):
+    output_dir = str(tmp_path)
+    stats_ = profiling.profile_sweep_point(
+        output_dir=output_dir,
+        num_replications=2,
+        top_n=5,
+        **profiling.get_regime_name_to_kwargs_map(num_servers=4)["model_w_stationary_rounds"],
+    )
+
+    for file_name in ["profile.prof", "top_functions.txt", "profile.collapsed"]:
+        assert os.path.getsize(os.path.join(output_dir, file_name)) > 0
+
+    # Each replication is profiled in the calling thread.
+    assert any(func[2] == "sim_tor_model" and stat[1] == 2 for func, stat in stats_.stats.items())
+
+    collapsed_stack_to_time_map = profiling.get_collapsed_stack_to_time_map(stats_)
+    assert sum(collapsed_stack_to_time_map.values()) <= stats_.total_tt * 1.01
+    assert sum(collapsed_stack_to_time_map.values()) >= stats_.total_tt * 0.9
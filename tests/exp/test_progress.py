@@ -0,0 +1,54 @@
+import json
+
+from src.exp import progress, utils
+from src.sim import sim
+
+
+def test_progress_reporter(tmp_path):
+    status_file_path = str(tmp_path / "progress.json")
+    progress_reporter = progress.ProgressReporter(status_file_path=status_file_path, interval_in_secs=0.01)
+    x_list = [4, 5]
+    num_samples = 2
+
+    def disclosure_attack_result_given_x_func(num_servers: int):
+        return sim.sim_w_disclosure_attack_w_joblib(
+            num_clients=num_servers,
+            num_servers=num_servers,
+            num_target_servers=1,
+            num_samples=num_samples,
+            w_model=True,
+            prob_server_active=0.5,
+            prob_attack_round=0.5,
+            stability_threshold=0.003,
+            progress_reporter=progress_reporter,
+        )
+
+    results_dict = utils.get_results_to_plot(
+        x_list=x_list,
+        disclosure_attack_result_given_x_func=disclosure_attack_result_given_x_func,
+        progress_reporter=progress_reporter,
+    )
+    assert len(results_dict["sim_stats_summary_list"]) == len(x_list)
+
+    with open(status_file_path) as f:
+        status = json.load(f)
+    assert status["x"] == x_list[-1]
+    assert status["num_xs_started"] == len(x_list)
+    assert status["num_replications_completed"] == len(x_list) * num_samples
+    assert status["num_replications_remaining"] == 0
+    assert status["num_replications_running"] == 0
+    assert status["events_per_sec"] > 0
+    assert status["eta_in_secs"] == 0
+
+
+def test_progress_reporter_eta_before_completion():
+    progress_reporter = progress.ProgressReporter()
+    progress_reporter.x_list = [1, 2, 3]
+    progress_reporter.start_sweep_point(1)
+    progress_reporter.add_replications(4)
+    progress_reporter.replication_started(0)
+
+    status = progress_reporter.get_status()
+    assert status["num_replications_remaining"] == 12
+    assert status["num_replications_running"] == 1
+    assert status["eta_in_secs"] is None
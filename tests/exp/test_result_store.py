@@ -0,0 +1,59 @@
+import numpy
+
+from src.attack import disclosure_attack
+from src.exp import result_store, utils
+
+
+def get_disclosure_attack_result(x: int) -> disclosure_attack.DisclosureAttackResult:
+    num_servers = 5
+    num_target_servers = 2
+    sim_result_list = [
+        [{"s0", "s1"}, 10 * x, 100],
+        [{"s0", "s3"}, 20 * x, 200],
+        [{"s0", "s1", "s2"}, 30 * x, 300],
+    ]
+
+    return disclosure_attack.get_disclosure_attack_result(
+        sim_result_list=sim_result_list[:x],
+        num_servers=num_servers,
+        num_target_servers=num_target_servers,
+    )
+
+
+def test_result_store(tmp_path):
+    result_dir = str(tmp_path)
+    x_list = [1, 2, 3]
+
+    writer = result_store.ResultStoreWriter(
+        result_dir=result_dir,
+        x_name="num_samples",
+        param_map={"num_servers": 5, "w_model": False},
+    )
+    for x in x_list:
+        writer.add(x=x, disclosure_attack_result=get_disclosure_attack_result(x))
+    writer.save()
+
+    store = result_store.ResultStore(result_dir=result_dir)
+    assert store.x_list == x_list
+    assert store.num_rows == 6
+
+    num_samples_array = store.column("num_samples")
+    assert isinstance(num_samples_array, numpy.memmap)
+    assert list(num_samples_array) == [1, 2, 2, 3, 3, 3]
+    assert list(store.column("time_to_deanonymize")) == [10, 20, 40, 30, 60, 90]
+    assert list(store.column("num_servers")) == [5] * 6
+
+    for x in x_list:
+        disclosure_attack_result = store.get_disclosure_attack_result(x)
+        assert (
+            disclosure_attack_result.target_server_set_accuracy
+            == get_disclosure_attack_result(x).target_server_set_accuracy
+        )
+
+    results_dict = store.get_results_to_plot()
+    expected_results_dict = utils.get_results_to_plot(
+        x_list=x_list,
+        disclosure_attack_result_given_x_func=get_disclosure_attack_result,
+    )
+    for key, value_list in expected_results_dict.items():
+        assert numpy.allclose(results_dict[key], value_list)
@@ -0,0 +1,128 @@
+import numpy
+import os
+import random
+
+from src.attack import disclosure_attack
+from src.exp import work_queue
+
+
+def sim_func(num_samples: int, x: float) -> disclosure_attack.DisclosureAttackResult:
+    return disclosure_attack.DisclosureAttackResult(
+        time_to_deanonymize_list=[x] * num_samples,
+        num_rounds_list=[1] * num_samples,
+        target_server_set_accuracy=1,
+        classification_result_list=[
+            disclosure_attack.ClassificationResult(
+                num_targets_identified_as_target=1,
+                num_targets_identified_as_non_target=0,
+                num_non_targets_identified_as_target=0,
+                num_non_targets_identified_as_non_target=1,
+            )
+        ] * num_samples,
+    )
+
+
+def test_work_queue(tmp_path):
+    queue_dir = str(tmp_path)
+    x_list = [1, 2, 3]
+    num_samples = 5
+
+    num_tasks = work_queue.create_tasks(
+        queue_dir=queue_dir,
+        x_list=x_list,
+        sim_kwargs_given_x_func=lambda x: {"x": x},
+        num_samples=num_samples,
+        num_samples_per_task=2,
+        sim_func=sim_func,
+    )
+    assert num_tasks == 9
+
+    # Two workers share the queue.
+    assert work_queue.run_worker(queue_dir=queue_dir, max_num_tasks=4) == 4
+    assert work_queue.run_worker(queue_dir=queue_dir) == 5
+    assert not os.listdir(os.path.join(queue_dir, work_queue.TODO_DIRNAME))
+    assert not os.listdir(os.path.join(queue_dir, work_queue.CLAIMED_DIRNAME))
+
+    x_to_disclosure_attack_result_map = work_queue.get_x_to_disclosure_attack_result_map(queue_dir)
+    for x in x_list:
+        disclosure_attack_result = x_to_disclosure_attack_result_map[x]
+        assert list(disclosure_attack_result.time_to_deanonymize_list) == [x] * num_samples
+        assert len(disclosure_attack_result.classification_result_list) == num_samples
+        assert disclosure_attack_result.target_server_set_accuracy == 1
+
+
+def test_requeue_stale_tasks(tmp_path):
+    queue_dir = str(tmp_path)
+    work_queue.create_tasks(
+        queue_dir=queue_dir,
+        x_list=[1],
+        sim_kwargs_given_x_func=lambda x: {"x": x},
+        num_samples=1,
+        num_samples_per_task=1,
+        sim_func=sim_func,
+    )
+
+    task = work_queue.claim_task(queue_dir=queue_dir)
+    assert task is not None
+    assert work_queue.claim_task(queue_dir=queue_dir) is None
+
+    assert work_queue.requeue_stale_tasks(queue_dir=queue_dir, max_task_duration_in_secs=0) == 1
+    # The original worker finishes after its task was requeued.
+    work_queue.run_task(queue_dir=queue_dir, task=task)
+    assert os.listdir(os.path.join(queue_dir, work_queue.RESULTS_DIRNAME)) == [f"{task.task_id}.pkl"]
+
+    assert work_queue.run_worker(queue_dir=queue_dir) == 1
+    assert os.listdir(os.path.join(queue_dir, work_queue.DONE_DIRNAME)) == [f"{task.task_id}.pkl"]
+
+
+def test_claim_task_requeued_before_mtime_refresh(tmp_path, monkeypatch):
+    queue_dir = str(tmp_path)
+    work_queue.create_tasks(
+        queue_dir=queue_dir,
+        x_list=[1],
+        sim_kwargs_given_x_func=lambda x: {"x": x},
+        num_samples=1,
+        num_samples_per_task=1,
+        sim_func=sim_func,
+    )
+
+    def requeue_then_utime(path):
+        work_queue.requeue_stale_tasks(queue_dir=queue_dir, max_task_duration_in_secs=0)
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", requeue_then_utime)
+    assert work_queue.claim_task(queue_dir=queue_dir) is None
+    assert len(os.listdir(os.path.join(queue_dir, work_queue.TODO_DIRNAME))) == 1
+
+
+def sim_func_w_global_rngs(num_samples: int, x: float) -> disclosure_attack.DisclosureAttackResult:
+    return sim_func(num_samples=num_samples, x=numpy.random.random() + random.random())
+
+
+def test_work_queue_seeds_tasks(tmp_path):
+    def get_x_to_time_to_deanonymize_list_map(queue_dir: str) -> dict:
+        work_queue.create_tasks(
+            queue_dir=queue_dir,
+            x_list=[1, 2],
+            sim_kwargs_given_x_func=lambda x: {"x": x},
+            num_samples=2,
+            num_samples_per_task=1,
+            sim_func=sim_func_w_global_rngs,
+            seed=1,
+        )
+        # Workers that inherit the same global states.
+        numpy.random.seed(0)
+        work_queue.run_worker(queue_dir=queue_dir, max_num_tasks=2)
+        numpy.random.seed(0)
+        work_queue.run_worker(queue_dir=queue_dir)
+
+        return {
+            x: list(disclosure_attack_result.time_to_deanonymize_list)
+            for x, disclosure_attack_result in work_queue.get_x_to_disclosure_attack_result_map(queue_dir).items()
+        }
+
+    x_to_time_to_deanonymize_list_map = get_x_to_time_to_deanonymize_list_map(str(tmp_path / "a"))
+    sample_list = [s for ls in x_to_time_to_deanonymize_list_map.values() for s in ls]
+    assert len(set(sample_list)) == len(sample_list)
+
+    assert x_to_time_to_deanonymize_list_map == get_x_to_time_to_deanonymize_list_map(str(tmp_path / "b"))
@@ -0,0 +1,67 @@
+import numpy
+import pytest
+
+from src.model import markovian_model
+from src.prob import random_variable
+
+
+def test_prob_attack_round_vs_poisson():
+    # With negligible delays, the requests of an exponentially idle client are Poisson.
+    window_length = 1e-3
+    network_delay_rv = random_variable.Uniform(min_value=0, max_value=window_length)
+    client_idle_time_rv = random_variable.Exponential(mu=1)
+    num_msgs_rv = random_variable.DiscreteUniform(min_value=1, max_value=1)
+
+    prob_attack_round = markovian_model.prob_attack_round(
+        network_delay_rv=network_delay_rv,
+        target_client_idle_time_rv=client_idle_time_rv,
+        num_msgs_to_recv_for_get_request_rv=num_msgs_rv,
+    )
+    assert prob_attack_round == pytest.approx(1 - numpy.exp(-window_length), abs=2e-3)
+
+
+def test_prob_attack_round_vs_renewal_sim():
+    window_length = 2
+    network_delay_rv = random_variable.Uniform(min_value=window_length, max_value=window_length)
+    client_idle_time_rv = random_variable.Uniform(min_value=1, max_value=3)
+    num_msgs_rv = random_variable.DiscreteUniform(min_value=1, max_value=1)
+
+    prob_attack_round = markovian_model.prob_attack_round(
+        network_delay_rv=network_delay_rv,
+        target_client_idle_time_rv=client_idle_time_rv,
+        num_msgs_to_recv_for_get_request_rv=num_msgs_rv,
+    )
+
+    rng = numpy.random.default_rng(1)
+    renewal_time_array = numpy.cumsum(rng.uniform(1, 3, size=10**5) + 2 * window_length)
+    window_start_array = rng.uniform(100, renewal_time_array[-1] - 100, size=10**5)
+    time_to_renewal_array = (
+        renewal_time_array[numpy.searchsorted(renewal_time_array, window_start_array)] - window_start_array
+    )
+    assert prob_attack_round == pytest.approx(numpy.mean(time_to_renewal_array <= window_length), abs=0.02)
+
+
+def test_request_cycle_sample_array_cache():
+    markovian_model._get_request_cycle_sample_array.cache_clear()
+
+    for _ in range(3):
+        markovian_model.prob_server_active(
+            network_delay_rv=random_variable.Uniform(min_value=0, max_value=1),
+            client_idle_time_rv=random_variable.Exponential(mu=1),
+            num_msgs_to_recv_for_get_request_rv=random_variable.DiscreteUniform(min_value=1, max_value=3),
+        )
+
+    cache_info = markovian_model._get_request_cycle_sample_array.cache_info()
+    assert cache_info.hits == 2
+    assert cache_info.misses == 1
+
+
+def test_get_rv_key_w_numpy_params():
+    rv_key = markovian_model.get_rv_key(
+        random_variable.DiscreteUniform(min_value=numpy.int64(1), max_value=numpy.int64(2))
+    )
+    assert rv_key == markovian_model.get_rv_key(random_variable.DiscreteUniform(min_value=1, max_value=2))
+    assert rv_key != markovian_model.get_rv_key(
+        random_variable.DiscreteUniform(min_value=numpy.int64(1), max_value=numpy.int64(9))
+    )
+    hash(rv_key)
@@ -1,5 +1,7 @@
 import dataclasses
+import numpy
 import pytest
+import scipy.stats
 
 from src.debug_utils import log, DEBUG, INFO
 from src.model_for_paper import model
@@ -98,3 +100,279 @@ def test_exp_setup_w_baseline(
         prob_target_as_non_target=prob_target_as_non_target,
         prob_non_target_as_target=prob_non_target_as_target,
     )
+
+
+def get_min_num_attack_rounds_w_brute_force(
+    exp_setup: model.ExpSetup,
+    max_prob_error: float,
+    max_num_attack_rounds: int,
+) -> int:
+    for num_attack_rounds in range(1, max_num_attack_rounds + 1):
+        if (
+            exp_setup.prob_target_as_non_target(num_attack_rounds=num_attack_rounds) <= max_prob_error
+            and exp_setup.prob_non_target_as_target(num_attack_rounds=num_attack_rounds) <= max_prob_error
+        ):
+            return num_attack_rounds
+
+    return None
+
+
+@pytest.mark.parametrize("num_target_servers", [1, 2, 3])
+@pytest.mark.parametrize("num_packets_to_deem_active", [None, 2])
+def test_get_min_num_attack_rounds_array_vs_brute_force(
+    num_target_servers: int,
+    num_packets_to_deem_active: int,
+):
+    max_prob_error = 0.05
+    exp_setup_list = [
+        model.ExpSetup_wBaseline(
+            non_target_arrival_rate=non_target_arrival_rate,
+            attack_window_length=1,
+            num_target_packets=4,
+            num_target_servers=num_target_servers,
+            alpha=alpha,
+            num_baseline_wins_per_attack_win=1,
+            num_packets_to_deem_active=num_packets_to_deem_active,
+        )
+        for non_target_arrival_rate in [0.1, 0.5, 2]
+        for alpha in [0.3, 0.8]
+    ]
+
+    num_attack_rounds_array = model.get_min_num_attack_rounds_array(
+        exp_setup_list=exp_setup_list,
+        max_prob_error=max_prob_error,
+    )
+    for exp_setup, num_attack_rounds in zip(exp_setup_list, num_attack_rounds_array):
+        assert num_attack_rounds == get_min_num_attack_rounds_w_brute_force(
+            exp_setup=exp_setup,
+            max_prob_error=max_prob_error,
+            max_num_attack_rounds=int(num_attack_rounds) + 1,
+        )
+        assert exp_setup.get_min_num_attack_rounds(max_prob_error=max_prob_error) == num_attack_rounds
+
+
+def test_get_min_num_attack_rounds_w_binomial_sampling_dist_past_first_chunk():
+    # The non-target error grows with `n` while `n * threshold < 1`, but stays below
+    # `max_prob_error` until the target error drops below it at `n = 88`.
+    num_attack_rounds_array = model.get_min_num_attack_rounds_w_binomial_sampling_dist(
+        prob_target_active=[0.1, 0.3],
+        prob_non_target_active=[1e-7, 0.5],
+        threshold_to_identify_as_target=[1e-7, 0.4],
+        max_prob_error=1e-4,
+        max_num_attack_rounds=2**12,
+    )
+    assert num_attack_rounds_array[0] == 88
+    assert numpy.isinf(num_attack_rounds_array[1])
+
+
+def test_get_min_num_attack_rounds_w_binomial_sampling_dist_w_small_chunks():
+    rng = numpy.random.default_rng(0)
+    prob_target_active = rng.uniform(0.2, 0.9, size=(5, 8))
+    prob_non_target_active = rng.uniform(0.05, 0.6, size=(5, 8))
+    threshold_to_identify_as_target = (prob_target_active + prob_non_target_active) / 2
+
+    num_attack_rounds_array = model.get_min_num_attack_rounds_w_binomial_sampling_dist(
+        prob_target_active=prob_target_active,
+        prob_non_target_active=prob_non_target_active,
+        threshold_to_identify_as_target=threshold_to_identify_as_target,
+        max_prob_error=0.05,
+        max_num_attack_rounds=2**12,
+    )
+    num_attack_rounds_array_w_small_chunks = model.get_min_num_attack_rounds_w_binomial_sampling_dist(
+        prob_target_active=prob_target_active,
+        prob_non_target_active=prob_non_target_active,
+        threshold_to_identify_as_target=threshold_to_identify_as_target,
+        max_prob_error=0.05,
+        max_num_attack_rounds=2**12,
+        max_chunk_size=100,
+    )
+    assert numpy.array_equal(num_attack_rounds_array, num_attack_rounds_array_w_small_chunks)
+
+
+def test_get_min_num_attack_rounds_w_gaussian_sampling_dist_wo_solution():
+    num_attack_rounds_array = model.get_min_num_attack_rounds_w_gaussian_sampling_dist(
+        gap=[-0.1, 0, 0, 0.1],
+        stdev=[0.5, 0.5, 0, 0],
+        max_prob_error=0.1,
+    )
+    assert numpy.all(numpy.isinf(num_attack_rounds_array[:3]))
+    assert num_attack_rounds_array[3] == 1
+
+
+def test_get_min_num_attack_rounds_w_binomial_sampling_dist_vs_brute_force():
+    max_prob_error = 0.05
+    prob_target_active = numpy.array([1, 0.9, 0.6, 0.6])
+    prob_non_target_active = numpy.array([0.1, 0.3, 0.5, 0.3])
+    threshold_to_identify_as_target = (prob_target_active + prob_non_target_active) / 2
+
+    num_attack_rounds_array = model.get_min_num_attack_rounds_w_binomial_sampling_dist(
+        prob_target_active=prob_target_active,
+        prob_non_target_active=prob_non_target_active,
+        threshold_to_identify_as_target=threshold_to_identify_as_target,
+        max_prob_error=max_prob_error,
+    )
+
+    for i, num_attack_rounds in enumerate(num_attack_rounds_array):
+        n = numpy.arange(1, int(num_attack_rounds) + 1)
+        num_rounds_as_target = numpy.floor(n * threshold_to_identify_as_target[i])
+        is_feasible = (
+            (scipy.stats.binom.cdf(num_rounds_as_target, n, prob_target_active[i]) <= max_prob_error)
+            & (1 - scipy.stats.binom.cdf(num_rounds_as_target, n, prob_non_target_active[i]) <= max_prob_error)
+        )
+        assert is_feasible.argmax() + 1 == num_attack_rounds
+
+
+def test_get_min_num_attack_rounds_w_binomial_sampling_dist_w_small_prob_error():
+    max_prob_error = 1e-12
+    prob_target_active = numpy.array([0.9, 0.6])
+    prob_non_target_active = numpy.array([0.1, 0.4])
+    threshold_to_identify_as_target = numpy.array([0.5, 0.5])
+
+    num_attack_rounds_array = model.get_min_num_attack_rounds_w_binomial_sampling_dist(
+        prob_target_active=prob_target_active,
+        prob_non_target_active=prob_non_target_active,
+        threshold_to_identify_as_target=threshold_to_identify_as_target,
+        max_prob_error=max_prob_error,
+    )
+
+    for i, num_attack_rounds in enumerate(num_attack_rounds_array):
+        n = numpy.arange(1, int(num_attack_rounds) + 1)
+        num_rounds_as_target = numpy.floor(n * threshold_to_identify_as_target[i])
+        is_feasible = (
+            (scipy.stats.binom.cdf(num_rounds_as_target, n, prob_target_active[i]) <= max_prob_error)
+            & (scipy.stats.binom.sf(num_rounds_as_target, n, prob_non_target_active[i]) <= max_prob_error)
+        )
+        assert is_feasible.argmax() + 1 == num_attack_rounds
+
+
+@pytest.mark.parametrize("num_target_servers", [1, 2, 5])
+@pytest.mark.parametrize("num_target_packets", [1, 4, 20])
+def test_get_prob_active_in_attack_win_w_num_packets_to_deem_active(
+    num_target_servers: int,
+    num_target_packets: int,
+):
+    target_server = model.TargetServer_wBaseline(
+        non_target_arrival_rate=1,
+        attack_window_length=2,
+        num_target_packets=num_target_packets,
+        num_target_servers=num_target_servers,
+        num_baseline_wins_per_attack_win=1,
+        num_packets_to_deem_active=2,
+    )
+
+    num_packets_to_deem_active_array = numpy.arange(num_target_packets + 5)
+    prob_active_array = target_server.get_prob_active_in_attack_win_w_num_packets_to_deem_active(
+        num_packets_to_deem_active_array
+    )
+    assert prob_active_array.shape == num_packets_to_deem_active_array.shape
+
+    num_target_arrivals_rv = scipy.stats.binom(num_target_packets, 1 / num_target_servers)
+    num_non_target_arrivals_rv = scipy.stats.poisson(2)
+    for num_packets_to_deem_active, prob_active in zip(num_packets_to_deem_active_array, prob_active_array):
+        # The model deems the single target server always active.
+        expected_prob_active = 1 if num_target_servers == 1 else sum(
+            num_target_arrivals_rv.pmf(num_target_arrivals)
+            * num_non_target_arrivals_rv.sf(num_packets_to_deem_active - num_target_arrivals - 1)
+            for num_target_arrivals in range(num_target_packets + 1)
+        )
+        assert prob_active == pytest.approx(expected_prob_active)
+        assert target_server.get_prob_active_in_attack_win_w_num_packets_to_deem_active(
+            int(num_packets_to_deem_active)
+        ) == pytest.approx(prob_active)
+
+
+def test_get_attack_perf_grid_w_baseline_vs_exp_setup():
+    non_target_arrival_rate_array = numpy.array([0, 0.5, 2])
+    num_target_servers_array = numpy.array([1, 3])
+    num_packets_to_deem_active_array = numpy.array([1, 2, 4])
+    num_target_packets = 10
+    max_prob_error = 0.05
+
+    # Small chunks to evaluate the grid over multiple chunks.
+    attack_perf_grid = model.get_attack_perf_grid_w_baseline(
+        non_target_arrival_rate=non_target_arrival_rate_array[:, None, None],
+        attack_window_length=1,
+        num_target_packets=num_target_packets,
+        num_target_servers=num_target_servers_array[None, :, None],
+        alpha=0.5,
+        max_prob_error=max_prob_error,
+        num_packets_to_deem_active=num_packets_to_deem_active_array[None, None, :],
+        max_chunk_size=20,
+    )
+    assert attack_perf_grid.num_attack_rounds.shape == (3, 2, 3)
+
+    for (i, j, k), num_attack_rounds in numpy.ndenumerate(attack_perf_grid.num_attack_rounds):
+        exp_setup = model.ExpSetup_wBaseline(
+            non_target_arrival_rate=non_target_arrival_rate_array[i],
+            attack_window_length=1,
+            num_target_packets=num_target_packets,
+            num_target_servers=int(num_target_servers_array[j]),
+            alpha=0.5,
+            num_baseline_wins_per_attack_win=1,
+            num_packets_to_deem_active=int(num_packets_to_deem_active_array[k]),
+        )
+        assert attack_perf_grid.prob_target_active_in_attack_win[i, j, k] == pytest.approx(
+            exp_setup.target_server.prob_active_in_attack_win
+        )
+        assert attack_perf_grid.prob_non_target_active_in_attack_win[i, j, k] == pytest.approx(
+            exp_setup.non_target_server.prob_active_in_attack_win
+        )
+        assert attack_perf_grid.target_detection_threshold[i, j, k] == pytest.approx(
+            exp_setup.target_detection_threshold
+        )
+        assert num_attack_rounds == model.get_min_num_attack_rounds_array([exp_setup], max_prob_error)[0]
+
+        if numpy.isfinite(num_attack_rounds):
+            assert attack_perf_grid.prob_target_as_non_target[i, j, k] == pytest.approx(
+                exp_setup.prob_target_as_non_target(int(num_attack_rounds))
+            )
+            assert attack_perf_grid.prob_non_target_as_target[i, j, k] == pytest.approx(
+                exp_setup.prob_non_target_as_target(int(num_attack_rounds))
+            )
+
+
+@pytest.mark.parametrize(
+    "non_target_arrival_rate, num_target_packets, num_target_servers",
+    [(1, 20, 5), (0.2, 5, 2), (3, 10, 3)],
+)
+def test_get_optimal_num_packets_to_deem_active_and_alpha_vs_brute_force(
+    non_target_arrival_rate: float,
+    num_target_packets: int,
+    num_target_servers: int,
+):
+    max_prob_error = 0.1
+    exp_setup = model.ExpSetup_wBaseline(
+        non_target_arrival_rate=non_target_arrival_rate,
+        attack_window_length=5,
+        num_target_packets=num_target_packets,
+        num_target_servers=num_target_servers,
+        alpha=0.5,
+        num_baseline_wins_per_attack_win=1,
+    )
+    (
+        num_packets_to_deem_active,
+        alpha,
+        num_attack_rounds,
+    ) = exp_setup.get_optimal_num_packets_to_deem_active_and_alpha(max_prob_error=max_prob_error)
+
+    attack_perf_grid = model.get_attack_perf_grid_w_baseline(
+        non_target_arrival_rate=non_target_arrival_rate,
+        attack_window_length=5,
+        num_target_packets=num_target_packets,
+        num_target_servers=num_target_servers,
+        alpha=numpy.linspace(0.001, 0.999, 999)[None, :],
+        max_prob_error=max_prob_error,
+        num_packets_to_deem_active=numpy.arange(1, num_target_packets + 1)[:, None],
+    )
+    assert num_attack_rounds == attack_perf_grid.num_attack_rounds.min()
+
+    exp_setup = model.ExpSetup_wBaseline(
+        non_target_arrival_rate=non_target_arrival_rate,
+        attack_window_length=5,
+        num_target_packets=num_target_packets,
+        num_target_servers=num_target_servers,
+        alpha=alpha,
+        num_baseline_wins_per_attack_win=1,
+        num_packets_to_deem_active=num_packets_to_deem_active,
+    )
+    assert exp_setup.get_min_num_attack_rounds(max_prob_error=max_prob_error) == num_attack_rounds
@@ -0,0 +1,60 @@
+import numpy
+import pytest
+import simpy
+
+from src.model import model_w_rounds
+from src.sim import sim
+
+
+def test_model_w_rounds_w_arrays():
+    prob_server_active_array = numpy.array([0.1, 0.3, 0.5])
+    detection_gap_exp_factor_array = numpy.array([0.5, 1, 2])
+
+    model = model_w_rounds.Model_wRounds(
+        num_clients=10,
+        num_servers=10,
+        num_target_servers=numpy.array([1, 2])[:, None],
+        prob_server_active=prob_server_active_array[:, None, None],
+        prob_attack_round=0.5,
+    )
+    max_stdev_array = model.max_stdev_of_prob_estimates(detection_gap_exp_factor=detection_gap_exp_factor_array)
+    detection_threshold_array = model.detection_threshold(detection_gap_exp_factor=detection_gap_exp_factor_array)
+    assert max_stdev_array.shape == detection_threshold_array.shape == (3, 2, 3)
+
+    for (i, j, k), max_stdev in numpy.ndenumerate(max_stdev_array):
+        model = model_w_rounds.Model_wRounds(
+            num_clients=10,
+            num_servers=10,
+            num_target_servers=[1, 2][j],
+            prob_server_active=prob_server_active_array[i],
+            prob_attack_round=0.5,
+        )
+        detection_gap_exp_factor = detection_gap_exp_factor_array[k]
+        assert max_stdev == pytest.approx(model.max_stdev_of_prob_estimates(detection_gap_exp_factor))
+        assert detection_threshold_array[i, j, k] == pytest.approx(model.detection_threshold(detection_gap_exp_factor))
+
+
+def test_get_adversary_w_precomputed_detection_threshold():
+    kwargs = dict(
+        num_clients=10,
+        num_servers=10,
+        num_target_servers=2,
+        prob_server_active=0.3,
+        prob_attack_round=0.5,
+    )
+    adversary = sim.get_adversary(
+        env=simpy.Environment(),
+        max_delivery_time_for_adversary=1,
+        detection_gap_exp_factor=1,
+        **kwargs,
+    )
+
+    max_stdev, detection_threshold = sim.get_max_stdev_and_detection_threshold(detection_gap_exp_factor=1, **kwargs)
+    adversary_w_precomputed_threshold = sim.get_adversary(
+        env=simpy.Environment(),
+        max_delivery_time_for_adversary=1,
+        max_stdev=float(max_stdev),
+        detection_threshold=float(detection_threshold),
+    )
+    assert adversary_w_precomputed_threshold.max_stdev == adversary.max_stdev
+    assert adversary_w_precomputed_threshold.detection_threshold == adversary.detection_threshold
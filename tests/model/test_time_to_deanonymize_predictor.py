@@ -0,0 +1,45 @@
+import numpy
+import pytest
+import scipy.stats
+
+from src.attack import disclosure_attack
+from src.model import time_to_deanonymize_predictor
+
+
+@pytest.mark.parametrize("prob_in_sample_set", [0.05, 0.3, 0.5, 0.9])
+@pytest.mark.parametrize("max_stdev", [0.02, 0.1, 0.3])
+def test_get_prob_zero_and_prob_beta_stdev_below_vs_brute_force(
+    prob_in_sample_set: float,
+    max_stdev: float,
+):
+    num_sample_sets_array = numpy.arange(60)
+    prob_zero_array, prob_stdev_below_array = time_to_deanonymize_predictor.get_prob_zero_and_prob_beta_stdev_below(
+        num_sample_sets=num_sample_sets_array,
+        prob_in_sample_set=prob_in_sample_set,
+        max_stdev=max_stdev,
+    )
+
+    for n, prob_zero, prob_stdev_below in zip(num_sample_sets_array, prob_zero_array, prob_stdev_below_array):
+        k = numpy.arange(1, n + 1)
+        is_stdev_below = scipy.stats.beta.std(k + 1, n - k + 1) <= max_stdev
+        assert prob_zero == pytest.approx(scipy.stats.binom.pmf(0, n, prob_in_sample_set))
+        assert prob_stdev_below == pytest.approx(
+            scipy.stats.binom.pmf(k, n, prob_in_sample_set) @ is_stdev_below, abs=1e-9
+        )
+
+
+def test_time_to_deanonymize_predictor_vs_sim():
+    predictor = time_to_deanonymize_predictor.TimeToDeanonymizePredictor(
+        num_clients=10,
+        num_servers=10,
+        num_target_servers=2,
+        prob_server_active=0.5,
+        prob_attack_round=0.5,
+        detection_gap_exp_factor=0.5,
+    )
+    prediction = predictor.predict()
+    assert prediction.prob_num_rounds_truncated == pytest.approx(0)
+    assert prediction.E_num_rounds >= disclosure_attack.MIN_NUM_ROUNDS
+
+    validation = predictor.validate(num_samples=10, max_rel_error=0.2, crn_seed=1)
+    assert validation["agrees"]
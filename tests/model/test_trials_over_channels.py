@@ -0,0 +1,115 @@
+import numpy
+import pytest
+import random
+
+from src.model import trials_over_channels
+
+
+@pytest.mark.parametrize("n, m, k, p", [(5, 1, 1, 0.5), (5, 2, 3, 0.3), (8, 8, 2, 0.9), (6, 3, 4, 1)])
+def test_sorted_num_trials_array_vs_trial_by_trial(n: int, m: int, k: int, p: float):
+    num_samples = 4000
+    sorted_num_trials_array = (
+        trials_over_channels.sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes_array(
+            n=n, m=m, k=k, p=p, num_samples=num_samples, rng=numpy.random.default_rng(1),
+        )
+    )
+    assert sorted_num_trials_array.shape == (num_samples, n)
+    assert numpy.all(sorted_num_trials_array[:, n - m] >= k)
+
+    random.seed(1)
+    sorted_num_trials_array_trial_by_trial = numpy.array(
+        [
+            trials_over_channels.sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes_trial_by_trial(
+                n=n, m=m, k=k, p=p,
+            )
+            for _ in range(num_samples)
+        ]
+    )
+
+    stdev_of_mean_array = numpy.maximum(sorted_num_trials_array_trial_by_trial.std(axis=0), 0.1) / numpy.sqrt(num_samples)
+    assert numpy.all(
+        numpy.abs(sorted_num_trials_array.mean(axis=0) - sorted_num_trials_array_trial_by_trial.mean(axis=0))
+        <= 5 * stdev_of_mean_array
+    )
+
+
+@pytest.mark.parametrize("n, m, k, p", [(5, 1, 1, 0.5), (5, 2, 3, 0.3), (8, 8, 2, 0.9), (6, 3, 4, 1)])
+def test_E_and_stdev_sorted_num_trials_vs_sim(n: int, m: int, k: int, p: float):
+    E_array, stdev_array = trials_over_channels.get_E_and_stdev_sorted_num_trials_over_channels(n=n, m=m, k=k, p=p)
+
+    sorted_num_trials_array = (
+        trials_over_channels.sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes_array(
+            n=n, m=m, k=k, p=p, num_samples=10**5, rng=numpy.random.default_rng(1),
+        )
+    )
+    assert E_array == pytest.approx(sorted_num_trials_array.mean(axis=0), abs=0.02)
+    assert stdev_array == pytest.approx(sorted_num_trials_array.std(axis=0), abs=0.02)
+
+
+def test_E_and_stdev_sorted_num_trials_w_arrays():
+    k_array, p_array = numpy.array([2, 5])[:, numpy.newaxis], numpy.array([0.3, 0.6, 0.9])
+    E_array, stdev_array = trials_over_channels.get_E_and_stdev_sorted_num_trials_over_channels(
+        n=6, m=2, k=k_array, p=p_array,
+    )
+    assert E_array.shape == stdev_array.shape == (2, 3, 6)
+
+    for (i, j), _ in numpy.ndenumerate(E_array[..., 0]):
+        E, stdev = trials_over_channels.get_E_and_stdev_sorted_num_trials_over_channels(
+            n=6, m=2, k=k_array[i, 0], p=p_array[j],
+        )
+        assert numpy.allclose(E_array[i, j], E)
+        assert numpy.allclose(stdev_array[i, j], stdev)
+
+
+def test_E_and_stdev_sorted_num_trials_w_small_chunks():
+    k_array, p_array = numpy.array([1, 3, 8])[:, numpy.newaxis], numpy.array([0.1, 0.5, 0.9])
+    E_array, stdev_array = trials_over_channels.get_E_and_stdev_sorted_num_trials_over_channels(
+        n=8, m=3, k=k_array, p=p_array,
+    )
+    E_array_w_small_chunks, stdev_array_w_small_chunks = (
+        trials_over_channels.get_E_and_stdev_sorted_num_trials_over_channels(
+            n=8, m=3, k=k_array, p=p_array, max_chunk_size=2**10,
+        )
+    )
+    assert numpy.allclose(E_array, E_array_w_small_chunks)
+    assert numpy.allclose(stdev_array, stdev_array_w_small_chunks)
+
+
+def test_sorted_num_trials_accumulator():
+    n = 6
+    sorted_num_trials_array = (
+        trials_over_channels.sample_sorted_num_trials_over_channels_until_m_channels_reach_k_successes_array(
+            n=n, m=2, k=3, p=0.4, num_samples=1000, rng=numpy.random.default_rng(1),
+        )
+    )
+
+    accumulator = trials_over_channels.SortedNumTrialsAccumulator(n=n, max_num_successes=4)
+    other_accumulator = trials_over_channels.SortedNumTrialsAccumulator(n=n, max_num_successes=4)
+    for first_sample in range(0, 600, 70):
+        accumulator.add(sorted_num_trials_array[first_sample:min(first_sample + 70, 600)])
+    other_accumulator.add(sorted_num_trials_array[600:])
+    accumulator.merge(other_accumulator)
+
+    assert accumulator.num_samples == 1000
+    assert numpy.allclose(accumulator.mean_array, sorted_num_trials_array.mean(axis=0))
+    assert numpy.allclose(accumulator.stdev_array, sorted_num_trials_array.std(axis=0))
+    for i in range(n):
+        histogram = numpy.bincount(numpy.minimum(sorted_num_trials_array[:, i], 5), minlength=6)
+        assert numpy.array_equal(accumulator.histogram_array[i], histogram)
+
+
+def test_sim_sorted_num_trials_over_channels_w_joblib():
+    n, m, k, p = 6, 2, 3, 0.4
+    accumulator = trials_over_channels.sim_sorted_num_trials_over_channels_w_joblib(
+        n=n, m=m, k=k, p=p, num_samples=10**5, seed=1, num_workers=2,
+    )
+    assert accumulator.num_samples == 10**5
+
+    E_array, stdev_array = trials_over_channels.get_E_and_stdev_sorted_num_trials_over_channels(n=n, m=m, k=k, p=p)
+    assert accumulator.mean_array == pytest.approx(E_array, abs=0.02)
+    assert accumulator.stdev_array == pytest.approx(stdev_array, abs=0.02)
+
+    same_accumulator = trials_over_channels.sim_sorted_num_trials_over_channels_w_joblib(
+        n=n, m=m, k=k, p=p, num_samples=10**5, seed=1, num_workers=2,
+    )
+    assert numpy.array_equal(accumulator.mean_array, same_accumulator.mean_array)
@@ -0,0 +1,64 @@
+import numpy
+import scipy.special
+import scipy.stats
+
+from src.model import markovian_model
+from src.prob import prob_kernel
+
+
+def test_prob_kernel():
+    prob_kernel.clear_caches()
+
+    for k in range(5):
+        assert numpy.isclose(prob_kernel.poisson_pmf(k, 2.5), scipy.stats.poisson.pmf(k, 2.5))
+        assert numpy.isclose(prob_kernel.poisson_cdf(k, 2.5), scipy.stats.poisson.cdf(k, 2.5))
+        assert numpy.isclose(prob_kernel.poisson_sf(k, 2.5), scipy.stats.poisson.sf(k, 2.5))
+        assert numpy.isclose(prob_kernel.binom_pmf(k, 10, 0.3), scipy.stats.binom.pmf(k, 10, 0.3))
+        assert numpy.isclose(prob_kernel.binom_cdf(k, 10, 0.3), scipy.stats.binom.cdf(k, 10, 0.3))
+        assert numpy.isclose(prob_kernel.binom_sf(k, 10, 0.3), scipy.stats.binom.sf(k, 10, 0.3))
+
+    assert prob_kernel.get_num_cache_hits_and_misses() == (0, 30)
+
+
+def test_prob_kernel_cache():
+    prob_kernel.clear_caches()
+
+    for _ in range(3):
+        markovian_model.prob_at_least_n_arrivals(attack_window_length=2, arrival_rate=1, n=1)
+
+    cache_info = prob_kernel.get_cache_info()["poisson_sf"]
+    assert cache_info["hits"] == 2
+    assert cache_info["misses"] == 1
+    assert cache_info["currsize"] == 1
+
+    prob_kernel.clear_caches()
+    assert prob_kernel.get_num_cache_hits_and_misses() == (0, 0)
+
+
+def test_log_tail_kernels_vs_scipy():
+    k = numpy.arange(-2, 30)
+    for n, p in [(25, 0.3), (25, 0), (25, 1), (1, 0.5)]:
+        assert numpy.allclose(prob_kernel.binom_logpmf_array(k, n, p), scipy.stats.binom.logpmf(k, n, p))
+        assert numpy.allclose(prob_kernel.binom_logcdf_array(k, n, p), scipy.stats.binom.logcdf(k, n, p))
+        assert numpy.allclose(prob_kernel.binom_logsf_array(k, n, p), scipy.stats.binom.logsf(k, n, p))
+
+    for mu in [0.5, 3, 20]:
+        assert numpy.allclose(prob_kernel.poisson_logpmf_array(k, mu), scipy.stats.poisson.logpmf(k, mu))
+        assert numpy.allclose(prob_kernel.poisson_logcdf_array(k, mu), scipy.stats.poisson.logcdf(k, mu))
+        assert numpy.allclose(prob_kernel.poisson_logsf_array(k, mu), scipy.stats.poisson.logsf(k, mu))
+
+
+def test_log_tail_kernels_in_underflow_region():
+    n, p, k = 10**5, 0.3, 5000
+    logcdf = scipy.special.logsumexp(prob_kernel.binom_logpmf_array(numpy.arange(k + 1), n, p))
+    logsf = scipy.special.logsumexp(prob_kernel.binom_logpmf_array(numpy.arange(n - k, n + 1), n, 1 - p))
+    assert numpy.isclose(prob_kernel.binom_logcdf_array(k, n, p), logcdf, rtol=1e-6)
+    assert numpy.isclose(prob_kernel.binom_logsf_array(n - k - 1, n, 1 - p), logsf, rtol=1e-6)
+
+    mu, k = 10, 5000
+    logsf = scipy.special.logsumexp(prob_kernel.poisson_logpmf_array(numpy.arange(k + 1, 4 * k), mu))
+    assert numpy.isclose(prob_kernel.poisson_logsf_array(k, mu), logsf, rtol=1e-6)
+
+    mu, k = 5000, 3
+    logcdf = scipy.special.logsumexp(prob_kernel.poisson_logpmf_array(numpy.arange(k + 1), mu))
+    assert numpy.isclose(prob_kernel.poisson_logcdf_array(k, mu), logcdf, rtol=1e-6)
@@ -0,0 +1,47 @@
+import numpy
+import simpy
+
+from src.prob import random_stream, random_variable
+from src.sim import tor_model as tor_model_module
+
+
+def test_random_streams():
+    random_streams = random_stream.RandomStreams(seed=1, replication=0)
+
+    sample_array = random_streams.get_rng("client", "c0", "idle_time").random(10)
+    assert numpy.array_equal(
+        sample_array,
+        random_streams.get_rng("client", "c0", "idle_time").random(10),
+    )
+    assert not numpy.array_equal(
+        sample_array,
+        random_streams.get_rng("client", "c1", "idle_time").random(10),
+    )
+    assert not numpy.array_equal(
+        sample_array,
+        random_stream.RandomStreams(seed=1, replication=1).get_rng("client", "c0", "idle_time").random(10),
+    )
+
+    rv = random_variable.Exponential(mu=1)
+    assert rv.sample(rng=random_streams.get_rng("a")) == rv.sample(rng=random_streams.get_rng("a"))
+
+
+def test_tor_model_w_common_random_numbers():
+    def get_server_activity_sample_array(num_servers: int) -> numpy.ndarray:
+        tor_model = tor_model_module.TorModel_wRounds(
+            env=simpy.Environment(),
+            num_clients=num_servers,
+            num_servers=num_servers,
+            num_target_servers=1,
+            max_delivery_time_for_adversary=1,
+            prob_server_active=0.5,
+            prob_attack_round=0.5,
+            random_streams=random_stream.RandomStreams(seed=1, replication=0),
+        )
+        return tor_model.server_activity_rng_list[0].random(10)
+
+    # Activity of a server does not depend on the number of servers.
+    assert numpy.array_equal(
+        get_server_activity_sample_array(num_servers=5),
+        get_server_activity_sample_array(num_servers=10),
+    )
@@ -0,0 +1,45 @@
+import numpy
+import pytest
+
+from src.prob import random_variable
+
+
+@pytest.mark.parametrize(
+    "rv, mean",
+    [
+        (random_variable.Exponential(mu=2, D=1), 1.5),
+        (random_variable.Uniform(min_value=1, max_value=3), 2),
+        (random_variable.DiscreteUniform(min_value=1, max_value=4), 2.5),
+        (random_variable.Normal(mu=1, sigma=2), 1),
+        (random_variable.TruncatedNormal(mu=3, sigma=1), None),
+        (random_variable.Poisson(mu=2), 2),
+        (random_variable.Beta(a=2, b=3, D=2), 0.8),
+        (random_variable.Binomial(n=10, p=0.3), 3),
+        (random_variable.BoundedZipf(min_value=1, max_value=10), None),
+    ],
+)
+def test_sample_w_size(rv: random_variable.RandomVariable, mean: float):
+    if mean is None:
+        mean = rv.mean()
+
+    sample_array = rv.sample(size=10**5, rng=numpy.random.default_rng(1))
+    assert isinstance(sample_array, numpy.ndarray)
+    assert sample_array.shape == (10**5,)
+    assert numpy.all((rv.min_value <= sample_array) & (sample_array <= rv.max_value))
+    assert sample_array.mean() == pytest.approx(mean, rel=0.02)
+
+    assert rv.sample(size=(2, 3)).shape == (2, 3)
+    assert numpy.array_equal(
+        sample_array,
+        rv.sample(size=10**5, rng=numpy.random.default_rng(1)),
+    )
+
+    assert numpy.ndim(rv.sample()) == 0
+    assert numpy.ndim(rv.sample(rng=numpy.random.default_rng(1))) == 0
+
+
+def test_bounded_zipf():
+    rv = random_variable.BoundedZipf(min_value=1, max_value=10, a=1)
+
+    assert rv.tail_prob(1) == pytest.approx(1 - rv.pdf(1))
+    assert rv.inverse_cdf(rv.cdf(3)) == 3
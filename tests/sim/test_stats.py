@@ -0,0 +1,102 @@
+import tracemalloc
+
+from src.attack import disclosure_attack
+from src.prob import random_variable
+from src.sim import sim, stats
+
+
+def test_sim_tor_model_w_stats():
+    sim_result_list = [
+        sim.sim_tor_model(
+            num_clients=4,
+            num_servers=4,
+            num_target_servers=1,
+            prob_server_active=0.2,
+            prob_attack_round=0.5,
+            detection_gap_exp_factor=1,
+            num_samples=2,
+            w_stats=True,
+        )
+        for _ in range(2)
+    ]
+
+    for sim_result in sim_result_list:
+        sim_stats = sim_result[-1]
+        assert isinstance(sim_stats, stats.SimStats)
+        assert sim_stats.num_events > 0
+        assert sim_stats.num_msgs_delivered is None
+        assert sim_stats.adversary_hook_name_to_num_calls_map["client_completed_get_request"] > 0
+        assert 0 < sim_stats.time_in_adversary_in_secs < sim_stats.wall_clock_time_in_secs
+
+    disclosure_attack_result = disclosure_attack.get_disclosure_attack_result(
+        sim_result_list=sim_result_list,
+        num_servers=4,
+        num_target_servers=1,
+    )
+    assert len(disclosure_attack_result.sim_stats_list) == 2
+    assert len(disclosure_attack_result.time_to_deanonymize_list) == 2
+
+    sim_stats_summary = stats.get_sim_stats_summary(disclosure_attack_result.sim_stats_list)
+    assert 0 < sim_stats_summary["frac_time_in_adversary"] < 1
+    assert sim_stats_summary["E_num_calls_client_completed_get_request"] > 0
+    assert "E_num_msgs_delivered" not in sim_stats_summary
+
+
+def test_time_adversary_hooks_times_outermost_call_only():
+    class Adversary:
+        def client_completed_get_request(self):
+            self.get_sample_candidate_set()
+
+        def get_sample_candidate_set(self):
+            pass
+
+    adversary = Adversary()
+    sim_stats = stats.SimStats()
+    stats.time_adversary_hooks(adversary=adversary, sim_stats=sim_stats)
+    adversary.client_completed_get_request()
+
+    assert sim_stats.adversary_hook_name_to_num_calls_map == {
+        "client_completed_get_request": 1,
+        "get_sample_candidate_set": 1,
+    }
+    assert sim_stats.time_in_adversary_in_secs > 0
+
+
+def test_sim_tor_w_memory_sampler():
+    sim_result = sim.sim_tor(
+        num_clients=4,
+        num_servers=4,
+        num_target_servers=1,
+        network_delay_rv=random_variable.Uniform(min_value=0, max_value=1),
+        client_idle_time_rv=random_variable.Exponential(mu=1),
+        target_client_idle_time_rv=random_variable.Exponential(mu=1),
+        num_msgs_to_recv_for_get_request_rv=random_variable.DiscreteUniform(min_value=1, max_value=1),
+        num_samples=1,
+        stability_threshold=0.01,
+        memory_sample_interval=1,
+    )
+
+    sim_stats = sim_result[-1]
+    assert isinstance(sim_stats, stats.SimStats)
+    memory_sample_list = sim_stats.memory_sample_list
+    assert len(memory_sample_list) >= 2
+    assert [memory_sample.time for memory_sample in memory_sample_list] == sorted(
+        memory_sample.time for memory_sample in memory_sample_list
+    )
+    for memory_sample in memory_sample_list:
+        assert set(memory_sample.structure_name_to_num_entries_map) == {
+            "server_id_to_time_epochs_msg_sent_map",
+            "server_id_to_weight_map",
+            "server_id_to_baseline_weight_map",
+            "server_id_weight_diff_map",
+            "forward_time_and_msg_heapq",
+        }
+        assert memory_sample.traced_memory_in_bytes > 0
+        assert len(memory_sample.top_allocation_list) > 0
+
+    # Stopped by the sampler since it was not tracing before.
+    assert not tracemalloc.is_tracing()
+
+    sim_stats_summary = stats.get_sim_stats_summary([sim_stats])
+    assert "E_max_num_entries_forward_time_and_msg_heapq" in sim_stats_summary
+    assert "server_id_to_time_epochs_msg_sent_map" in stats.get_structure_name_to_growth_rate_map(memory_sample_list)
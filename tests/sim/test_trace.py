@@ -0,0 +1,63 @@
+import numpy
+import simpy
+
+from src.attack import disclosure_attack
+from src.prob import random_variable
+from src.sim import tor as tor_module
+from src.sim import trace
+
+
+def test_event_tracer_wraps_around():
+    tracer = trace.EventTracer(capacity=4)
+    for i in range(6):
+        tracer.record(trace.EventType.CLIENT_SENT, float(i), "c0", "s0", i)
+
+    column_map = tracer.get_column_map()
+    assert list(column_map["msg_id_array"]) == [2, 3, 4, 5]
+    assert list(column_map["time_array"]) == [2, 3, 4, 5]
+
+
+def test_tor_system_w_tracer(tmp_path):
+    env = simpy.Environment()
+    tracer = trace.EventTracer()
+    tor = tor_module.TorSystem(
+        env=env,
+        num_clients=3,
+        num_servers=3,
+        num_target_servers=1,
+        network_delay_rv=random_variable.Uniform(min_value=0, max_value=1),
+        client_idle_time_rv=random_variable.Exponential(mu=1),
+        target_client_idle_time_rv=random_variable.Exponential(mu=1),
+        num_msgs_to_recv_for_get_request_rv=random_variable.DiscreteUniform(min_value=1, max_value=1),
+        tracer=tracer,
+    )
+    tor.register_adversary(
+        adversary=disclosure_attack.DisclosureAttack(
+            env=env,
+            max_delivery_time_for_adversary=1,
+            error_percent=-1,
+        )
+    )
+    env.run(until=50)
+
+    file_path = str(tmp_path / "trace.npz")
+    tracer.dump(file_path)
+    trace_ = trace.load_trace(file_path)
+    assert len(trace_) == tracer.num_events
+    assert trace_.num_events_dropped == 0
+    assert numpy.all(numpy.diff(trace_.time_array) >= 0)
+
+    num_client_sent = trace_.get_event_mask(trace.EventType.CLIENT_SENT).sum()
+    num_server_sent = trace_.get_event_mask(trace.EventType.SERVER_SENT).sum()
+    num_network_delivered = trace_.get_event_mask(trace.EventType.NETWORK_DELIVERED).sum()
+    assert num_client_sent > 0
+    # Each GET request is responded with a single message.
+    assert num_client_sent >= num_server_sent >= num_client_sent - 4
+    assert num_network_delivered <= num_client_sent + num_server_sent
+    assert trace_.get_event_mask(trace.EventType.ADVERSARY_ROUND).sum() > 0
+
+    # Target client only talks to the target server.
+    server_sent_mask = trace_.get_event_mask(trace.EventType.SERVER_SENT)
+    to_target_client_mask = server_sent_mask & (trace_.dst_index_array == trace_.get_node_index("c-target"))
+    assert to_target_client_mask.sum() > 0
+    assert numpy.all(trace_.src_index_array[to_target_client_mask] == trace_.get_node_index("s0"))
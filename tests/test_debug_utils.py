@@ -0,0 +1,86 @@
+import logging
+import threading
+
+import simpy
+
+from src import debug_utils
+from src.debug_utils import log, slog, DEBUG, INFO
+
+
+class ReprCounter:
+    def __init__(self):
+        self.num_calls = 0
+
+    def __repr__(self):
+        self.num_calls += 1
+        return "ReprCounter"
+
+
+def test_disabled_log_does_not_format(caplog):
+    repr_counter = ReprCounter()
+    with caplog.at_level(logging.INFO, logger=debug_utils.LOGGER_NAME):
+        log(DEBUG, "", repr_counter=repr_counter)
+        slog(DEBUG, simpy.Environment(), repr_counter, "", repr_counter=repr_counter)
+
+    assert repr_counter.num_calls == 0
+    assert not caplog.records
+
+
+def test_enabled_log(caplog):
+    with caplog.at_level(logging.DEBUG, logger=debug_utils.LOGGER_NAME):
+        log(INFO, "msg", a=1)
+        slog(DEBUG, simpy.Environment(), "caller", "sim msg", b=2)
+
+    record = caplog.records[0]
+    assert record.levelno == logging.INFO
+    assert record.getMessage() == "msg\n  a: 1\n"
+    assert record.file_name == "test_debug_utils.py"
+    assert record.func_name == "test_enabled_log"
+
+    record = caplog.records[1]
+    assert record.levelno == logging.DEBUG
+    assert record.getMessage() == "t: 0.00] caller: sim msg \n  b: 2\n"
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.msg_list = []
+
+    def emit(self, record: logging.LogRecord):
+        self.msg_list.append(record.getMessage())
+
+
+def test_queued_logging(tmp_path):
+    list_handler = ListHandler()
+    debug_utils.logger.addHandler(list_handler)
+
+    listener = debug_utils.start_queued_logging(per_replication_log_dir=str(tmp_path))
+    assert list_handler not in debug_utils.logger.handlers
+
+    def log_replication(replication: int):
+        with debug_utils.log_replication(replication):
+            log(INFO, f"replication-{replication}")
+
+    thread_list = [threading.Thread(target=log_replication, args=(i,)) for i in range(2)]
+    for thread in thread_list:
+        thread.start()
+    for thread in thread_list:
+        thread.join()
+
+    # Kwargs are logged as they were at the time of the call.
+    value_list = [1]
+    log(INFO, "main", value_list=value_list)
+    value_list.append(2)
+
+    debug_utils.stop_queued_logging(listener)
+    debug_utils.logger.removeHandler(list_handler)
+    assert not any(
+        isinstance(handler, debug_utils.QueueHandler_wReplication)
+        for handler in debug_utils.logger.handlers
+    )
+
+    assert list_handler.msg_list == ["main\n  value_list: [1]\n"]
+    for i in range(2):
+        with open(tmp_path / f"replication_{i}.log") as f:
+            assert f"replication-{i}" in f.read()